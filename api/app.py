@@ -21,6 +21,9 @@ from flask_cors import CORS
 from core.model_providers.providers import hosted
 from extensions import ext_celery, ext_sentry, ext_redis, ext_login, ext_migrate, \
     ext_database, ext_storage, ext_mail, ext_stripe, ext_code_based_extension
+from core.embedding.embedding_cache import embedding_cache
+from core.generate_worker_pool import generate_worker_pool
+from core.vector_store.vector_client_pool import vector_client_pool
 from extensions.ext_database import db
 from extensions.ext_login import login_manager
 
@@ -231,5 +234,20 @@ def pool_stat():
     }
 
 
+@app.route('/vector-client-pool-stat')
+def vector_client_pool_stat():
+    return vector_client_pool.stats()
+
+
+@app.route('/embedding-cache-stat')
+def embedding_cache_stat():
+    return embedding_cache.stats()
+
+
+@app.route('/generate-worker-pool-stat')
+def generate_worker_pool_stat():
+    return generate_worker_pool.stats()
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001)
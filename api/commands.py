@@ -6,6 +6,7 @@ import string
 import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 import qdrant_client
@@ -27,7 +28,8 @@ from libs.helper import email as email_validate
 from extensions.ext_database import db
 from libs.rsa import generate_key_pair
 from models.account import InvitationCode, Tenant, TenantAccountJoin
-from models.dataset import Dataset, DatasetQuery, Document, DatasetCollectionBinding
+from libs.embedding_codec import EMBEDDING_FORMATS, decode_embedding, encode_embedding
+from models.dataset import Dataset, DatasetQuery, Document, DatasetCollectionBinding, Embedding
 from models.model import Account, AppModelConfig, App
 import secrets
 import base64
@@ -184,45 +186,55 @@ def generate_upper_string():
 
 
 @click.command('recreate-all-dataset-indexes', help='Recreate all dataset indexes.')
-def recreate_all_dataset_indexes():
+@click.option('--concurrency', default=4, help='Number of datasets recreated concurrently.')
+def recreate_all_dataset_indexes(concurrency):
     click.echo(click.style('Start recreate all dataset indexes.', fg='green'))
-    recreate_count = 0
+    recreate_count = []
 
     page = 1
-    while True:
-        try:
-            datasets = db.session.query(Dataset).filter(Dataset.indexing_technique == 'high_quality') \
-                .order_by(Dataset.created_at.desc()).paginate(page=page, per_page=50)
-        except NotFound:
-            break
-
-        page += 1
-        for dataset in datasets:
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
             try:
-                click.echo(f'Recreating dataset index: {dataset.id}')
-                index = IndexBuilder.get_index(dataset, 'high_quality')
-                if index and index._is_origin():
-                    index.recreate_dataset(dataset)
-                    recreate_count += 1
-                else:
-                    click.echo('passed.')
-            except Exception as e:
-                click.echo(
-                    click.style(
-                        f'Recreate dataset index error: {e.__class__.__name__} {str(e)}',
-                        fg='red',
-                    )
-                )
-                continue
+                datasets = db.session.query(Dataset).filter(Dataset.indexing_technique == 'high_quality') \
+                    .order_by(Dataset.created_at.desc()).paginate(page=page, per_page=50)
+            except NotFound:
+                break
+
+            page += 1
+            # the next page is queried once the datasets of this one are recreated
+            futures = [executor.submit(recreate_dataset_index, current_app._get_current_object(), dataset.id,
+                                       recreate_count) for dataset in datasets]
+            for future in futures:
+                future.result()
 
     click.echo(
         click.style(
-            f'Congratulations! Recreate {recreate_count} dataset indexes.',
+            f'Congratulations! Recreate {len(recreate_count)} dataset indexes.',
             fg='green',
         )
     )
 
 
+def recreate_dataset_index(flask_app: Flask, dataset_id: str, recreate_count: list):
+    with flask_app.app_context():
+        try:
+            dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+            click.echo(f'Recreating dataset index: {dataset_id}')
+            index = IndexBuilder.get_index(dataset, 'high_quality')
+            if index and index._is_origin():
+                index.recreate_dataset(dataset)
+                recreate_count.append(dataset_id)
+            else:
+                click.echo('passed.')
+        except Exception as e:
+            click.echo(
+                click.style(
+                    f'Recreate dataset index error: {e.__class__.__name__} {str(e)}',
+                    fg='red',
+                )
+            )
+
+
 @click.command('clean-unused-dataset-indexes', help='Clean unused dataset indexes.')
 def clean_unused_dataset_indexes():
     click.echo(click.style('Start clean unused dataset indexes.', fg='green'))
@@ -820,6 +832,59 @@ def migrate_default_input_to_dataset_query_variable(batch_size):
             pbar.update(len(data_batch))
 
 
+@click.command('migrate-embedding-storage-format', help='Re-encode cached embeddings to the compact storage format.')
+@click.option("--batch-size", default=1000, help="Number of records to migrate in each batch.")
+@click.option("--storage-format", type=click.Choice(list(EMBEDDING_FORMATS.keys())), default=None,
+              help="Target storage format, default is EMBEDDING_STORAGE_FORMAT.")
+def migrate_embedding_storage_format(batch_size, storage_format):
+    storage_format = storage_format or current_app.config['EMBEDDING_STORAGE_FORMAT']
+    click.secho(f"Start migrate cached embeddings to {storage_format} storage format.", fg='green')
+
+    total_records = db.session.query(Embedding).count()
+    if total_records == 0:
+        click.secho("No data to migrate.", fg='green')
+        return
+
+    migrated_count = 0
+    last_id = None
+    with tqdm(total=total_records, desc="Migrating Data") as pbar:
+        while True:
+            # keyset pagination, rows are re-encoded in place so offsets are not stable
+            query = db.session.query(Embedding.id, Embedding.embedding).order_by(Embedding.id)
+            if last_id:
+                query = query.filter(Embedding.id > last_id)
+
+            data_batch = query.limit(batch_size).all()
+            if not data_batch:
+                break
+
+            last_id = data_batch[-1].id
+            update_mappings = []
+            for data in data_batch:
+                try:
+                    vector = decode_embedding(data.embedding)
+                    encoded_embedding = encode_embedding(vector, storage_format)
+                except Exception as e:
+                    click.secho(f"Error while decoding embedding {data.id}: {e}", fg='red')
+                    continue
+
+                if encoded_embedding != data.embedding:
+                    update_mappings.append({'id': data.id, 'embedding': encoded_embedding})
+
+            try:
+                if update_mappings:
+                    db.session.bulk_update_mappings(Embedding, update_mappings)
+                db.session.commit()
+                migrated_count += len(update_mappings)
+            except Exception as e:
+                db.session.rollback()
+                click.secho(f"Error while migrating batch after id {data_batch[0].id}: {e}", fg='red')
+
+            pbar.update(len(data_batch))
+
+    click.secho(f"Migrated {migrated_count} cached embeddings.", fg='green')
+
+
 def register_commands(app):
     app.cli.add_command(reset_password)
     app.cli.add_command(reset_email)
@@ -834,3 +899,4 @@ def register_commands(app):
     app.cli.add_command(normalization_collections)
     app.cli.add_command(migrate_default_input_to_dataset_query_variable)
     app.cli.add_command(add_qdrant_full_text_index)
+    app.cli.add_command(migrate_embedding_storage_format)
@@ -38,6 +38,11 @@ DEFAULTS = {
     'SENTRY_PROFILES_SAMPLE_RATE': 1.0,
     'WEAVIATE_GRPC_ENABLED': 'True',
     'WEAVIATE_BATCH_SIZE': 100,
+    'QDRANT_UPSERT_BATCH_SIZE': 64,
+    'QDRANT_UPSERT_PARALLELISM': 2,
+    'VECTOR_CLIENT_POOL_IDLE_TIMEOUT': 300,
+    'VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL': 30,
+    'VECTOR_INDEX_REBUILD_BATCH_SIZE': 500,
     'CELERY_BACKEND': 'database',
     'LOG_LEVEL': 'INFO',
     'HOSTED_OPENAI_QUOTA_LIMIT': 200,
@@ -60,6 +65,23 @@ DEFAULTS = {
     'UPLOAD_FILE_BATCH_LIMIT': 5,
     'UPLOAD_IMAGE_FILE_SIZE_LIMIT': 10,
     'OUTPUT_MODERATION_BUFFER_SIZE': 300,
+    'OUTPUT_MODERATION_INCREMENTAL_ENABLED': 'True',
+    'OUTPUT_MODERATION_WINDOW_OVERLAP': 100,
+    'EMBEDDING_STORAGE_FORMAT': 'float32',
+    'EMBEDDING_CACHE_SIZE': 10000,
+    'TOKENIZER_CACHE_SIZE': 100000,
+    'EMBEDDING_CACHE_REDIS_ENABLED': 'False',
+    'EMBEDDING_CACHE_REDIS_TTL': 600,
+    'INDEXING_DOCUMENT_CONCURRENCY': 1,
+    'INDEXING_EMBEDDING_CONCURRENCY': 1,
+    'STREAMING_FLUSH_SIZE': 20,
+    'STREAMING_FLUSH_INTERVAL': 0.05,
+    'STREAMING_STOP_CHECK_INTERVAL': 0.5,
+    'GENERATE_WORKER_POOL_SIZE': 100,
+    'GENERATE_WORKER_QUEUE_SIZE': 100,
+    'MODEL_PROVIDER_CACHE_TTL': 10,
+    'PROVIDER_USAGE_WRITE_BEHIND_ENABLED': 'True',
+    'PROVIDER_USAGE_FLUSH_INTERVAL': 10,
     'MULTIMODAL_SEND_IMAGE_FORMAT': 'base64',
     'INVITE_EXPIRY_HOURS': 72
 }
@@ -73,6 +95,16 @@ def get_bool_env(key):
     return get_env(key).lower() == 'true'
 
 
+def get_provider_concurrency(env):
+    provider_concurrency = {}
+    if get_env(env):
+        for item in get_env(env).split(','):
+            provider_name, concurrency = item.split(':')
+            provider_concurrency[provider_name.strip()] = int(concurrency)
+
+    return provider_concurrency
+
+
 def get_cors_allow_origins(env, default):
     cors_allow_origins = []
     if get_env(env):
@@ -201,6 +233,9 @@ class Config:
         # qdrant settings
         self.QDRANT_URL = get_env('QDRANT_URL')
         self.QDRANT_API_KEY = get_env('QDRANT_API_KEY')
+        # points per upsert request and upsert requests in flight when adding texts
+        self.QDRANT_UPSERT_BATCH_SIZE = int(get_env('QDRANT_UPSERT_BATCH_SIZE'))
+        self.QDRANT_UPSERT_PARALLELISM = int(get_env('QDRANT_UPSERT_PARALLELISM'))
 
         # milvus / zilliz setting
         self.MILVUS_HOST = get_env('MILVUS_HOST')
@@ -215,6 +250,13 @@ class Config:
         self.WEAVIATE_GRPC_ENABLED = get_bool_env('WEAVIATE_GRPC_ENABLED')
         self.WEAVIATE_BATCH_SIZE = int(get_env('WEAVIATE_BATCH_SIZE'))
 
+        # pooled vector database clients idle for longer are closed, in seconds
+        self.VECTOR_CLIENT_POOL_IDLE_TIMEOUT = int(get_env('VECTOR_CLIENT_POOL_IDLE_TIMEOUT'))
+        # pooled vector database clients idle for longer are health checked before reuse, in seconds
+        self.VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL = int(get_env('VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL'))
+        # segments streamed and indexed per batch when rebuilding the index of a dataset
+        self.VECTOR_INDEX_REBUILD_BATCH_SIZE = int(get_env('VECTOR_INDEX_REBUILD_BATCH_SIZE'))
+
         # ------------------------
         # Mail Configurations.
         # ------------------------
@@ -245,13 +287,55 @@ class Config:
         self.TENANT_DOCUMENT_COUNT = get_env('TENANT_DOCUMENT_COUNT')
         self.CLEAN_DAY_SETTING = get_env('CLEAN_DAY_SETTING')
 
+        # embedding cache storage format, support float32, float16, int8, default is float32
+        self.EMBEDDING_STORAGE_FORMAT = get_env('EMBEDDING_STORAGE_FORMAT')
+
+        # query embedding cache, in-process LRU size and optional redis tier
+        self.EMBEDDING_CACHE_SIZE = int(get_env('EMBEDDING_CACHE_SIZE'))
+        self.EMBEDDING_CACHE_REDIS_ENABLED = get_bool_env('EMBEDDING_CACHE_REDIS_ENABLED')
+        self.EMBEDDING_CACHE_REDIS_TTL = int(get_env('EMBEDDING_CACHE_REDIS_TTL'))
+
+        # max number of token counts memoized per process
+        self.TOKENIZER_CACHE_SIZE = int(get_env('TOKENIZER_CACHE_SIZE'))
+
+        # indexing pipeline concurrency, documents indexed in parallel and chunks embedded in parallel per document.
+        # embedding concurrency can be set per provider, e.g. `openai:8,zhipuai:2`
+        self.INDEXING_DOCUMENT_CONCURRENCY = int(get_env('INDEXING_DOCUMENT_CONCURRENCY'))
+        self.INDEXING_EMBEDDING_CONCURRENCY = int(get_env('INDEXING_EMBEDDING_CONCURRENCY'))
+        self.INDEXING_EMBEDDING_PROVIDER_CONCURRENCY = get_provider_concurrency('INDEXING_EMBEDDING_PROVIDER_CONCURRENCY')
+
         # File upload Configurations.
         self.UPLOAD_FILE_SIZE_LIMIT = int(get_env('UPLOAD_FILE_SIZE_LIMIT'))
         self.UPLOAD_FILE_BATCH_LIMIT = int(get_env('UPLOAD_FILE_BATCH_LIMIT'))
         self.UPLOAD_IMAGE_FILE_SIZE_LIMIT = int(get_env('UPLOAD_IMAGE_FILE_SIZE_LIMIT'))
 
+        # Streaming Configurations.
+        # streamed tokens are published in micro-batches of up to STREAMING_FLUSH_SIZE characters
+        # or every STREAMING_FLUSH_INTERVAL seconds, the stop flag is checked every STREAMING_STOP_CHECK_INTERVAL seconds.
+        self.STREAMING_FLUSH_SIZE = int(get_env('STREAMING_FLUSH_SIZE'))
+        self.STREAMING_FLUSH_INTERVAL = float(get_env('STREAMING_FLUSH_INTERVAL'))
+        self.STREAMING_STOP_CHECK_INTERVAL = float(get_env('STREAMING_STOP_CHECK_INTERVAL'))
+
+        # Generate worker pool Configurations.
+        # at most GENERATE_WORKER_POOL_SIZE generations run at a time per process,
+        # requests beyond GENERATE_WORKER_QUEUE_SIZE waiting ones are rejected with 429.
+        self.GENERATE_WORKER_POOL_SIZE = int(get_env('GENERATE_WORKER_POOL_SIZE'))
+        self.GENERATE_WORKER_QUEUE_SIZE = int(get_env('GENERATE_WORKER_QUEUE_SIZE'))
+
+        # seconds to reuse the resolved model providers and default models of a tenant, 0 to disable.
+        self.MODEL_PROVIDER_CACHE_TTL = int(get_env('MODEL_PROVIDER_CACHE_TTL'))
+
+        # quota usage and last used time of providers are buffered in redis
+        # and written to the database every PROVIDER_USAGE_FLUSH_INTERVAL seconds.
+        self.PROVIDER_USAGE_WRITE_BEHIND_ENABLED = get_bool_env('PROVIDER_USAGE_WRITE_BEHIND_ENABLED')
+        self.PROVIDER_USAGE_FLUSH_INTERVAL = int(get_env('PROVIDER_USAGE_FLUSH_INTERVAL'))
+
         # Moderation in app Configurations.
         self.OUTPUT_MODERATION_BUFFER_SIZE = int(get_env('OUTPUT_MODERATION_BUFFER_SIZE'))
+        # moderate only the new text of the streamed output plus OUTPUT_MODERATION_WINDOW_OVERLAP characters before it,
+        # instead of the whole output every time.
+        self.OUTPUT_MODERATION_INCREMENTAL_ENABLED = get_bool_env('OUTPUT_MODERATION_INCREMENTAL_ENABLED')
+        self.OUTPUT_MODERATION_WINDOW_OVERLAP = int(get_env('OUTPUT_MODERATION_WINDOW_OVERLAP'))
 
         # Notion integration setting
         self.NOTION_CLIENT_ID = get_env('NOTION_CLIENT_ID')
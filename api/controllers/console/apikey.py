@@ -7,6 +7,7 @@ from werkzeug.exceptions import Forbidden
 from extensions.ext_database import db
 from models.model import App, ApiToken
 from models.dataset import Dataset
+from services.api_token_service import ApiTokenService
 
 from . import api
 from .setup import setup_required
@@ -113,9 +114,12 @@ class BaseApiKeyResource(Resource):
         if key is None:
             flask_restful.abort(404, message='API key not found')
 
+        key_type, key_token = key.type, key.token
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
 
+        ApiTokenService.delete_api_token_cache(key_type, key_token)
+
         return {'result': 'success'}, 204
 
 
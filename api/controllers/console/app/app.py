@@ -21,6 +21,7 @@ from fields.app_fields import app_pagination_fields, app_detail_fields, template
     app_detail_fields_with_site
 from extensions.ext_database import db
 from models.model import App, AppModelConfig, Site
+from services.api_token_service import ApiTokenService
 from services.app_model_config_service import AppModelConfigService
 
 
@@ -317,6 +318,8 @@ class AppApiStatus(Resource):
         app.enable_api = args.get('enable_api')
         app.updated_at = datetime.utcnow()
         db.session.commit()
+
+        ApiTokenService.delete_app_cache(app.id)
         return app
 
 
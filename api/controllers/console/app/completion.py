@@ -13,7 +13,7 @@ from controllers.console import api
 from controllers.console.app import _get_app
 from controllers.console.app.error import ConversationCompletedError, AppUnavailableError, \
     ProviderNotInitializeError, CompletionRequestError, ProviderQuotaExceededError, \
-    ProviderModelCurrentlyNotSupportError
+    ProviderModelCurrentlyNotSupportError, CompletionQueueFullError
 from controllers.console.setup import setup_required
 from controllers.console.wraps import account_initialization_required
 from core.conversation_message_task import PubHandler
@@ -66,6 +66,8 @@ class CompletionMessageApi(Resource):
             raise NotFound("Conversation Not Exists.")
         except services.errors.conversation.ConversationCompletedError:
             raise ConversationCompletedError()
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except services.errors.app_model_config.AppModelConfigBrokenError:
             logging.exception("App model config broken.")
             raise AppUnavailableError()
@@ -142,6 +144,8 @@ class ChatMessageApi(Resource):
             raise NotFound("Conversation Not Exists.")
         except services.errors.conversation.ConversationCompletedError:
             raise ConversationCompletedError()
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except services.errors.app_model_config.AppModelConfigBrokenError:
             logging.exception("App model config broken.")
             raise AppUnavailableError()
@@ -18,6 +18,7 @@ from fields.conversation_fields import conversation_pagination_fields, conversat
 from libs.helper import datetime_string
 from extensions.ext_database import db
 from models.model import Message, MessageAnnotation, Conversation
+from services.batch_loader_service import BatchLoaderService
 
 
 class CompletionConversationApi(Resource):
@@ -87,9 +88,12 @@ class CompletionConversationApi(Resource):
 
         query = query.order_by(Conversation.created_at.desc())
 
-        return db.paginate(
+        conversations = db.paginate(
             query, page=args['page'], per_page=args['limit'], error_out=False
         )
+        BatchLoaderService.load_conversations(conversations.items)
+
+        return conversations
 
 
 class CompletionConversationDetailApi(Resource):
@@ -203,9 +207,12 @@ class ChatConversationApi(Resource):
 
         query = query.order_by(Conversation.created_at.desc())
 
-        return db.paginate(
+        conversations = db.paginate(
             query, page=args['page'], per_page=args['limit'], error_out=False
         )
+        BatchLoaderService.load_conversations(conversations.items)
+
+        return conversations
 
 
 class ChatConversationDetailApi(Resource):
@@ -72,4 +72,10 @@ class UnsupportedAudioTypeError(BaseHTTPException):
 class ProviderNotSupportSpeechToTextError(BaseHTTPException):
     error_code = 'provider_not_support_speech_to_text'
     description = "Provider not support speech to text."
-    code = 400
\ No newline at end of file
+    code = 400
+
+
+class CompletionQueueFullError(BaseHTTPException):
+    error_code = 'completion_queue_full'
+    description = "Too many completion requests are in progress, please try again later."
+    code = 429
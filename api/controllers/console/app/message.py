@@ -8,10 +8,12 @@ from flask_restful import Resource, reqparse, marshal_with, fields
 from flask_restful.inputs import int_range
 from werkzeug.exceptions import InternalServerError, NotFound
 
+import services
 from controllers.console import api
 from controllers.console.app import _get_app
 from controllers.console.app.error import CompletionRequestError, ProviderNotInitializeError, \
-    AppMoreLikeThisDisabledError, ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError
+    AppMoreLikeThisDisabledError, ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, \
+    CompletionQueueFullError
 from controllers.console.setup import setup_required
 from controllers.console.wraps import account_initialization_required
 from core.model_providers.error import LLMRateLimitError, LLMBadRequestError, LLMAuthorizationError, LLMAPIConnectionError, \
@@ -19,9 +21,10 @@ from core.model_providers.error import LLMRateLimitError, LLMBadRequestError, LL
 from libs.login import login_required
 from fields.conversation_fields import message_detail_fields
 from libs.helper import uuid_value
-from libs.infinite_scroll_pagination import InfiniteScrollPagination
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, keyset_paginate
 from extensions.ext_database import db
 from models.model import MessageAnnotation, Conversation, Message, MessageFeedback
+from services.batch_loader_service import BatchLoaderService
 from services.completion_service import CompletionService
 from services.errors.app import MoreLikeThisDisabledError
 from services.errors.conversation import ConversationNotExistsError
@@ -60,41 +63,20 @@ class ChatMessageListApi(Resource):
         if not conversation:
             raise NotFound("Conversation Not Exists.")
 
+        base_query = db.session.query(Message).filter(Message.conversation_id == conversation.id)
+
+        cursor = None
         if args['first_id']:
-            if (
-                first_message := db.session.query(Message)
-                .filter(
-                    Message.conversation_id == conversation.id,
-                    Message.id == args['first_id'],
-                )
-                .first()
-            ):
-                history_messages = db.session.query(Message).filter(
-                    Message.conversation_id == conversation.id,
-                    Message.created_at < first_message.created_at,
-                    Message.id != first_message.id
-                ) \
-                        .order_by(Message.created_at.desc()).limit(args['limit']).all()
-            else:
+            cursor = base_query.with_entities(Message.created_at, Message.id) \
+                .filter(Message.id == args['first_id']).first()
+            if not cursor:
                 raise NotFound("First message not found")
 
-        else:
-            history_messages = db.session.query(Message).filter(Message.conversation_id == conversation.id) \
-                    .order_by(Message.created_at.desc()).limit(args['limit']).all()
-
-        has_more = False
-        if len(history_messages) == args['limit']:
-            current_page_first_message = history_messages[-1]
-            rest_count = db.session.query(Message).filter(
-                Message.conversation_id == conversation.id,
-                Message.created_at < current_page_first_message.created_at,
-                Message.id != current_page_first_message.id
-            ).count()
-
-            if rest_count > 0:
-                has_more = True
+        history_messages, has_more = keyset_paginate(base_query, Message.created_at, Message.id,
+                                                     cursor, args['limit'])
 
         history_messages = list(reversed(history_messages))
+        BatchLoaderService.load_messages(history_messages)
 
         return InfiniteScrollPagination(
             data=history_messages,
@@ -236,6 +218,8 @@ class MessageMoreLikeThisApi(Resource):
             raise NotFound("Message Not Exists.")
         except MoreLikeThisDisabledError:
             raise AppMoreLikeThisDisabledError()
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ProviderTokenNotInitError as ex:
             raise ProviderNotInitializeError(ex.description)
         except QuotaExceededError:
@@ -22,6 +22,8 @@ from fields.document_fields import document_status_fields
 from extensions.ext_database import db
 from models.dataset import DocumentSegment, Document
 from models.model import UploadFile, ApiToken
+from services.api_token_service import ApiTokenService
+from services.batch_loader_service import BatchLoaderService
 from services.dataset_service import DatasetService, DocumentService
 from services.provider_service import ProviderService
 
@@ -62,6 +64,7 @@ class DatasetListApi(Resource):
             f"{valid_model['model_name']}:{valid_model['model_provider']['provider_name']}"
             for valid_model in valid_model_list
         ]
+        BatchLoaderService.load_datasets(datasets)
         data = marshal(datasets, dataset_detail_fields)
         for item in data:
             if item['indexing_technique'] == 'high_quality':
@@ -409,9 +412,12 @@ class DatasetApiDeleteApi(Resource):
         if key is None:
             flask_restful.abort(404, message='API key not found')
 
+        key_type, key_token = key.type, key.token
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
 
+        ApiTokenService.delete_api_token_cache(key_type, key_token)
+
         return {'result': 'success'}, 204
 
 
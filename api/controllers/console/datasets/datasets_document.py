@@ -28,6 +28,7 @@ from extensions.ext_database import db
 from models.dataset import DatasetProcessRule, Dataset
 from models.dataset import Document, DocumentSegment
 from models.model import UploadFile
+from services.batch_loader_service import BatchLoaderService
 from services.dataset_service import DocumentService, DatasetService
 from tasks.add_document_to_index_task import add_document_to_index_task
 from tasks.remove_document_from_index_task import remove_document_from_index_task
@@ -162,6 +163,7 @@ class DatasetDocumentListApi(Resource):
         paginated_documents = query.paginate(
             page=page, per_page=limit, max_per_page=100, error_out=False)
         documents = paginated_documents.items
+        BatchLoaderService.load_documents(documents)
         if fetch:
             for document in documents:
                 completed_segments = DocumentSegment.query.filter(DocumentSegment.completed_at.isnot(None),
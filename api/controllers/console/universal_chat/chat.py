@@ -10,7 +10,7 @@ from werkzeug.exceptions import InternalServerError, NotFound
 import services
 from controllers.console import api
 from controllers.console.app.error import ConversationCompletedError, AppUnavailableError, ProviderNotInitializeError, \
-    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError
+    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError, CompletionQueueFullError
 from controllers.console.universal_chat.wraps import UniversalChatResource
 from core.conversation_message_task import PubHandler
 from core.model_providers.error import ProviderTokenNotInitError, QuotaExceededError, ModelCurrentlyNotSupportError, \
@@ -78,6 +78,8 @@ class UniversalChatApi(UniversalChatResource):
             raise NotFound("Conversation Not Exists.")
         except services.errors.conversation.ConversationCompletedError:
             raise ConversationCompletedError()
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except services.errors.app_model_config.AppModelConfigBrokenError:
             logging.exception("App model config broken.")
             raise AppUnavailableError()
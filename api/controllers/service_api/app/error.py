@@ -98,3 +98,9 @@ class UnsupportedFileTypeError(BaseHTTPException):
     error_code = 'unsupported_file_type'
     description = "File type not allowed."
     code = 415
+
+
+class CompletionQueueFullError(BaseHTTPException):
+    error_code = 'completion_queue_full'
+    description = "Too many completion requests are in progress, please try again later."
+    code = 429
@@ -7,6 +7,7 @@ from controllers.service_api.wraps import DatasetApiResource
 from libs.login import current_user
 from core.model_providers.models.entity.model_params import ModelType
 from fields.dataset_fields import dataset_detail_fields
+from services.batch_loader_service import BatchLoaderService
 from services.dataset_service import DatasetService
 from services.provider_service import ProviderService
 
@@ -34,6 +35,7 @@ class DatasetApi(DatasetApiResource):
             f"{valid_model['model_name']}:{valid_model['model_provider']['provider_name']}"
             for valid_model in valid_model_list
         ]
+        BatchLoaderService.load_datasets(datasets)
         data = marshal(datasets, dataset_detail_fields)
         for item in data:
             if item['indexing_technique'] == 'high_quality':
@@ -17,6 +17,7 @@ from core.model_providers.error import ProviderTokenNotInitError
 from extensions.ext_database import db
 from fields.document_fields import document_fields, document_status_fields
 from models.dataset import Dataset, Document, DocumentSegment
+from services.batch_loader_service import BatchLoaderService
 from services.dataset_service import DocumentService
 from services.file_service import FileService
 
@@ -328,6 +329,7 @@ class DocumentListApi(DatasetApiResource):
         paginated_documents = query.paginate(
             page=page, per_page=limit, max_per_page=100, error_out=False)
         documents = paginated_documents.items
+        BatchLoaderService.load_documents(documents)
 
         return {
             'data': marshal(documents, document_fields),
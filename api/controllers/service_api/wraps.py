@@ -1,5 +1,4 @@
 # -*- coding:utf-8 -*-
-from datetime import datetime
 from functools import wraps
 
 from flask import request, current_app
@@ -10,7 +9,7 @@ from werkzeug.exceptions import NotFound, Unauthorized
 from libs.login import _get_user
 from extensions.ext_database import db
 from models.account import Tenant, TenantAccountJoin, Account
-from models.model import ApiToken, App
+from services.api_token_service import ApiTokenService
 
 
 def validate_app_token(view=None):
@@ -19,7 +18,7 @@ def validate_app_token(view=None):
         def decorated(*args, **kwargs):
             api_token = validate_and_get_api_token('app')
 
-            app_model = db.session.query(App).filter(App.id == api_token.app_id).first()
+            app_model = ApiTokenService.get_app(api_token.app_id)
             if not app_model:
                 raise NotFound()
 
@@ -77,16 +76,12 @@ def validate_and_get_api_token(scope=None):
     if auth_scheme != 'bearer':
         raise Unauthorized("Authorization scheme must be 'Bearer'")
 
-    api_token = db.session.query(ApiToken).filter(
-        ApiToken.token == auth_token,
-        ApiToken.type == scope,
-    ).first()
+    api_token = ApiTokenService.get_api_token(scope, auth_token)
 
     if not api_token:
         raise Unauthorized("Access token is invalid")
 
-    api_token.last_used_at = datetime.utcnow()
-    db.session.commit()
+    ApiTokenService.update_last_used_at(api_token)
 
     return api_token
 
@@ -11,7 +11,7 @@ import services
 from controllers.web import api
 from controllers.web.error import AppUnavailableError, ConversationCompletedError, \
     ProviderNotInitializeError, NotChatAppError, NotCompletionAppError, CompletionRequestError, \
-    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError
+    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionQueueFullError
 from controllers.web.wraps import WebApiResource
 from core.conversation_message_task import PubHandler
 from core.model_providers.error import LLMBadRequestError, LLMAPIUnavailableError, LLMAuthorizationError, LLMAPIConnectionError, \
@@ -53,6 +53,8 @@ class CompletionApi(WebApiResource):
             raise NotFound("Conversation Not Exists.")
         except services.errors.conversation.ConversationCompletedError:
             raise ConversationCompletedError()
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except services.errors.app_model_config.AppModelConfigBrokenError:
             logging.exception("App model config broken.")
             raise AppUnavailableError()
@@ -114,6 +116,8 @@ class ChatApi(WebApiResource):
             raise NotFound("Conversation Not Exists.")
         except services.errors.conversation.ConversationCompletedError:
             raise ConversationCompletedError()
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except services.errors.app_model_config.AppModelConfigBrokenError:
             logging.exception("App model config broken.")
             raise AppUnavailableError()
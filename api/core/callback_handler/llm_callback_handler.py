@@ -191,6 +191,11 @@ class OutputModerationHandler(BaseModel):
     is_final_chunk: bool = False
     final_output: Optional[str] = None
 
+    incremental: bool = False
+    window_overlap: int = 0
+    # length of the buffer prefix that passed moderation
+    moderated_length: int = 0
+
     class Config:
         arbitrary_types_allowed = True
 
@@ -207,14 +212,16 @@ class OutputModerationHandler(BaseModel):
             self.thread = self.start_thread()
 
     def moderation_completion(self, completion: str, public_event: bool = False) -> str:
+        # in incremental mode only the text after what the worker has moderated is left to check
+        window_start = 0
+        if self.incremental and 0 < self.moderated_length <= len(completion) \
+                and completion.startswith(self.buffer[:self.moderated_length]):
+            window_start = max(0, self.moderated_length - self.window_overlap)
+
         self.buffer = completion
         self.is_final_chunk = True
 
-        result = self.moderation(
-            tenant_id=self.tenant_id,
-            app_id=self.app_id,
-            moderation_buffer=completion
-        )
+        result = self.moderation_window(completion, window_start)
 
         if not result or not result.flagged:
             return completion
@@ -231,6 +238,15 @@ class OutputModerationHandler(BaseModel):
 
     def start_thread(self) -> threading.Thread:
         buffer_size = int(current_app.config.get('MODERATION_BUFFER_SIZE', self.DEFAULT_BUFFER_SIZE))
+
+        self.incremental = current_app.config.get('OUTPUT_MODERATION_INCREMENTAL_ENABLED', False)
+        self.window_overlap = int(current_app.config.get('OUTPUT_MODERATION_WINDOW_OVERLAP', 0))
+        if self.rule.type == 'keywords':
+            # a keyword split by the window boundary must still be matched
+            longest_keyword = max((len(keyword) for keyword in self.rule.config.get('keywords', '').split('\n')),
+                                  default=0)
+            self.window_overlap = max(self.window_overlap, longest_keyword)
+
         thread = threading.Thread(target=self.worker, kwargs={
             'flask_app': current_app._get_current_object(),
             'buffer_size': buffer_size if buffer_size > 0 else self.DEFAULT_BUFFER_SIZE
@@ -256,15 +272,13 @@ class OutputModerationHandler(BaseModel):
                         time.sleep(1)
                         continue
 
+                window_start = max(0, current_length - self.window_overlap) if self.incremental else 0
                 current_length = buffer_length
 
-                result = self.moderation(
-                    tenant_id=self.tenant_id,
-                    app_id=self.app_id,
-                    moderation_buffer=moderation_buffer
-                )
+                result = self.moderation_window(moderation_buffer, window_start)
 
                 if not result or not result.flagged:
+                    self.moderated_length = buffer_length
                     continue
 
                 if result.action == ModerationAction.DIRECT_OUTPUT:
@@ -280,6 +294,27 @@ class OutputModerationHandler(BaseModel):
                 if result.action == ModerationAction.DIRECT_OUTPUT:
                     break
 
+    def moderation_window(self, moderation_buffer: str, window_start: int) -> Optional[ModerationOutputsResult]:
+        """
+        Moderate the text of moderation_buffer from window_start.
+
+        An overridden text replaces the whole output, so it is moderated again as a whole.
+        """
+        result = self.moderation(
+            tenant_id=self.tenant_id,
+            app_id=self.app_id,
+            moderation_buffer=moderation_buffer[window_start:]
+        )
+
+        if window_start > 0 and result and result.flagged and result.action == ModerationAction.OVERRIDED:
+            result = self.moderation(
+                tenant_id=self.tenant_id,
+                app_id=self.app_id,
+                moderation_buffer=moderation_buffer
+            )
+
+        return result
+
     def moderation(self, tenant_id: str, app_id: str, moderation_buffer: str) -> Optional[ModerationOutputsResult]:
         try:
             moderation_factory = ModerationFactory(
@@ -74,22 +74,26 @@ class Completion:
 
         prompt_message_files = [file.prompt_message_file for file in files]
 
-        rest_tokens_for_context_and_memory = cls.get_validate_rest_tokens(
-            mode=app.mode,
-            model_instance=final_model_instance,
-            app_model_config=app_model_config,
-            query=query,
-            inputs=inputs,
-            files=prompt_message_files
-        )
-
-        # init orchestrator rule parser
-        orchestrator_rule_parser = OrchestratorRuleParser(
-            tenant_id=app.tenant_id,
-            app_model_config=app_model_config
-        )
+        # shared by the token validation and the final llm, the prompt before context and memory is built once
+        prompt_transform = PromptTransform()
 
         try:
+            rest_tokens_for_context_and_memory = cls.get_validate_rest_tokens(
+                mode=app.mode,
+                model_instance=final_model_instance,
+                app_model_config=app_model_config,
+                query=query,
+                inputs=inputs,
+                files=prompt_message_files,
+                prompt_transform=prompt_transform
+            )
+
+            # init orchestrator rule parser
+            orchestrator_rule_parser = OrchestratorRuleParser(
+                tenant_id=app.tenant_id,
+                app_model_config=app_model_config
+            )
+
             chain_callback = MainChainGatherCallbackHandler(conversation_message_task)
 
             try:
@@ -106,7 +110,8 @@ class Completion:
                     agent_execute_result=None,
                     conversation_message_task=conversation_message_task,
                     memory=memory,
-                    fake_response=str(e)
+                    fake_response=str(e),
+                    prompt_transform=prompt_transform
                 )
                 return
 
@@ -158,7 +163,8 @@ class Completion:
                 agent_execute_result=agent_execute_result,
                 conversation_message_task=conversation_message_task,
                 memory=memory,
-                fake_response=fake_response
+                fake_response=fake_response,
+                prompt_transform=prompt_transform
             )
         except (ConversationTaskInterruptException, ConversationTaskStoppedException):
             return
@@ -167,6 +173,10 @@ class Completion:
             logging.warning(f'ChunkedEncodingError: {e}')
             conversation_message_task.end()
             return
+        finally:
+            # agent thoughts, dataset queries etc. produced before the generation stopped or failed,
+            # already written when the message was saved
+            conversation_message_task.save_deferred_records()
 
     @classmethod
     def moderation_for_inputs(cls, app_id: str, tenant_id: str, app_model_config: AppModelConfig, inputs: dict, query: str):
@@ -270,8 +280,9 @@ class Completion:
                       agent_execute_result: Optional[AgentExecuteResult],
                       conversation_message_task: ConversationMessageTask,
                       memory: Optional[ReadOnlyConversationTokenDBBufferSharedMemory],
-                      fake_response: Optional[str]):
-        prompt_transform = PromptTransform()
+                      fake_response: Optional[str],
+                      prompt_transform: Optional[PromptTransform] = None):
+        prompt_transform = prompt_transform or PromptTransform()
 
         # get llm prompt
         if app_model_config.prompt_type == 'simple':
@@ -347,7 +358,8 @@ class Completion:
 
     @classmethod
     def get_validate_rest_tokens(cls, mode: str, model_instance: BaseLLM, app_model_config: AppModelConfig,
-                                 query: str, inputs: dict, files: List[PromptMessageFile]) -> int:
+                                 query: str, inputs: dict, files: List[PromptMessageFile],
+                                 prompt_transform: Optional[PromptTransform] = None) -> int:
         model_limited_tokens = model_instance.model_rules.max_tokens.max
         max_tokens = model_instance.get_model_kwargs().max_tokens
 
@@ -357,7 +369,7 @@ class Completion:
         if max_tokens is None:
             max_tokens = 0
 
-        prompt_transform = PromptTransform()
+        prompt_transform = prompt_transform or PromptTransform()
 
         # get prompt without memory and context
         if app_model_config.prompt_type == 'simple':
@@ -1,12 +1,18 @@
 import json
+import logging
 import time
+import uuid
 from typing import Optional, Union, List
 
+from flask import current_app
+
 from core.callback_handler.entity.agent_loop import AgentLoop
 from core.callback_handler.entity.dataset_query import DatasetQueryObj
 from core.callback_handler.entity.llm_message import LLMMessage
 from core.callback_handler.entity.chain_result import ChainResult
 from core.file.file_obj import FileObj
+from core.memory.read_only_conversation_token_db_buffer_shared_memory import \
+    ReadOnlyConversationTokenDBBufferSharedMemory
 from core.model_providers.model_factory import ModelFactory
 from core.model_providers.models.entity.message import to_prompt_messages, MessageType, PromptMessageFile
 from core.model_providers.models.llm.base import BaseLLM
@@ -50,6 +56,9 @@ class ConversationMessageTask:
         self.retriever_resource = None
         self.auto_generate_name = auto_generate_name
 
+        # records not needed while generating, written together with the message when it is saved
+        self._deferred_records = []
+
         self.model_dict = self.app_model_config.model_dict
         self.provider_name = self.model_dict.get('provider')
         self.model_name = self.model_dict.get('name')
@@ -98,6 +107,7 @@ class ConversationMessageTask:
         if not self.conversation:
             self.is_new_conversation = True
             self.conversation = Conversation(
+                id=str(uuid.uuid4()),
                 app_id=self.app.id,
                 app_model_config_id=self.app_model_config.id,
                 model_provider=self.provider_name,
@@ -116,9 +126,9 @@ class ConversationMessageTask:
             )
 
             db.session.add(self.conversation)
-            db.session.commit()
 
         self.message = Message(
+            id=str(uuid.uuid4()),
             app_id=self.app.id,
             model_provider=self.provider_name,
             model_id=self.model_name,
@@ -144,10 +154,9 @@ class ConversationMessageTask:
         )
 
         db.session.add(self.message)
-        db.session.commit()
 
-        for file in self.files:
-            message_file = MessageFile(
+        db.session.add_all([
+            MessageFile(
                 message_id=self.message.id,
                 type=file.type.value,
                 transfer_method=file.transfer_method.value,
@@ -156,8 +165,11 @@ class ConversationMessageTask:
                 created_by_role=('account' if isinstance(self.user, Account) else 'end_user'),
                 created_by=self.user.id
             )
-            db.session.add(message_file)
-            db.session.commit()
+            for file in self.files
+        ])
+
+        # ids are generated client side, so the conversation, message and files are written in one transaction
+        db.session.commit()
 
     def append_message_text(self, text: str):
         if text is not None:
@@ -188,8 +200,13 @@ class ConversationMessageTask:
         self.message.provider_response_latency = time.perf_counter() - self.start_at
         self.message.total_price = total_price
 
+        self._add_deferred_records()
         db.session.commit()
 
+        if self.app.mode == 'chat' and answer_tokens > 0:
+            # counted once here for the memory of the following messages of the conversation
+            ReadOnlyConversationTokenDBBufferSharedMemory.save_token_counts(self.model_instance, self.message)
+
         message_was_created.send(
             self.message,
             conversation=self.conversation,
@@ -202,25 +219,25 @@ class ConversationMessageTask:
 
     def init_chain(self, chain_result: ChainResult):
         message_chain = MessageChain(
+            id=str(uuid.uuid4()),
             message_id=self.message.id,
             type=chain_result.type,
             input=json.dumps(chain_result.prompt),
             output=''
         )
 
-        db.session.add(message_chain)
-        db.session.commit()
+        self._deferred_records.append(message_chain)
 
         return message_chain
 
     def on_chain_end(self, message_chain: MessageChain, chain_result: ChainResult):
         message_chain.output = json.dumps(chain_result.completion)
-        db.session.commit()
 
         self._pub_handler.pub_chain(message_chain)
 
     def on_agent_start(self, message_chain: MessageChain, agent_loop: AgentLoop) -> MessageAgentThought:
         message_agent_thought = MessageAgentThought(
+            id=str(uuid.uuid4()),
             message_id=self.message.id,
             message_chain_id=message_chain.id,
             position=agent_loop.position,
@@ -235,8 +252,7 @@ class ConversationMessageTask:
             created_by=self.user.id
         )
 
-        db.session.add(message_agent_thought)
-        db.session.commit()
+        self._deferred_records.append(message_agent_thought)
 
         self._pub_handler.pub_agent_thought(message_agent_thought)
 
@@ -268,7 +284,6 @@ class ConversationMessageTask:
         message_agent_thought.tokens = agent_loop.prompt_tokens + agent_loop.completion_tokens
         message_agent_thought.total_price = loop_total_price
         message_agent_thought.currency = agent_model_instance.get_currency()
-        db.session.commit()
 
     def on_dataset_query_end(self, dataset_query_obj: DatasetQueryObj):
         dataset_query = DatasetQuery(
@@ -280,8 +295,7 @@ class ConversationMessageTask:
             created_by=self.user.id
         )
 
-        db.session.add(dataset_query)
-        db.session.commit()
+        self._deferred_records.append(dataset_query)
 
     def on_dataset_query_finish(self, resource: List):
         if resource and len(resource) > 0:
@@ -304,8 +318,7 @@ class ConversationMessageTask:
                     retriever_from=item.get('retriever_from'),
                     created_by=self.user.id
                 )
-                db.session.add(dataset_retriever_resource)
-                db.session.commit()
+                self._deferred_records.append(dataset_retriever_resource)
             self.retriever_resource = resource
 
     def on_message_replace(self, text: str):
@@ -316,9 +329,28 @@ class ConversationMessageTask:
         self._pub_handler.pub_message_end(self.retriever_resource)
 
     def end(self):
+        self.save_deferred_records()
+
         self._pub_handler.pub_message_end(self.retriever_resource)
         self._pub_handler.pub_end()
 
+    def save_deferred_records(self):
+        """Write the deferred records when the message is not saved, e.g. the generation was interrupted or failed."""
+        if not self._deferred_records:
+            return
+
+        try:
+            self._add_deferred_records()
+            db.session.commit()
+        except Exception:
+            # e.g. the session failed with the error ending the generation, which must not be masked
+            logging.exception(f'Failed to save the records of message {self.message.id}')
+            db.session.rollback()
+
+    def _add_deferred_records(self):
+        db.session.add_all(self._deferred_records)
+        self._deferred_records = []
+
 
 class PubHandler:
     def __init__(self, user: Union[Account | EndUser], task_id: str,
@@ -333,6 +365,17 @@ class PubHandler:
         self._chain_pub = chain_pub
         self._agent_thought_pub = agent_thought_pub
 
+        # streamed text is coalesced and published when the buffer reaches the size or the interval elapses
+        self._text_buffer = []
+        self._text_buffer_size = 0
+        self._flush_size = current_app.config['STREAMING_FLUSH_SIZE']
+        self._flush_interval = current_app.config['STREAMING_FLUSH_INTERVAL']
+        self._last_flushed_at = time.perf_counter()
+
+        # the stop flag is checked at most once per interval
+        self._stop_check_interval = current_app.config['STREAMING_STOP_CHECK_INTERVAL']
+        self._last_stop_checked_at = 0.0
+
     @classmethod
     def generate_channel_name(cls, user: Union[Account | EndUser], task_id: str):
         if not user:
@@ -355,24 +398,41 @@ class PubHandler:
         return f"generate_result_stopped:{user_str}-{task_id}"
 
     def pub_text(self, text: str):
+        self._text_buffer.append(text)
+        self._text_buffer_size += len(text)
+
+        if self._text_buffer_size >= self._flush_size \
+                or time.perf_counter() - self._last_flushed_at >= self._flush_interval:
+            self._flush_text()
+
+        if self._is_stopped(throttle=True):
+            self.pub_end()
+            raise ConversationTaskStoppedException()
+
+    def _flush_text(self):
+        self._last_flushed_at = time.perf_counter()
+        if not self._text_buffer:
+            return
+
         content = {
             'event': 'message',
             'data': {
                 'task_id': self._task_id,
                 'message_id': str(self._message.id),
-                'text': text,
+                'text': ''.join(self._text_buffer),
                 'mode': self._conversation.mode,
                 'conversation_id': str(self._conversation.id)
             }
         }
 
-        redis_client.publish(self._channel, json.dumps(content))
+        self._text_buffer = []
+        self._text_buffer_size = 0
 
-        if self._is_stopped():
-            self.pub_end()
-            raise ConversationTaskStoppedException()
+        redis_client.publish(self._channel, json.dumps(content))
 
     def pub_message_replace(self, text: str):
+        self._flush_text()
+
         content = {
             'event': 'message_replace',
             'data': {
@@ -391,6 +451,8 @@ class PubHandler:
             raise ConversationTaskStoppedException()
 
     def pub_chain(self, message_chain: MessageChain):
+        self._flush_text()
+
         if self._chain_pub:
             content = {
                 'event': 'chain',
@@ -413,6 +475,8 @@ class PubHandler:
             raise ConversationTaskStoppedException()
 
     def pub_agent_thought(self, message_agent_thought: MessageAgentThought):
+        self._flush_text()
+
         if self._agent_thought_pub:
             content = {
                 'event': 'agent_thought',
@@ -437,6 +501,8 @@ class PubHandler:
             raise ConversationTaskStoppedException()
 
     def pub_message_end(self, retriever_resource: List):
+        self._flush_text()
+
         content = {
             'event': 'message_end',
             'data': {
@@ -455,6 +521,8 @@ class PubHandler:
             raise ConversationTaskStoppedException()
 
     def pub_end(self):
+        self._flush_text()
+
         content = {
             'event': 'end',
         }
@@ -471,7 +539,11 @@ class PubHandler:
         channel = cls.generate_channel_name(user, task_id)
         redis_client.publish(channel, json.dumps(content))
 
-    def _is_stopped(self):
+    def _is_stopped(self, throttle: bool = False):
+        if throttle and time.perf_counter() - self._last_stop_checked_at < self._stop_check_interval:
+            return False
+
+        self._last_stop_checked_at = time.perf_counter()
         return redis_client.get(self._stopped_cache_key) is not None
 
     @classmethod
@@ -485,7 +557,10 @@ class PubHandler:
 
     @classmethod
     def stop(cls, user: Union[Account | EndUser], task_id: str):
-        stopped_cache_key = cls.generate_stopped_cache_key(user, task_id)
+        cls.stop_by_cache_key(cls.generate_stopped_cache_key(user, task_id))
+
+    @classmethod
+    def stop_by_cache_key(cls, stopped_cache_key: str):
         redis_client.setex(stopped_cache_key, 600, 1)
 
 
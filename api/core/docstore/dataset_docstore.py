@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, Dict, Optional, Sequence, List
 
 from langchain.schema import Document
 from sqlalchemy import func
@@ -7,6 +7,9 @@ from core.model_providers.model_factory import ModelFactory
 from extensions.ext_database import db
 from models.dataset import Dataset, DocumentSegment
 
+# max number of segments per bulk write transaction and doc ids per `IN (...)` lookup
+SEGMENT_BATCH_SIZE = 1000
+
 
 class DatesetDocumentStore:
     def __init__(
@@ -61,6 +64,10 @@ class DatesetDocumentStore:
     def add_documents(
             self, docs: Sequence[Document], allow_update: bool = True
     ) -> None:
+        for doc in docs:
+            if not isinstance(doc, Document):
+                raise ValueError("doc must be a Document")
+
         max_position = db.session.query(func.max(DocumentSegment.position)).filter(
             DocumentSegment.document_id == self._document_id
         ).scalar()
@@ -75,52 +82,76 @@ class DatesetDocumentStore:
                 model_name=self._dataset.embedding_model
             )
 
-        for doc in docs:
-            if not isinstance(doc, Document):
-                raise ValueError("doc must be a Document")
-
-            segment_document = self.get_document(doc_id=doc.metadata['doc_id'], raise_error=False)
+        # prefetch the segments that already exist in the store
+        existing_segment_ids = self._get_segment_ids([doc.metadata['doc_id'] for doc in docs])
 
-            # NOTE: doc could already exist in the store, but we overwrite it
-            if not allow_update and segment_document:
-                raise ValueError(
-                    f"doc_id {doc.metadata['doc_id']} already exists. "
-                    "Set allow_update to True to overwrite."
-                )
+        # NOTE: doc could already exist in the store, but we overwrite it
+        if not allow_update and existing_segment_ids:
+            raise ValueError(
+                f"doc_id {next(iter(existing_segment_ids))} already exists. "
+                "Set allow_update to True to overwrite."
+            )
 
-            # calc embedding use tokens
-            tokens = embedding_model.get_num_tokens(doc.page_content) if embedding_model else 0
+        # calc embedding use tokens
+        if embedding_model:
+            tokens_list = embedding_model.get_num_tokens_batch([doc.page_content for doc in docs])
+        else:
+            tokens_list = [0] * len(docs)
+
+        insert_mappings = []
+        update_mappings = []
+        for doc, tokens in zip(docs, tokens_list):
+            segment_mapping = {
+                'content': doc.page_content,
+                'index_node_hash': doc.metadata['doc_hash'],
+                'word_count': len(doc.page_content),
+                'tokens': tokens,
+            }
+            if 'answer' in doc.metadata and doc.metadata['answer']:
+                segment_mapping['answer'] = doc.metadata.pop('answer', '')
 
-            if not segment_document:
+            if doc.metadata['doc_id'] not in existing_segment_ids:
                 max_position += 1
 
-                segment_document = DocumentSegment(
-                    tenant_id=self._dataset.tenant_id,
-                    dataset_id=self._dataset.id,
-                    document_id=self._document_id,
-                    index_node_id=doc.metadata['doc_id'],
-                    index_node_hash=doc.metadata['doc_hash'],
-                    position=max_position,
-                    content=doc.page_content,
-                    word_count=len(doc.page_content),
-                    tokens=tokens,
-                    enabled=False,
-                    created_by=self._user_id,
-                )
-                if 'answer' in doc.metadata and doc.metadata['answer']:
-                    segment_document.answer = doc.metadata.pop('answer', '')
-
-                db.session.add(segment_document)
+                insert_mappings.append({
+                    **segment_mapping,
+                    'tenant_id': self._dataset.tenant_id,
+                    'dataset_id': self._dataset.id,
+                    'document_id': self._document_id,
+                    'index_node_id': doc.metadata['doc_id'],
+                    'position': max_position,
+                    'hit_count': 0,
+                    'enabled': False,
+                    'created_by': self._user_id,
+                })
             else:
-                segment_document.content = doc.page_content
-                if 'answer' in doc.metadata and doc.metadata['answer']:
-                    segment_document.answer = doc.metadata.pop('answer', '')
-                segment_document.index_node_hash = doc.metadata['doc_hash']
-                segment_document.word_count = len(doc.page_content)
-                segment_document.tokens = tokens
+                update_mappings.append({
+                    **segment_mapping,
+                    'id': existing_segment_ids[doc.metadata['doc_id']],
+                })
+
+        for i in range(0, len(insert_mappings), SEGMENT_BATCH_SIZE):
+            db.session.bulk_insert_mappings(DocumentSegment, insert_mappings[i:i + SEGMENT_BATCH_SIZE])
+            db.session.commit()
 
+        for i in range(0, len(update_mappings), SEGMENT_BATCH_SIZE):
+            db.session.bulk_update_mappings(DocumentSegment, update_mappings[i:i + SEGMENT_BATCH_SIZE])
             db.session.commit()
 
+    def _get_segment_ids(self, doc_ids: List[str]) -> Dict[str, str]:
+        """Get the segment id of each doc_id that exists in the store."""
+        segment_ids = {}
+        for i in range(0, len(doc_ids), SEGMENT_BATCH_SIZE):
+            segments = db.session.query(DocumentSegment.id, DocumentSegment.index_node_id).filter(
+                DocumentSegment.dataset_id == self._dataset.id,
+                DocumentSegment.index_node_id.in_(doc_ids[i:i + SEGMENT_BATCH_SIZE])
+            ).all()
+
+            for segment_id, index_node_id in segments:
+                segment_ids[index_node_id] = segment_id
+
+        return segment_ids
+
     def document_exists(self, doc_id: str) -> bool:
         """Check if document exists."""
         result = self.get_document_segment(doc_id)
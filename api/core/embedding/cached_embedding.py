@@ -1,15 +1,20 @@
 import logging
-from typing import List
+from typing import List, Dict
 
 import numpy as np
 from langchain.embeddings.base import Embeddings
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
+from core.embedding.embedding_cache import embedding_cache
 from core.model_providers.models.embedding.base import BaseEmbedding
 from extensions.ext_database import db
 from libs import helper
 from models.dataset import Embedding
 
+# max number of hashes resolved per `IN (...)` lookup and rows per bulk insert
+EMBEDDING_CACHE_BATCH_SIZE = 1000
+
 
 class CacheEmbedding(Embeddings):
     def __init__(self, embeddings: BaseEmbedding):
@@ -18,59 +23,46 @@ class CacheEmbedding(Embeddings):
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed search docs."""
         # use doc embedding cache or store if not exists
-        text_embeddings = []
-        embedding_queue_texts = []
-        for text in texts:
-            hash = helper.generate_text_hash(text)
-            if (
-                embedding := db.session.query(Embedding)
-                .filter_by(model_name=self._embeddings.name, hash=hash)
-                .first()
-            ):
-                text_embeddings.append(embedding.get_embedding())
-            else:
-                embedding_queue_texts.append(text)
+        hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(hashes)
+
+        # embed each missing text only once, even if it appears several times in the input
+        embedding_queue_texts = {}
+        for text, hash in zip(texts, hashes):
+            if hash not in cached_embeddings and hash not in embedding_queue_texts:
+                embedding_queue_texts[hash] = text
 
         if embedding_queue_texts:
             try:
-                embedding_results = self._embeddings.client.embed_documents(embedding_queue_texts)
+                embedding_results = self._embeddings.client.embed_documents(list(embedding_queue_texts.values()))
             except Exception as ex:
                 raise self._embeddings.handle_exceptions(ex)
-            i = 0
-            normalized_embedding_results = []
-            for text in embedding_queue_texts:
-                hash = helper.generate_text_hash(text)
-
-                try:
-                    embedding = Embedding(model_name=self._embeddings.name, hash=hash)
-                    vector = embedding_results[i]
-                    normalized_embedding = (vector / np.linalg.norm(vector)).tolist()
-                    normalized_embedding_results.append(normalized_embedding)
-                    embedding.set_embedding(normalized_embedding)
-                    db.session.add(embedding)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
-                    continue
-                except:
-                    logging.exception('Failed to add embedding to db')
-                    continue
-                finally:
-                    i += 1
-
-            text_embeddings.extend(normalized_embedding_results)
-        return text_embeddings
+
+            new_embeddings = {}
+            for hash, vector in zip(embedding_queue_texts.keys(), embedding_results):
+                new_embeddings[hash] = (vector / np.linalg.norm(vector)).tolist()
+
+            self._save_embeddings(new_embeddings)
+            cached_embeddings.update(new_embeddings)
+
+        # keep the same order as the input texts
+        return [cached_embeddings[hash] for hash in hashes]
 
     def embed_query(self, text: str) -> List[float]:
         """Embed query text."""
         # use doc embedding cache or store if not exists
         hash = helper.generate_text_hash(text)
+        if (embedding_results := embedding_cache.get(self._embeddings.name, hash)) is not None:
+            return embedding_results
+
         if (
             embedding := db.session.query(Embedding)
             .filter_by(model_name=self._embeddings.name, hash=hash)
             .first()
         ):
-            return embedding.get_embedding()
+            embedding_results = embedding.get_embedding()
+            embedding_cache.set(self._embeddings.name, hash, embedding_results)
+            return embedding_results
 
         try:
             embedding_results = self._embeddings.client.embed_query(text)
@@ -88,5 +80,46 @@ class CacheEmbedding(Embeddings):
         except:
             logging.exception('Failed to add embedding to db')
 
+        embedding_cache.set(self._embeddings.name, hash, embedding_results)
+
         return embedding_results
 
+    def _get_cached_embeddings(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """Resolve cached embeddings with one query per chunk of hashes."""
+        cached_embeddings = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique_hashes), EMBEDDING_CACHE_BATCH_SIZE):
+            chunk_hashes = unique_hashes[i:i + EMBEDDING_CACHE_BATCH_SIZE]
+            embeddings = db.session.query(Embedding).filter(
+                Embedding.model_name == self._embeddings.name,
+                Embedding.hash.in_(chunk_hashes)
+            ).all()
+
+            for embedding in embeddings:
+                cached_embeddings[embedding.hash] = embedding.get_embedding()
+
+        return cached_embeddings
+
+    def _save_embeddings(self, embeddings: Dict[str, List[float]]):
+        """Bulk insert new embeddings, ignoring rows already written by a concurrent worker."""
+        rows = []
+        for hash, vector in embeddings.items():
+            embedding = Embedding(model_name=self._embeddings.name, hash=hash)
+            embedding.set_embedding(vector)
+            rows.append({
+                'model_name': embedding.model_name,
+                'hash': embedding.hash,
+                'embedding': embedding.embedding
+            })
+
+        try:
+            for i in range(0, len(rows), EMBEDDING_CACHE_BATCH_SIZE):
+                db.session.execute(
+                    insert(Embedding)
+                    .values(rows[i:i + EMBEDDING_CACHE_BATCH_SIZE])
+                    .on_conflict_do_nothing(index_elements=['model_name', 'hash'])
+                )
+            db.session.commit()
+        except:
+            db.session.rollback()
+            logging.exception('Failed to add embeddings to db')
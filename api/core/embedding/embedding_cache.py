@@ -0,0 +1,95 @@
+import logging
+import threading
+from typing import Optional
+
+from cachetools import LRUCache
+from flask import current_app
+
+from extensions.ext_redis import redis_client
+from libs.embedding_codec import encode_embedding, decode_embedding
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings in front of the embeddings table:
+    a bounded in-process LRU and an optional Redis tier with TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local_cache = None
+        self._stats = {
+            'local_hits': 0,
+            'redis_hits': 0,
+            'misses': 0
+        }
+
+    def get(self, model_name: str, hash: str) -> Optional[list[float]]:
+        key = (model_name, hash)
+        with self._lock:
+            embedding = self._get_local_cache().get(key)
+            if embedding is not None:
+                self._stats['local_hits'] += 1
+                return embedding
+
+        if current_app.config['EMBEDDING_CACHE_REDIS_ENABLED']:
+            try:
+                data = redis_client.get(self._redis_key(model_name, hash))
+            except Exception:
+                logging.exception('Failed to get embedding from redis cache')
+                data = None
+
+            if data:
+                embedding = decode_embedding(data).tolist()
+                with self._lock:
+                    self._get_local_cache()[key] = embedding
+                    self._stats['redis_hits'] += 1
+                return embedding
+
+        with self._lock:
+            self._stats['misses'] += 1
+
+        return None
+
+    def set(self, model_name: str, hash: str, embedding: list[float]):
+        with self._lock:
+            self._get_local_cache()[(model_name, hash)] = embedding
+
+        if current_app.config['EMBEDDING_CACHE_REDIS_ENABLED']:
+            try:
+                redis_client.setex(
+                    self._redis_key(model_name, hash),
+                    current_app.config['EMBEDDING_CACHE_REDIS_TTL'],
+                    encode_embedding(embedding)
+                )
+            except Exception:
+                logging.exception('Failed to set embedding to redis cache')
+
+    def stats(self) -> dict:
+        with self._lock:
+            local_cache = self._local_cache
+            return {
+                **self._stats,
+                'local_size': local_cache.currsize if local_cache is not None else 0,
+                'local_max_size': local_cache.maxsize if local_cache is not None else 0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._local_cache = None
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def _get_local_cache(self) -> LRUCache:
+        # the module instance exists before the app, EMBEDDING_CACHE_SIZE is read on the first lookup
+        if self._local_cache is None:
+            self._local_cache = LRUCache(maxsize=current_app.config['EMBEDDING_CACHE_SIZE'])
+
+        return self._local_cache
+
+    @staticmethod
+    def _redis_key(model_name: str, hash: str) -> str:
+        return f'embedding_cache:{model_name}:{hash}'
+
+
+embedding_cache = EmbeddingCache()
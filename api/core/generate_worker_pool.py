@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Optional
+
+from flask import current_app
+
+
+class GenerateWorkerPool:
+    """
+    Bounded pool running the generation tasks of the process.
+
+    At most GENERATE_WORKER_POOL_SIZE tasks run at a time and at most GENERATE_WORKER_QUEUE_SIZE
+    more wait for a worker, further tasks are rejected so the caller can answer with 429.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = 0
+        self._max_queue_size = 0
+        self._running = 0
+        self._queued = 0
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0
+        }
+
+    def try_submit(self, fn: Callable, **kwargs) -> Optional[Future]:
+        """Submit a task, return None if the pool and its queue are full."""
+        with self._lock:
+            self._ensure_started()
+            if self._running + self._queued >= self._max_workers + self._max_queue_size:
+                self._stats['rejected'] += 1
+                return None
+
+            self._queued += 1
+            self._stats['submitted'] += 1
+
+        try:
+            return self._executor.submit(self._run, fn, time.perf_counter(), **kwargs)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    def cancel(self, future: Future) -> bool:
+        """Cancel a task that is still waiting for a worker."""
+        if not future.cancel():
+            return False
+
+        with self._lock:
+            self._queued -= 1
+
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self._stats['completed'] + self._running
+            return {
+                'max_workers': self._max_workers,
+                'max_queue_size': self._max_queue_size,
+                'running': self._running,
+                'queue_depth': self._queued,
+                'submitted': self._stats['submitted'],
+                'rejected': self._stats['rejected'],
+                'completed': self._stats['completed'],
+                'avg_wait_time': self._stats['total_wait_time'] / started if started else 0.0,
+                'max_wait_time': self._stats['max_wait_time']
+            }
+
+    def _ensure_started(self):
+        # an executor started before a fork has no threads in the child, and its sizes come from the app config
+        if self._pid == os.getpid() and self._executor:
+            return
+
+        self._max_workers = current_app.config['GENERATE_WORKER_POOL_SIZE']
+        self._max_queue_size = current_app.config['GENERATE_WORKER_QUEUE_SIZE']
+        self._running = 0
+        self._queued = 0
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='generate-worker')
+        self._pid = os.getpid()
+
+    def _run(self, fn: Callable, submitted_at: float, **kwargs):
+        wait_time = time.perf_counter() - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._stats['total_wait_time'] += wait_time
+            self._stats['max_wait_time'] = max(self._stats['max_wait_time'], wait_time)
+
+        try:
+            return fn(**kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._stats['completed'] += 1
+
+
+generate_worker_pool = GenerateWorkerPool()
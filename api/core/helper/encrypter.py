@@ -13,6 +13,10 @@ def obfuscated_token(token: str):
 def encrypt_token(tenant_id: str, token: str):
     tenant = db.session.query(Tenant).filter(Tenant.id == tenant_id).first()
     encrypted_token = rsa.encrypt(token, tenant.encrypt_public_key)
+
+    # the credentials of the tenant are being updated
+    rsa.clear_decrypt_cache(tenant_id)
+
     return base64.b64encode(encrypted_token).decode()
 
 
@@ -0,0 +1,34 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def bm25_scores(postings: Iterable[Tuple[str, str, int, int]], total_count: int, average_length: float,
+                k1: float = BM25_K1, b: float = BM25_B) -> Dict[str, float]:
+    """
+    Score chunks with Okapi BM25 from the postings of the query keywords.
+
+    :param postings: (keyword, node id, term frequency, chunk length) of every query keyword
+    :param total_count: number of chunks in the index
+    :param average_length: average chunk length in the index
+    :param k1: term frequency saturation
+    :param b: length normalization
+    :return: node id -> score
+    """
+    keyword_postings = defaultdict(list)
+    for keyword, node_id, term_frequency, length in postings:
+        keyword_postings[keyword].append((node_id, term_frequency, length))
+
+    scores = defaultdict(float)
+    for keyword, node_postings in keyword_postings.items():
+        document_frequency = len(node_postings)
+        idf = math.log((total_count - document_frequency + 0.5) / (document_frequency + 0.5) + 1)
+        for node_id, term_frequency, length in node_postings:
+            # chunks indexed before lengths were recorded are treated as average length
+            length_ratio = length / average_length if length and average_length else 1
+            scores[node_id] += idf * term_frequency * (k1 + 1) / (term_frequency + k1 * (1 - b + b * length_ratio))
+
+    return dict(scores)
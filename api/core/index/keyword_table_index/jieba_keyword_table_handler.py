@@ -1,5 +1,6 @@
 import re
-from typing import Set
+from collections import Counter
+from typing import Set, Dict, Tuple, Optional, List
 
 import jieba
 from jieba.analyse import default_tfidf
@@ -21,6 +22,29 @@ class JiebaKeywordTableHandler:
 
         return set(self._expand_tokens_with_subtokens(keywords))
 
+    def extract_keyword_frequencies(self, text: str, max_keywords_per_chunk: int = 10,
+                                    keywords: Optional[List[str]] = None) -> Tuple[Dict[str, int], int]:
+        """
+        Extract keywords with their term frequencies in the text, and the token length of the text.
+
+        :param text: text
+        :param max_keywords_per_chunk: max keywords to extract
+        :param keywords: use the given keywords instead of extracting them
+        :return: keyword frequencies, token length
+        """
+        tokens = [token for token in jieba.cut(text) if token.strip()]
+        token_counts = Counter(tokens)
+
+        if keywords is None:
+            keywords = self.extract_keywords(text, max_keywords_per_chunk)
+
+        keyword_frequencies = {}
+        for keyword in keywords:
+            # sub tokens and custom keywords may not be produced by jieba.cut, fall back to a substring count
+            keyword_frequencies[keyword] = token_counts.get(keyword) or text.count(keyword) or 1
+
+        return keyword_frequencies, len(tokens)
+
     def _expand_tokens_with_subtokens(self, tokens: Set[str]) -> Set[str]:
         """Get subtokens from a list of tokens., filtering for stopwords."""
         results = set()
@@ -1,111 +1,88 @@
-import json
-from collections import defaultdict
-from typing import Any, List, Optional, Dict
+from typing import Any, List, Dict, Tuple
 
 from langchain.schema import Document, BaseRetriever
 from pydantic import BaseModel, Field, Extra
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 
 from core.index.base import BaseIndex
+from core.index.keyword_table_index.bm25 import bm25_scores
 from core.index.keyword_table_index.jieba_keyword_table_handler import JiebaKeywordTableHandler
 from extensions.ext_database import db
-from models.dataset import Dataset, DocumentSegment, DatasetKeywordTable
+from models.dataset import Dataset, DocumentSegment, DatasetKeywordTable, DatasetKeywordPosting, \
+    DatasetKeywordIndexStat
 
 
 class KeywordTableConfig(BaseModel):
     max_keywords_per_chunk: int = 10
 
 
+# max number of rows per bulk insert and ids per `IN (...)` filter
+KEYWORD_POSTING_BATCH_SIZE = 1000
+
+
 class KeywordTableIndex(BaseIndex):
     def __init__(self, dataset: Dataset, config: KeywordTableConfig = KeywordTableConfig()):
         super().__init__(dataset)
         self._config = config
 
     def create(self, texts: list[Document], **kwargs) -> BaseIndex:
-        keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = {}
-        for text in texts:
-            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
-            keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
-
-        dataset_keyword_table = DatasetKeywordTable(
-            dataset_id=self.dataset.id,
-            keyword_table=json.dumps({
-                '__type__': 'keyword_table',
-                '__data__': {
-                    "index_id": self.dataset.id,
-                    "summary": None,
-                    "table": {}
-                }
-            }, cls=SetEncoder)
-        )
-        db.session.add(dataset_keyword_table)
-        db.session.commit()
-
-        self._save_dataset_keyword_table(keyword_table)
+        self.add_texts(texts)
 
         return self
 
     def create_with_collection_name(self, texts: list[Document], collection_name: str, **kwargs) -> BaseIndex:
-        keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = {}
-        for text in texts:
-            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
-            keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
-
-        dataset_keyword_table = DatasetKeywordTable(
-            dataset_id=self.dataset.id,
-            keyword_table=json.dumps({
-                '__type__': 'keyword_table',
-                '__data__': {
-                    "index_id": self.dataset.id,
-                    "summary": None,
-                    "table": {}
-                }
-            }, cls=SetEncoder)
-        )
-        db.session.add(dataset_keyword_table)
-        db.session.commit()
-
-        self._save_dataset_keyword_table(keyword_table)
+        self.add_texts(texts)
 
         return self
 
     def add_texts(self, texts: list[Document], **kwargs):
         keyword_table_handler = JiebaKeywordTableHandler()
 
-        keyword_table = self._get_dataset_keyword_table()
+        postings = []
         for text in texts:
-            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
-            keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
+            keyword_frequencies, segment_length = keyword_table_handler.extract_keyword_frequencies(
+                text.page_content, self._config.max_keywords_per_chunk
+            )
+            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keyword_frequencies))
+            postings.extend(self._build_postings(text.metadata['doc_id'], keyword_frequencies, segment_length))
 
-        self._save_dataset_keyword_table(keyword_table)
+        self._save_keyword_postings(postings)
 
     def text_exists(self, id: str) -> bool:
-        keyword_table = self._get_dataset_keyword_table()
-        return id in set.union(*keyword_table.values())
+        return db.session.query(
+            db.session.query(DatasetKeywordPosting).filter(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.index_node_id == id
+            ).exists()
+        ).scalar()
 
     def delete_by_ids(self, ids: list[str]) -> None:
-        keyword_table = self._get_dataset_keyword_table()
-        keyword_table = self._delete_ids_from_keyword_table(keyword_table, ids)
-
-        self._save_dataset_keyword_table(keyword_table)
+        deleted_stats = self._get_node_stats(ids)
+        for i in range(0, len(ids), KEYWORD_POSTING_BATCH_SIZE):
+            db.session.query(DatasetKeywordPosting).filter(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.index_node_id.in_(ids[i:i + KEYWORD_POSTING_BATCH_SIZE])
+            ).delete(synchronize_session=False)
+
+        self._update_keyword_index_stats(deleted_stats, (0, 0, 0))
+        db.session.commit()
 
     def delete_by_document_id(self, document_id: str):
         # get segment ids by document_id
-        segments = db.session.query(DocumentSegment).filter(
+        segment_ids = select(DocumentSegment.index_node_id).where(
             DocumentSegment.dataset_id == self.dataset.id,
             DocumentSegment.document_id == document_id
-        ).all()
-
-        ids = [segment.index_node_id for segment in segments]
+        )
 
-        keyword_table = self._get_dataset_keyword_table()
-        keyword_table = self._delete_ids_from_keyword_table(keyword_table, ids)
+        deleted_stats = self._get_postings_stats(DatasetKeywordPosting.index_node_id.in_(segment_ids))
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.index_node_id.in_(segment_ids)
+        ).delete(synchronize_session=False)
 
-        self._save_dataset_keyword_table(keyword_table)
+        self._update_keyword_index_stats(deleted_stats, (0, 0, 0))
+        db.session.commit()
 
     def get_retriever(self, **kwargs: Any) -> BaseRetriever:
         return KeywordTableRetriever(index=self, **kwargs)
@@ -114,121 +91,169 @@ class KeywordTableIndex(BaseIndex):
             self, query: str,
             **kwargs: Any
     ) -> List[Document]:
-        keyword_table = self._get_dataset_keyword_table()
-
         search_kwargs = kwargs.get('search_kwargs') if kwargs.get('search_kwargs') else {}
         k = search_kwargs.get('k') if search_kwargs.get('k') else 4
 
-        sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table, query, k)
+        chunk_scores = self._retrieve_ids_by_query(query, k)
+        if not chunk_scores:
+            return []
+
+        segments = db.session.query(DocumentSegment).filter(
+            DocumentSegment.dataset_id == self.dataset.id,
+            DocumentSegment.index_node_id.in_([chunk_index for chunk_index, _ in chunk_scores])
+        ).all()
+        segment_map = {segment.index_node_id: segment for segment in segments}
 
         documents = []
-        for chunk_index in sorted_chunk_indices:
-            if (
-                segment := db.session.query(DocumentSegment)
-                .filter(
-                    DocumentSegment.dataset_id == self.dataset.id,
-                    DocumentSegment.index_node_id == chunk_index,
-                )
-                .first()
-            ):
+        for chunk_index, score in chunk_scores:
+            if segment := segment_map.get(chunk_index):
                 documents.append(Document(
                     page_content=segment.content,
                     metadata={
                         "doc_id": chunk_index,
                         "document_id": segment.document_id,
                         "dataset_id": segment.dataset_id,
+                        "score": score
                     }
                 ))
 
         return documents
 
     def delete(self) -> None:
-        if dataset_keyword_table := self.dataset.dataset_keyword_table:
-            db.session.delete(dataset_keyword_table)
-            db.session.commit()
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id
+        ).delete(synchronize_session=False)
 
-    def delete_by_group_id(self, group_id: str) -> None:
-        if dataset_keyword_table := self.dataset.dataset_keyword_table:
-            db.session.delete(dataset_keyword_table)
-            db.session.commit()
+        # legacy keyword table blob, kept by the posting list migration
+        db.session.query(DatasetKeywordTable).filter(
+            DatasetKeywordTable.dataset_id == self.dataset.id
+        ).delete(synchronize_session=False)
 
-    def _save_dataset_keyword_table(self, keyword_table):
-        keyword_table_dict = {
-            '__type__': 'keyword_table',
-            '__data__': {
-                "index_id": self.dataset.id,
-                "summary": None,
-                "table": keyword_table
+        db.session.query(DatasetKeywordIndexStat).filter(
+            DatasetKeywordIndexStat.dataset_id == self.dataset.id
+        ).delete(synchronize_session=False)
+
+        db.session.commit()
+
+    def delete_by_group_id(self, group_id: str) -> None:
+        self.delete()
+
+    def _build_postings(self, node_id: str, keyword_frequencies: Dict[str, int], segment_length: int) -> list[dict]:
+        return [
+            {
+                'dataset_id': self.dataset.id,
+                'keyword': keyword,
+                'index_node_id': node_id,
+                'term_frequency': term_frequency,
+                'segment_length': segment_length
             }
-        }
-        self.dataset.dataset_keyword_table.keyword_table = json.dumps(keyword_table_dict, cls=SetEncoder)
+            for keyword, term_frequency in keyword_frequencies.items()
+        ]
+
+    def _save_keyword_postings(self, postings: list[dict]):
+        node_ids = list(dict.fromkeys(posting['index_node_id'] for posting in postings))
+        replaced_stats = self._get_node_stats(node_ids)
+
+        for i in range(0, len(postings), KEYWORD_POSTING_BATCH_SIZE):
+            statement = insert(DatasetKeywordPosting).values(postings[i:i + KEYWORD_POSTING_BATCH_SIZE])
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['dataset_id', 'keyword', 'index_node_id'],
+                set_={
+                    'term_frequency': statement.excluded.term_frequency,
+                    'segment_length': statement.excluded.segment_length
+                }
+            ))
+
+        self._update_keyword_index_stats(replaced_stats, self._get_node_stats(node_ids))
         db.session.commit()
 
-    def _get_dataset_keyword_table(self) -> Optional[dict]:
-        if dataset_keyword_table := self.dataset.dataset_keyword_table:
-            if dataset_keyword_table.keyword_table_dict:
-                return dataset_keyword_table.keyword_table_dict['__data__']['table']
-        else:
-            dataset_keyword_table = DatasetKeywordTable(
-                dataset_id=self.dataset.id,
-                keyword_table=json.dumps({
-                    '__type__': 'keyword_table',
-                    '__data__': {
-                        "index_id": self.dataset.id,
-                        "summary": None,
-                        "table": {}
-                    }
-                }, cls=SetEncoder)
-            )
-            db.session.add(dataset_keyword_table)
-            db.session.commit()
+    def _get_keyword_index_stats(self) -> Tuple[int, float]:
+        """Get the chunk count and average chunk length used by BM25."""
+        stat = db.session.query(DatasetKeywordIndexStat).filter(
+            DatasetKeywordIndexStat.dataset_id == self.dataset.id
+        ).first()
 
-        return {}
+        if not stat:
+            return 0, 0.0
 
-    def _add_text_to_keyword_table(self, keyword_table: dict, id: str, keywords: list[str]) -> dict:
-        for keyword in keywords:
-            if keyword not in keyword_table:
-                keyword_table[keyword] = set()
-            keyword_table[keyword].add(id)
-        return keyword_table
+        return stat.total_count, stat.length_sum / stat.length_count if stat.length_count else 0.0
 
-    def _delete_ids_from_keyword_table(self, keyword_table: dict, ids: list[str]) -> dict:
-        # get set of ids that correspond to node
-        node_idxs_to_delete = set(ids)
+    def _get_node_stats(self, node_ids: list[str]) -> Tuple[int, int, int]:
+        stats = (0, 0, 0)
+        for i in range(0, len(node_ids), KEYWORD_POSTING_BATCH_SIZE):
+            batch_stats = self._get_postings_stats(
+                DatasetKeywordPosting.index_node_id.in_(node_ids[i:i + KEYWORD_POSTING_BATCH_SIZE])
+            )
+            stats = tuple(stat + batch_stat for stat, batch_stat in zip(stats, batch_stats))
+
+        return stats
+
+    def _get_postings_stats(self, node_filter) -> Tuple[int, int, int]:
+        """Get the chunk count, the count of chunks having a length and their length sum of the filtered chunks."""
+        segment_lengths = db.session.query(
+            DatasetKeywordPosting.index_node_id,
+            func.max(DatasetKeywordPosting.segment_length).label('segment_length')
+        ).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            node_filter
+        ).group_by(DatasetKeywordPosting.index_node_id).subquery()
+
+        total_count, length_count, length_sum = db.session.query(
+            func.count(segment_lengths.c.index_node_id),
+            # chunks indexed before lengths were recorded have no length
+            func.count(func.nullif(segment_lengths.c.segment_length, 0)),
+            func.sum(segment_lengths.c.segment_length)
+        ).one()
+
+        return total_count or 0, length_count or 0, length_sum or 0
+
+    def _update_keyword_index_stats(self, old_stats: Tuple[int, int, int], new_stats: Tuple[int, int, int]):
+        """Add the difference of the stats of the written chunks, in the transaction of the write."""
+        total_count, length_count, length_sum = (new - old for old, new in zip(old_stats, new_stats))
+        if not (total_count or length_count or length_sum):
+            return
+
+        statement = insert(DatasetKeywordIndexStat).values(
+            dataset_id=self.dataset.id,
+            total_count=total_count,
+            length_count=length_count,
+            length_sum=length_sum
+        )
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['dataset_id'],
+            set_={
+                'total_count': DatasetKeywordIndexStat.total_count + statement.excluded.total_count,
+                'length_count': DatasetKeywordIndexStat.length_count + statement.excluded.length_count,
+                'length_sum': DatasetKeywordIndexStat.length_sum + statement.excluded.length_sum
+            }
+        ))
 
-        # delete node_idxs from keyword to node idxs mapping
-        keywords_to_delete = set()
-        for keyword, node_idxs in keyword_table.items():
-            if node_idxs_to_delete.intersection(node_idxs):
-                keyword_table[keyword] = node_idxs.difference(
-                    node_idxs_to_delete
-                )
-                if not keyword_table[keyword]:
-                    keywords_to_delete.add(keyword)
+    def _retrieve_ids_by_query(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = list(keyword_table_handler.extract_keywords(query))
+        if not keywords:
+            return []
+
+        # fetch the posting lists of the query keywords only
+        postings = db.session.query(
+            DatasetKeywordPosting.keyword,
+            DatasetKeywordPosting.index_node_id,
+            DatasetKeywordPosting.term_frequency,
+            DatasetKeywordPosting.segment_length
+        ).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.keyword.in_(keywords)
+        ).all()
 
-        for keyword in keywords_to_delete:
-            del keyword_table[keyword]
+        if not postings:
+            return []
 
-        return keyword_table
+        total_count, average_length = self._get_keyword_index_stats()
+        chunk_scores = bm25_scores(postings, total_count, average_length)
 
-    def _retrieve_ids_by_query(self, keyword_table: dict, query: str, k: int = 4):
-        keyword_table_handler = JiebaKeywordTableHandler()
-        keywords = keyword_table_handler.extract_keywords(query)
-
-        # go through text chunks in order of most matching keywords
-        chunk_indices_count: Dict[str, int] = defaultdict(int)
-        keywords = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
-        for keyword in keywords:
-            for node_id in keyword_table[keyword]:
-                chunk_indices_count[node_id] += 1
-
-        sorted_chunk_indices = sorted(
-            list(chunk_indices_count.keys()),
-            key=lambda x: chunk_indices_count[x],
-            reverse=True,
-        )
+        sorted_chunk_scores = sorted(chunk_scores.items(), key=lambda x: x[1], reverse=True)
 
-        return sorted_chunk_indices[: k]
+        return sorted_chunk_scores[: k]
 
     def _update_segment_keywords(self, dataset_id: str, node_id: str, keywords: List[str]):
         if (
@@ -243,31 +268,37 @@ class KeywordTableIndex(BaseIndex):
             db.session.commit()
 
     def create_segment_keywords(self, node_id: str, keywords: List[str]):
-        keyword_table = self._get_dataset_keyword_table()
         self._update_segment_keywords(self.dataset.id, node_id, keywords)
-        keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
-        self._save_dataset_keyword_table(keyword_table)
+        self.update_segment_keywords_index(node_id, keywords)
 
     def multi_create_segment_keywords(self, pre_segment_data_list: list):
         keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = self._get_dataset_keyword_table()
+        postings = []
         for pre_segment_data in pre_segment_data_list:
             segment = pre_segment_data['segment']
-            if pre_segment_data['keywords']:
-                segment.keywords = pre_segment_data['keywords']
-                keyword_table = self._add_text_to_keyword_table(keyword_table, segment.index_node_id,
-                                                                pre_segment_data['keywords'])
-            else:
-                keywords = keyword_table_handler.extract_keywords(segment.content,
-                                                                  self._config.max_keywords_per_chunk)
-                segment.keywords = list(keywords)
-                keyword_table = self._add_text_to_keyword_table(keyword_table, segment.index_node_id, list(keywords))
-        self._save_dataset_keyword_table(keyword_table)
+            keyword_frequencies, segment_length = keyword_table_handler.extract_keyword_frequencies(
+                segment.content,
+                self._config.max_keywords_per_chunk,
+                keywords=pre_segment_data['keywords'] if pre_segment_data['keywords'] else None
+            )
+            segment.keywords = list(keyword_frequencies)
+            postings.extend(self._build_postings(segment.index_node_id, keyword_frequencies, segment_length))
+        self._save_keyword_postings(postings)
 
     def update_segment_keywords_index(self, node_id: str, keywords: List[str]):
-        keyword_table = self._get_dataset_keyword_table()
-        keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
-        self._save_dataset_keyword_table(keyword_table)
+        segment = db.session.query(DocumentSegment).filter(
+            DocumentSegment.dataset_id == self.dataset.id,
+            DocumentSegment.index_node_id == node_id
+        ).first()
+
+        if segment:
+            keyword_frequencies, segment_length = JiebaKeywordTableHandler().extract_keyword_frequencies(
+                segment.content, keywords=keywords
+            )
+        else:
+            keyword_frequencies, segment_length = {keyword: 1 for keyword in keywords}, 0
+
+        self._save_keyword_postings(self._build_postings(node_id, keyword_frequencies, segment_length))
 
 
 class KeywordTableRetriever(BaseRetriever, BaseModel):
@@ -294,7 +325,3 @@ class KeywordTableRetriever(BaseRetriever, BaseModel):
     async def aget_relevant_documents(self, query: str) -> List[Document]:
         raise NotImplementedError("KeywordTableRetriever does not support async")
 
-
-class SetEncoder(json.JSONEncoder):
-    def default(self, obj):
-        return list(obj) if isinstance(obj, set) else super().default(obj)
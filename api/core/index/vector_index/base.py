@@ -1,18 +1,30 @@
 import json
 import logging
+import uuid
 from abc import abstractmethod
-from typing import List, Any, cast
+from contextlib import contextmanager
+from typing import List, Any, cast, Optional, Generator, Tuple
 
+from flask import current_app
 from langchain.embeddings.base import Embeddings
 from langchain.schema import Document, BaseRetriever
 from langchain.vectorstores import VectorStore
+from sqlalchemy import select
 from weaviate import UnexpectedStatusCodeException
 
 from core.index.base import BaseIndex
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from models.dataset import Dataset, DocumentSegment, DatasetCollectionBinding
 from models.dataset import Document as DatasetDocument
 
+# seconds a checkpoint of an interrupted index rebuild is kept to resume from
+REBUILD_CHECKPOINT_TTL = 7 * 24 * 3600
+
+# seconds index writes are still mirrored to a rebuilt index after the dataset switched to it,
+# for writers that loaded the dataset before
+REBUILD_SWITCH_GRACE_PERIOD = 600
+
 
 class BaseVectorIndex(BaseIndex):
 
@@ -98,7 +110,11 @@ class BaseVectorIndex(BaseIndex):
             texts = self._filter_duplicate_texts(texts)
 
         uuids = self._get_uuids(texts)
-        vector_store.add_documents(texts, uuids=uuids)
+        vector_store.add_documents(texts, uuids=uuids, **self._get_add_texts_params())
+
+    def _get_add_texts_params(self) -> dict:
+        """Store specific params of adding texts, e.g. batching."""
+        return {}
 
     def text_exists(self, id: str) -> bool:
         vector_store = self._get_vector_store()
@@ -106,6 +122,10 @@ class BaseVectorIndex(BaseIndex):
 
         return vector_store.text_exists(id)
 
+    def get_vectors_by_ids(self, ids: list[str]) -> dict:
+        """Stored vectors of doc ids, those of stores without the support are missing."""
+        return {}
+
     def delete_by_ids(self, ids: list[str]) -> None:
         if self._is_origin():
             self.recreate_dataset(self.dataset)
@@ -135,60 +155,113 @@ class BaseVectorIndex(BaseIndex):
         return False
 
     def recreate_dataset(self, dataset: Dataset):
-        logging.info(f"Recreating dataset {dataset.id}")
-
-        try:
-            self.delete()
-        except UnexpectedStatusCodeException as e:
-            if e.status_code != 400:
-                # 400 means index not exists
-                raise e
-
-        dataset_documents = db.session.query(DatasetDocument).filter(
-            DatasetDocument.dataset_id == dataset.id,
-            DatasetDocument.indexing_status == 'completed',
-            DatasetDocument.enabled == True,
-            DatasetDocument.archived == False,
-        ).all()
+        """
+        Rebuild the index of the dataset into a new collection and switch the dataset to it once complete.
 
-        documents = []
-        for dataset_document in dataset_documents:
-            segments = db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.status == 'completed',
-                DocumentSegment.enabled == True
-            ).all()
-
-            for segment in segments:
-                document = Document(
-                    page_content=segment.content,
-                    metadata={
-                        "doc_id": segment.index_node_id,
-                        "doc_hash": segment.index_node_hash,
-                        "document_id": segment.document_id,
-                        "dataset_id": segment.dataset_id,
-                    }
-                )
-
-                documents.append(document)
+        Segments are streamed in batches and the progress is checkpointed in redis, a failed rebuild
+        resumes from its last indexed batch. While the checkpoint exists the index writes of the dataset
+        are mirrored to the new collection, see get_rebuild_dataset.
+        """
+        logging.info(f"Recreating dataset {dataset.id}")
 
-        origin_index_struct = self.dataset.index_struct[:]
-        self.dataset.index_struct = None
+        checkpoint_key = self._get_rebuild_checkpoint_key(dataset)
+        checkpoint = redis_client.hgetall(checkpoint_key)
+        resumed = bool(checkpoint) and b'switched' not in checkpoint
+        if resumed:
+            collection_name = checkpoint[b'collection_name'].decode('utf-8')
+            last_segment_id = checkpoint[b'last_segment_id'].decode('utf-8') or None
+            logging.info(f"Resuming recreating dataset {dataset.id} after segment {last_segment_id}")
+        else:
+            collection_name = "Vector_index_" + dataset.id.replace("-", "_") + '_' + uuid.uuid4().hex[:8] + '_Node'
+            last_segment_id = None
+
+        # the dataset is committed by the indexing, readers keep the current index until the switch
+        rebuild_dataset = self._detached_dataset(dataset, self._get_index_struct_of(collection_name))
+        with self.using_dataset(rebuild_dataset):
+            created = resumed
+            if not resumed:
+                # the collection is created before index writes are mirrored to it,
+                # the first batch is written again by the stream that starts once they are
+                batches = self._iter_segment_batches(dataset)
+                first_batch = next(batches, None)
+                batches.close()
+
+                if first_batch:
+                    self.create(first_batch[1])
+                    # e.g. the checkpoint of a previous rebuild in its switch grace period
+                    redis_client.delete(checkpoint_key)
+                    redis_client.hset(checkpoint_key, mapping={
+                        'collection_name': collection_name,
+                        'last_segment_id': ''
+                    })
+                    redis_client.expire(checkpoint_key, REBUILD_CHECKPOINT_TTL)
+                    created = True
+
+            if created:
+                for last_segment_id, documents in self._iter_segment_batches(dataset, last_segment_id):
+                    if self._is_rebuild_abandoned(checkpoint_key, collection_name):
+                        break
+
+                    self._write_segment_batch(dataset, documents)
+                    redis_client.hset(checkpoint_key, 'last_segment_id', last_segment_id)
+                    redis_client.expire(checkpoint_key, REBUILD_CHECKPOINT_TTL)
+
+                if self._is_rebuild_abandoned(checkpoint_key, collection_name):
+                    # a mirrored index write failed, the collection would miss it
+                    self.delete()
+                    raise Exception(f"Recreating dataset {dataset.id} was abandoned, "
+                                    f"an index write could not be mirrored to the new index.")
+
+            index_struct = json.dumps(self.to_index_struct()) if created else None
+
+        if created:
+            # writers holding the replaced index struct keep mirroring to the new collection for a while
+            redis_client.hset(checkpoint_key, 'switched', 1)
+            redis_client.expire(checkpoint_key, REBUILD_SWITCH_GRACE_PERIOD)
+
+        origin_index_struct = dataset.index_struct
+        dataset.index_struct = index_struct
+        db.session.commit()
 
-        if documents:
+        if origin_index_struct:
             try:
-                self.create(documents)
-            except Exception as e:
-                self.dataset.index_struct = origin_index_struct
-                raise e
-
-            dataset.index_struct = json.dumps(self.to_index_struct())
-
-        db.session.commit()
+                with self.using_dataset(self._detached_dataset(dataset, origin_index_struct)):
+                    self.delete()
+            except Exception:
+                logging.exception(f"Failed to delete the replaced index of dataset {dataset.id}")
 
-        self.dataset = dataset
         logging.info(f"Dataset {dataset.id} recreate successfully.")
 
+    def get_rebuild_dataset(self) -> Optional[Dataset]:
+        """
+        A copy of the dataset indexed into the collection its index is being rebuilt into,
+        to which its index writes are mirrored. None when the dataset is not being rebuilt.
+        """
+        collection_name = redis_client.hget(self._get_rebuild_checkpoint_key(self.dataset), 'collection_name')
+        if not collection_name:
+            return None
+
+        collection_name = collection_name.decode('utf-8')
+        if collection_name == self.get_index_name(self.dataset):
+            return None
+
+        return self._detached_dataset(self.dataset, self._get_index_struct_of(collection_name))
+
+    def abandon_rebuild(self):
+        """Stop the rebuild of the dataset index, e.g. when an index write could not be mirrored to it."""
+        logging.error(f"Abandoning recreating dataset {self.dataset.id}")
+        redis_client.delete(self._get_rebuild_checkpoint_key(self.dataset))
+
+    @contextmanager
+    def using_dataset(self, dataset: Dataset):
+        """Read and write the index of another copy of the dataset, e.g. the collection being rebuilt."""
+        origin_dataset, origin_vector_store = self.dataset, self._vector_store
+        self.dataset, self._vector_store = dataset, None
+        try:
+            yield
+        finally:
+            self.dataset, self._vector_store = origin_dataset, origin_vector_store
+
     def create_qdrant_dataset(self, dataset: Dataset):
         logging.info(f"create_qdrant_dataset {dataset.id}")
 
@@ -199,39 +272,8 @@ class BaseVectorIndex(BaseIndex):
                 # 400 means index not exists
                 raise e
 
-        dataset_documents = db.session.query(DatasetDocument).filter(
-            DatasetDocument.dataset_id == dataset.id,
-            DatasetDocument.indexing_status == 'completed',
-            DatasetDocument.enabled == True,
-            DatasetDocument.archived == False,
-        ).all()
-
-        documents = []
-        for dataset_document in dataset_documents:
-            segments = db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.status == 'completed',
-                DocumentSegment.enabled == True
-            ).all()
-
-            for segment in segments:
-                document = Document(
-                    page_content=segment.content,
-                    metadata={
-                        "doc_id": segment.index_node_id,
-                        "doc_hash": segment.index_node_hash,
-                        "document_id": segment.document_id,
-                        "dataset_id": segment.dataset_id,
-                    }
-                )
-
-                documents.append(document)
-
-        if documents:
-            try:
-                self.create(documents)
-            except Exception as e:
-                raise e
+        for _, documents in self._iter_segment_batches(dataset):
+            self._add_documents(documents)
 
         logging.info(f"Dataset {dataset.id} recreate successfully.")
 
@@ -263,39 +305,21 @@ class BaseVectorIndex(BaseIndex):
     def restore_dataset_in_one(self, dataset: Dataset, dataset_collection_binding: DatasetCollectionBinding):
         logging.info(f"restore dataset in_one,_dataset {dataset.id}")
 
-        dataset_documents = db.session.query(DatasetDocument).filter(
-            DatasetDocument.dataset_id == dataset.id,
-            DatasetDocument.indexing_status == 'completed',
-            DatasetDocument.enabled == True,
-            DatasetDocument.archived == False,
-        ).all()
-
-        documents = []
-        for dataset_document in dataset_documents:
-            segments = db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.status == 'completed',
-                DocumentSegment.enabled == True
-            ).all()
-
-            for segment in segments:
-                document = Document(
-                    page_content=segment.content,
-                    metadata={
-                        "doc_id": segment.index_node_id,
-                        "doc_hash": segment.index_node_hash,
-                        "document_id": segment.document_id,
-                        "dataset_id": segment.dataset_id,
-                    }
-                )
+        # resumed after the last indexed batch of a failed restore
+        checkpoint_key = f'vector_index_restore_checkpoint:{dataset.id}:{dataset_collection_binding.id}'
+        last_segment_id = redis_client.get(checkpoint_key)
+        last_segment_id = last_segment_id.decode('utf-8') if last_segment_id else None
 
-                documents.append(document)
+        resumed = last_segment_id is not None
+        for last_segment_id, documents in self._iter_segment_batches(dataset, last_segment_id):
+            if resumed:
+                # the batch the failed restore was writing may be partly indexed
+                self.delete_by_ids([document.metadata['doc_id'] for document in documents])
+                resumed = False
+            self.add_texts(documents)
+            redis_client.setex(checkpoint_key, REBUILD_CHECKPOINT_TTL, last_segment_id)
 
-        if documents:
-            try:
-                self.add_texts(documents)
-            except Exception as e:
-                raise e
+        redis_client.delete(checkpoint_key)
 
         logging.info(f"Dataset {dataset.id} recreate successfully.")
 
@@ -309,3 +333,106 @@ class BaseVectorIndex(BaseIndex):
         db.session.commit()
 
         logging.info(f"Dataset {dataset.id} recreate successfully.")
+
+    def _iter_segment_batches(self, dataset: Dataset, after_segment_id: Optional[str] = None) \
+            -> Generator[Tuple[str, List[Document]], None, None]:
+        """Stream the indexed segments of the dataset in batches of documents, with the id of their last segment."""
+        batch_size = current_app.config['VECTOR_INDEX_REBUILD_BATCH_SIZE']
+
+        query = self._get_segments_query(dataset).order_by(DocumentSegment.id)
+        if after_segment_id:
+            query = query.where(DocumentSegment.id > after_segment_id)
+
+        # a server-side cursor on a connection of its own, the session is committed while the batches are indexed
+        with db.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, max_row_buffer=batch_size).execute(query)
+            for rows in result.partitions(batch_size):
+                yield str(rows[-1].id), [self._to_document(row) for row in rows]
+
+    def _write_segment_batch(self, dataset: Dataset, documents: List[Document]):
+        """Write a batch of a rebuild, replacing the documents a mirrored index write may have added."""
+        doc_ids = [document.metadata['doc_id'] for document in documents]
+        self.delete_by_ids(doc_ids)
+        self._add_documents(documents)
+
+        # segments changed since read by the cursor, their mirrored index writes may have preceded the batch
+        current_documents = {
+            row.index_node_id: self._to_document(row)
+            for row in db.session.execute(
+                self._get_segments_query(dataset).where(DocumentSegment.index_node_id.in_(doc_ids))
+            )
+        }
+        stale_doc_ids = [
+            document.metadata['doc_id'] for document in documents
+            if document.metadata['doc_id'] not in current_documents
+            or current_documents[document.metadata['doc_id']].metadata['doc_hash'] != document.metadata['doc_hash']
+        ]
+        if stale_doc_ids:
+            self.delete_by_ids(stale_doc_ids)
+            updated_documents = [current_documents[doc_id] for doc_id in stale_doc_ids if doc_id in current_documents]
+            if updated_documents:
+                self._add_documents(updated_documents)
+
+    @staticmethod
+    def _get_segments_query(dataset: Dataset):
+        return select(
+            DocumentSegment.id,
+            DocumentSegment.content,
+            DocumentSegment.index_node_id,
+            DocumentSegment.index_node_hash,
+            DocumentSegment.document_id,
+            DocumentSegment.dataset_id
+        ).join(DatasetDocument, DatasetDocument.id == DocumentSegment.document_id).where(
+            DocumentSegment.dataset_id == dataset.id,
+            DocumentSegment.status == 'completed',
+            DocumentSegment.enabled == True,
+            DatasetDocument.indexing_status == 'completed',
+            DatasetDocument.enabled == True,
+            DatasetDocument.archived == False
+        )
+
+    @staticmethod
+    def _to_document(row) -> Document:
+        return Document(
+            page_content=row.content,
+            metadata={
+                "doc_id": row.index_node_id,
+                "doc_hash": row.index_node_hash,
+                "document_id": row.document_id,
+                "dataset_id": row.dataset_id,
+            }
+        )
+
+    @staticmethod
+    def _get_rebuild_checkpoint_key(dataset: Dataset) -> str:
+        return f'vector_index_rebuild_checkpoint:{dataset.id}'
+
+    @staticmethod
+    def _is_rebuild_abandoned(checkpoint_key: str, collection_name: str) -> bool:
+        return redis_client.hget(checkpoint_key, 'collection_name') != collection_name.encode('utf-8')
+
+    def _get_index_struct_of(self, collection_name: str) -> str:
+        return json.dumps({
+            "type": self.get_type(),
+            "vector_store": {"class_prefix": collection_name}
+        })
+
+    def _add_documents(self, documents: List[Document]):
+        """Add documents to the index being built, the first batch creates its collection."""
+        if not self._vector_store:
+            self.create(documents)
+            return
+
+        self._vector_store.add_documents(documents, uuids=self._get_uuids(documents), **self._get_add_texts_params())
+
+    @staticmethod
+    def _detached_dataset(dataset: Dataset, index_struct: Optional[str]) -> Dataset:
+        """A copy of the dataset with another index struct, not added to the session."""
+        return Dataset(
+            id=dataset.id,
+            tenant_id=dataset.tenant_id,
+            indexing_technique=dataset.indexing_technique,
+            embedding_model_provider=dataset.embedding_model_provider,
+            embedding_model=dataset.embedding_model,
+            index_struct=index_struct
+        )
@@ -1,3 +1,4 @@
+import uuid
 from typing import cast, Any, List
 
 from langchain.embeddings.base import Embeddings
@@ -8,6 +9,7 @@ from pydantic import BaseModel, root_validator
 from core.index.base import BaseIndex
 from core.index.vector_index.base import BaseVectorIndex
 from core.vector_store.milvus_vector_store import MilvusVectorStore
+from core.vector_store.vector_client_pool import vector_client_pool
 from models.dataset import Dataset
 
 
@@ -45,6 +47,7 @@ class MilvusVectorIndex(BaseVectorIndex):
     def __init__(self, dataset: Dataset, config: MilvusConfig, embeddings: Embeddings):
         super().__init__(dataset, embeddings)
         self._client_config = config
+        self._connection_alias = None
 
     def get_type(self) -> str:
         return 'milvus'
@@ -78,7 +81,7 @@ class MilvusVectorIndex(BaseVectorIndex):
             texts,
             self._embeddings,
             collection_name=self.get_index_name(self.dataset),
-            connection_args=self._client_config.to_milvus_params(),
+            connection_args=self._get_connection_args(),
             index_params=index_params
         )
 
@@ -105,12 +108,36 @@ class MilvusVectorIndex(BaseVectorIndex):
         return MilvusVectorStore(
             collection_name=self.get_index_name(self.dataset),
             embedding_function=self._embeddings,
-            connection_args=self._client_config.to_milvus_params()
+            connection_args=self._get_connection_args()
         )
 
     def _get_vector_store_class(self) -> type:
         return MilvusVectorStore
 
+    def _get_connection_args(self) -> dict:
+        from pymilvus import connections, utility
+
+        connection_args = self._client_config.to_milvus_params()
+        if self._connection_alias is None:
+            self._connection_alias = vector_client_pool.acquire(
+                owner=self,
+                kind=self.get_type(),
+                config_key=tuple(sorted(connection_args.items())),
+                factory=lambda: MilvusVectorIndex._connect(connection_args),
+                health_check=lambda alias: utility.get_server_version(using=alias) is not None,
+                close=lambda alias: connections.remove_connection(alias)
+            )
+
+        return {**connection_args, 'alias': self._connection_alias}
+
+    @staticmethod
+    def _connect(connection_args: dict) -> str:
+        from pymilvus import connections
+
+        alias = uuid.uuid4().hex
+        connections.connect(alias=alias, **connection_args)
+        return alias
+
     def delete_by_document_id(self, document_id: str):
 
         vector_store = self._get_vector_store()
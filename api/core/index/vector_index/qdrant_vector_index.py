@@ -10,15 +10,22 @@ from qdrant_client.http.models import HnswConfigDiff
 
 from core.index.base import BaseIndex
 from core.index.vector_index.base import BaseVectorIndex
+from core.vector_store.qdrant_local_registry import qdrant_local_registry
 from core.vector_store.qdrant_vector_store import QdrantVectorStore
+from core.vector_store.vector_client_pool import vector_client_pool
 from extensions.ext_database import db
 from models.dataset import Dataset, DatasetCollectionBinding
 
+# doc ids matched by one delete request
+DELETE_BATCH_SIZE = 1000
+
 
 class QdrantConfig(BaseModel):
     endpoint: str
     api_key: Optional[str]
     root_path: Optional[str]
+    upsert_batch_size: int = 64
+    upsert_parallelism: int = 2
 
     def to_qdrant_params(self):
         if not self.endpoint or not self.endpoint.startswith('path:'):
@@ -39,6 +46,7 @@ class QdrantVectorIndex(BaseVectorIndex):
     def __init__(self, dataset: Dataset, config: QdrantConfig, embeddings: Embeddings):
         super().__init__(dataset, embeddings)
         self._client_config = config
+        self._client = None
 
     def get_type(self) -> str:
         return 'qdrant'
@@ -83,7 +91,8 @@ class QdrantVectorIndex(BaseVectorIndex):
             group_payload_key='group_id',
             hnsw_config=HnswConfigDiff(m=0, payload_m=16, ef_construct=100, full_scan_threshold=10000,
                                        max_indexing_threads=0, on_disk=False),
-            **self._client_config.to_qdrant_params()
+            client=self._get_client(),
+            **self._get_add_texts_params()
         )
 
         return self
@@ -100,7 +109,8 @@ class QdrantVectorIndex(BaseVectorIndex):
             group_payload_key='group_id',
             hnsw_config=HnswConfigDiff(m=0, payload_m=16, ef_construct=100, full_scan_threshold=10000,
                                        max_indexing_threads=0, on_disk=False),
-            **self._client_config.to_qdrant_params()
+            client=self._get_client(),
+            **self._get_add_texts_params()
         )
 
         return self
@@ -110,12 +120,9 @@ class QdrantVectorIndex(BaseVectorIndex):
         if self._vector_store:
             return self._vector_store
         attributes = ['doc_id', 'dataset_id', 'document_id']
-        client = qdrant_client.QdrantClient(
-            **self._client_config.to_qdrant_params()
-        )
 
         return QdrantVectorStore(
-            client=client,
+            client=self._get_client(),
             collection_name=self.get_index_name(self.dataset),
             embeddings=self._embeddings,
             content_payload_key='page_content',
@@ -126,6 +133,37 @@ class QdrantVectorIndex(BaseVectorIndex):
     def _get_vector_store_class(self) -> type:
         return QdrantVectorStore
 
+    def _get_add_texts_params(self) -> dict:
+        return {
+            'batch_size': self._client_config.upsert_batch_size,
+            'parallel': self._client_config.upsert_parallelism
+        }
+
+    def _get_client(self) -> qdrant_client.QdrantClient:
+        if self._client:
+            return self._client
+
+        client_params = self._client_config.to_qdrant_params()
+        if 'path' in client_params:
+            self._client = qdrant_local_registry.get_client(client_params['path'])
+        else:
+            self._client = vector_client_pool.acquire(
+                owner=self,
+                kind=self.get_type(),
+                config_key=(client_params['url'], client_params['api_key']),
+                factory=lambda: qdrant_client.QdrantClient(**client_params),
+                health_check=lambda client: client.get_collections() is not None,
+                close=lambda client: client.close()
+            )
+
+        return self._client
+
+    def get_vectors_by_ids(self, ids: list[str]) -> dict:
+        vector_store = self._get_vector_store()
+        vector_store = cast(self._get_vector_store_class(), vector_store)
+
+        return vector_store.get_vectors(ids)
+
     def delete_by_document_id(self, document_id: str):
 
         vector_store = self._get_vector_store()
@@ -148,12 +186,12 @@ class QdrantVectorIndex(BaseVectorIndex):
         vector_store = cast(self._get_vector_store_class(), vector_store)
 
         from qdrant_client.http import models
-        for node_id in ids:
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
             vector_store.del_texts(models.Filter(
                 must=[
                     models.FieldCondition(
                         key="metadata.doc_id",
-                        match=models.MatchValue(value=node_id),
+                        match=models.MatchAny(any=ids[i:i + DELETE_BATCH_SIZE]),
                     ),
                 ],
             ))
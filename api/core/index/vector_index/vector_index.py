@@ -1,4 +1,6 @@
 import json
+import logging
+from typing import Callable
 
 from flask import current_app
 from langchain.embeddings.base import Embeddings
@@ -43,7 +45,9 @@ class VectorIndex:
                 config=QdrantConfig(
                     endpoint=config.get('QDRANT_URL'),
                     api_key=config.get('QDRANT_API_KEY'),
-                    root_path=current_app.root_path
+                    root_path=current_app.root_path,
+                    upsert_batch_size=int(config.get('QDRANT_UPSERT_BATCH_SIZE')),
+                    upsert_parallelism=int(config.get('QDRANT_UPSERT_PARALLELISM'))
                 ),
                 embeddings=embeddings
             )
@@ -71,7 +75,44 @@ class VectorIndex:
             db.session.commit()
             return
 
-        self._vector_index.add_texts(texts, **kwargs)
+        def replace_texts(vector_index: BaseVectorIndex):
+            # documents already copied by the rebuild must not be duplicated
+            vector_index.delete_by_ids([text.metadata['doc_id'] for text in texts])
+            vector_index.add_texts(texts)
+
+        try:
+            # duplicate_check removes texts from the list
+            self._vector_index.add_texts(texts[:], **kwargs)
+        finally:
+            self._mirror_to_rebuild(replace_texts)
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        try:
+            self._vector_index.delete_by_ids(ids)
+        finally:
+            self._mirror_to_rebuild(lambda vector_index: vector_index.delete_by_ids(ids))
+
+    def delete_by_document_id(self, document_id: str):
+        try:
+            self._vector_index.delete_by_document_id(document_id)
+        finally:
+            self._mirror_to_rebuild(lambda vector_index: vector_index.delete_by_document_id(document_id))
+
+    def _mirror_to_rebuild(self, write: Callable[[BaseVectorIndex], None]):
+        """
+        Apply an index write to the collection the dataset index is being rebuilt into as well,
+        also when the write of the current index failed, e.g. its collection was just replaced.
+        """
+        rebuild_dataset = self._vector_index.get_rebuild_dataset()
+        if not rebuild_dataset:
+            return
+
+        try:
+            with self._vector_index.using_dataset(rebuild_dataset):
+                write(self._vector_index)
+        except Exception:
+            logging.exception(f'Failed to mirror an index write of dataset {self._dataset.id} to its rebuild')
+            self._vector_index.abandon_rebuild()
 
     def __getattr__(self, name):
         if self._vector_index is not None:
@@ -9,6 +9,7 @@ from pydantic import BaseModel, root_validator
 
 from core.index.base import BaseIndex
 from core.index.vector_index.base import BaseVectorIndex
+from core.vector_store.vector_client_pool import vector_client_pool
 from core.vector_store.weaviate_vector_store import WeaviateVectorStore
 from models.dataset import Dataset
 
@@ -32,6 +33,16 @@ class WeaviateVectorIndex(BaseVectorIndex):
         self._client = self._init_client(config)
 
     def _init_client(self, config: WeaviateConfig) -> weaviate.Client:
+        return vector_client_pool.acquire(
+            owner=self,
+            kind=self.get_type(),
+            config_key=(config.endpoint, config.api_key, config.batch_size),
+            factory=lambda: WeaviateVectorIndex._create_client(config),
+            health_check=lambda client: client.is_ready()
+        )
+
+    @staticmethod
+    def _create_client(config: WeaviateConfig) -> weaviate.Client:
         auth_config = weaviate.auth.AuthApiKey(api_key=config.api_key)
 
         weaviate.connect.connection.has_grpc = False
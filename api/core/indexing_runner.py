@@ -5,6 +5,8 @@ import re
 import threading
 import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, cast
 
 from flask import current_app, Flask
@@ -39,57 +41,94 @@ class IndexingRunner:
 
     def run(self, dataset_documents: List[DatasetDocument]):
         """Run the indexing process."""
-        for dataset_document in dataset_documents:
-            try:
-                # get dataset
-                dataset = Dataset.query.filter_by(
-                    id=dataset_document.dataset_id
-                ).first()
+        document_concurrency = current_app.config['INDEXING_DOCUMENT_CONCURRENCY']
+        if document_concurrency <= 1 or len(dataset_documents) <= 1:
+            for dataset_document in dataset_documents:
+                self._run_document(dataset_document)
+            return
 
-                if not dataset:
-                    raise ValueError("no dataset found")
+        # documents are extracted, split and indexed in parallel, each worker with its own app context
+        paused_exception = None
+        with ThreadPoolExecutor(max_workers=document_concurrency) as executor:
+            futures = [
+                executor.submit(self._run_document_in_app_context, current_app._get_current_object(),
+                                dataset_document.id)
+                for dataset_document in dataset_documents
+            ]
+
+            for future in futures:
+                try:
+                    future.result()
+                except DocumentIsPausedException as e:
+                    paused_exception = e
+
+        if paused_exception:
+            raise paused_exception
+
+    def _run_document_in_app_context(self, flask_app: Flask, dataset_document_id: str):
+        with flask_app.app_context():
+            dataset_document = db.session.query(DatasetDocument).filter(
+                DatasetDocument.id == dataset_document_id
+            ).first()
 
-                # get the process rule
-                processing_rule = db.session.query(DatasetProcessRule). \
-                        filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
-                        first()
+            if not dataset_document:
+                logging.warning(f'Document deleted, document id: {dataset_document_id}')
+                return
 
-                # load file
-                text_docs = self._load_data(dataset_document)
+            self._run_document(dataset_document)
 
-                # get splitter
-                splitter = self._get_splitter(processing_rule)
+    def _run_document(self, dataset_document: DatasetDocument):
+        """Run the indexing process of a document."""
+        try:
+            # get dataset
+            dataset = Dataset.query.filter_by(
+                id=dataset_document.dataset_id
+            ).first()
 
-                # split to documents
-                documents = self._step_split(
-                    text_docs=text_docs,
-                    splitter=splitter,
-                    dataset=dataset,
-                    dataset_document=dataset_document,
-                    processing_rule=processing_rule
-                )
-                self._build_index(
-                    dataset=dataset,
-                    dataset_document=dataset_document,
-                    documents=documents
-                )
-            except DocumentIsPausedException:
-                raise DocumentIsPausedException(
-                    f'Document paused, document id: {dataset_document.id}'
-                )
-            except ProviderTokenNotInitError as e:
-                dataset_document.indexing_status = 'error'
-                dataset_document.error = str(e.description)
-                dataset_document.stopped_at = datetime.datetime.utcnow()
-                db.session.commit()
-            except ObjectDeletedError:
-                logging.warning(f'Document deleted, document id: {dataset_document.id}')
-            except Exception as e:
-                logging.exception("consume document failed")
-                dataset_document.indexing_status = 'error'
-                dataset_document.error = str(e)
-                dataset_document.stopped_at = datetime.datetime.utcnow()
-                db.session.commit()
+            if not dataset:
+                raise ValueError("no dataset found")
+
+            # get the process rule
+            processing_rule = db.session.query(DatasetProcessRule). \
+                    filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
+                    first()
+
+            # load file
+            text_docs = self._load_data(dataset_document)
+
+            # get splitter
+            splitter = self._get_splitter(processing_rule)
+
+            # split to documents
+            documents = self._step_split(
+                text_docs=text_docs,
+                splitter=splitter,
+                dataset=dataset,
+                dataset_document=dataset_document,
+                processing_rule=processing_rule
+            )
+            self._build_index(
+                dataset=dataset,
+                dataset_document=dataset_document,
+                documents=documents
+            )
+        except DocumentIsPausedException:
+            raise DocumentIsPausedException(
+                f'Document paused, document id: {dataset_document.id}'
+            )
+        except ProviderTokenNotInitError as e:
+            dataset_document.indexing_status = 'error'
+            dataset_document.error = str(e.description)
+            dataset_document.stopped_at = datetime.datetime.utcnow()
+            db.session.commit()
+        except ObjectDeletedError:
+            logging.warning(f'Document deleted, document id: {dataset_document.id}')
+        except Exception as e:
+            logging.exception("consume document failed")
+            dataset_document.indexing_status = 'error'
+            dataset_document.error = str(e)
+            dataset_document.stopped_at = datetime.datetime.utcnow()
+            db.session.commit()
 
     def run_in_splitting_status(self, dataset_document: DatasetDocument):
         """Run the indexing process when the index_status is splitting."""
@@ -256,11 +295,11 @@ class IndexingRunner:
 
             total_segments += len(documents)
 
-            for document in documents:
-                if len(preview_texts) < 5:
-                    preview_texts.append(document.page_content)
-                if indexing_technique == 'high_quality' or embedding_model:
-                    tokens += embedding_model.get_num_tokens(self.filter_string(document.page_content))
+            preview_texts.extend(document.page_content for document in documents[:5 - len(preview_texts)])
+            if indexing_technique == 'high_quality' or embedding_model:
+                tokens += sum(embedding_model.get_num_tokens_batch(
+                    [self.filter_string(document.page_content) for document in documents]
+                ))
 
         if doc_form and doc_form == 'qa_model':
             text_generation_model = ModelFactory.get_text_generation_model(
@@ -352,11 +391,11 @@ class IndexingRunner:
                     processing_rule=processing_rule
                 )
                 total_segments += len(documents)
-                for document in documents:
-                    if len(preview_texts) < 5:
-                        preview_texts.append(document.page_content)
-                    if indexing_technique == 'high_quality' or embedding_model:
-                        tokens += embedding_model.get_num_tokens(document.page_content)
+                preview_texts.extend(document.page_content for document in documents[:5 - len(preview_texts)])
+                if indexing_technique == 'high_quality' or embedding_model:
+                    tokens += sum(embedding_model.get_num_tokens_batch(
+                        [document.page_content for document in documents]
+                    ))
 
         if doc_form and doc_form == 'qa_model':
             text_generation_model = ModelFactory.get_text_generation_model(
@@ -651,6 +690,9 @@ class IndexingRunner:
     def _build_index(self, dataset: Dataset, dataset_document: DatasetDocument, documents: List[Document]) -> None:
         """
         Build the index for the document.
+
+        Embedding and vector store writes of each chunk run on a bounded thread pool,
+        overlapping with the keyword index writes and segment status updates of this thread.
         """
         vector_index = IndexBuilder.get_index(dataset, 'high_quality')
         keyword_table_index = IndexBuilder.get_index(dataset, 'economy')
@@ -666,35 +708,52 @@ class IndexingRunner:
         indexing_start_at = time.perf_counter()
         tokens = 0
         chunk_size = 100
-        for i in range(0, len(documents), chunk_size):
-            # check document is paused
-            self._check_document_paused_status(dataset_document.id)
-            chunk_documents = documents[i:i + chunk_size]
-            if dataset.indexing_technique == 'high_quality' or embedding_model:
-                tokens += sum(
-                    embedding_model.get_num_tokens(document.page_content)
-                    for document in chunk_documents
-                )
+        chunks = [documents[i:i + chunk_size] for i in range(0, len(documents), chunk_size)]
 
-            # save vector index
-            if vector_index:
-                vector_index.add_texts(chunk_documents)
-
-            # save keyword index
+        # the first chunk creates the vector collection and saves the index struct, so it can't run concurrently
+        if chunks and vector_index and not dataset.index_struct_dict:
+            self._check_document_paused_status(dataset_document.id)
+            chunk_documents = chunks.pop(0)
+            tokens += sum(embedding_model.get_num_tokens_batch(
+                [document.page_content for document in chunk_documents]
+            ))
+            vector_index.add_texts(chunk_documents)
             keyword_table_index.add_texts(chunk_documents)
+            self._complete_segments(dataset_document.id, chunk_documents)
 
-            document_ids = [document.metadata['doc_id'] for document in chunk_documents]
-            db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.index_node_id.in_(document_ids),
-                DocumentSegment.status == "indexing"
-            ).update({
-                DocumentSegment.status: "completed",
-                DocumentSegment.enabled: True,
-                DocumentSegment.completed_at: datetime.datetime.utcnow()
-            })
-
-            db.session.commit()
+        concurrency = self._get_embedding_concurrency(dataset.embedding_model_provider) if vector_index else 1
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending_chunks = deque()
+            try:
+                for chunk_documents in chunks:
+                    # check document is paused
+                    self._check_document_paused_status(dataset_document.id)
+
+                    if vector_index:
+                        future = executor.submit(self._build_vector_index_chunk, current_app._get_current_object(),
+                                                 dataset.id, chunk_documents)
+                        pending_chunks.append((chunk_documents, future))
+
+                    # save keyword index while the embeddings of the chunk are in flight
+                    keyword_table_index.add_texts(chunk_documents)
+
+                    if not vector_index:
+                        self._complete_segments(dataset_document.id, chunk_documents)
+
+                    # back-pressure, wait for the oldest chunk when the pool is saturated
+                    while len(pending_chunks) >= concurrency:
+                        pending_documents, future = pending_chunks.popleft()
+                        tokens += future.result()
+                        self._complete_segments(dataset_document.id, pending_documents)
+
+                while pending_chunks:
+                    pending_documents, future = pending_chunks.popleft()
+                    tokens += future.result()
+                    self._complete_segments(dataset_document.id, pending_documents)
+            except Exception:
+                for _, future in pending_chunks:
+                    future.cancel()
+                raise
 
         indexing_end_at = time.perf_counter()
 
@@ -709,6 +768,49 @@ class IndexingRunner:
             }
         )
 
+    def _build_vector_index_chunk(self, flask_app: Flask, dataset_id: str, documents: List[Document]) -> int:
+        """
+        Embed and save a chunk of documents to the vector index, return the tokens used.
+        """
+        with flask_app.app_context():
+            dataset = Dataset.query.filter_by(id=dataset_id).first()
+            if not dataset:
+                raise ValueError("no dataset found")
+
+            embedding_model = ModelFactory.get_embedding_model(
+                tenant_id=dataset.tenant_id,
+                model_provider_name=dataset.embedding_model_provider,
+                model_name=dataset.embedding_model
+            )
+
+            tokens = sum(embedding_model.get_num_tokens_batch(
+                [document.page_content for document in documents]
+            ))
+
+            vector_index = IndexBuilder.get_index(dataset, 'high_quality')
+            vector_index.add_texts(documents)
+
+            return tokens
+
+    def _get_embedding_concurrency(self, provider_name: str) -> int:
+        provider_concurrency = current_app.config['INDEXING_EMBEDDING_PROVIDER_CONCURRENCY']
+        concurrency = provider_concurrency.get(provider_name, current_app.config['INDEXING_EMBEDDING_CONCURRENCY'])
+        return max(1, concurrency)
+
+    def _complete_segments(self, dataset_document_id: str, documents: List[Document]) -> None:
+        document_ids = [document.metadata['doc_id'] for document in documents]
+        db.session.query(DocumentSegment).filter(
+            DocumentSegment.document_id == dataset_document_id,
+            DocumentSegment.index_node_id.in_(document_ids),
+            DocumentSegment.status == "indexing"
+        ).update({
+            DocumentSegment.status: "completed",
+            DocumentSegment.enabled: True,
+            DocumentSegment.completed_at: datetime.datetime.utcnow()
+        })
+
+        db.session.commit()
+
     def _check_document_paused_status(self, document_id: str):
         indexing_cache_key = f'document_{document_id}_is_paused'
         if result := redis_client.get(indexing_cache_key):
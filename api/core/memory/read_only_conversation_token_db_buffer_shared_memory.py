@@ -1,3 +1,4 @@
+import json
 from typing import Any, List, Dict
 
 from langchain.memory.chat_memory import BaseChatMemory
@@ -7,7 +8,11 @@ from core.file.message_file_parser import MessageFileParser
 from core.model_providers.models.entity.message import PromptMessage, MessageType, to_lc_messages
 from core.model_providers.models.llm.base import BaseLLM
 from extensions.ext_database import db
-from models.model import Conversation, Message
+from extensions.ext_redis import redis_client
+from models.model import Conversation, Message, MessageFile
+
+# seconds to keep the cached conversation history and message token counts
+MEMORY_CACHE_TTL = 3600
 
 
 class ReadOnlyConversationTokenDBBufferSharedMemory(BaseChatMemory):
@@ -24,6 +29,60 @@ class ReadOnlyConversationTokenDBBufferSharedMemory(BaseChatMemory):
         """String buffer of memory."""
         app_model = self.conversation.app
 
+        history = self._get_history()
+        if not history:
+            return []
+
+        # prune the oldest messages if it exceeds the max token limit, using the cached token count of each message,
+        # query and answer counted apart, so that the kept messages are the same as popping and recounting them
+        token_counts = self._get_token_counts(history)
+        kept_index = len(token_counts)
+        curr_buffer_length = 0
+        for index in reversed(range(len(token_counts))):
+            if curr_buffer_length + token_counts[index] > self.max_token_limit:
+                break
+            curr_buffer_length += token_counts[index]
+            kept_index = index
+
+        # only parse the files of the queries that are kept
+        messages_with_files = {}
+        if message_ids := [item['id'] for index, item in enumerate(history)
+                           if item['has_files'] and index * 2 >= kept_index]:
+            messages_with_files = {
+                message.id: message
+                for message in db.session.query(Message).filter(Message.id.in_(message_ids)).all()
+            }
+
+        message_file_parser = MessageFileParser(tenant_id=app_model.tenant_id, app_id=self.conversation.app_id)
+
+        chat_messages: List[PromptMessage] = []
+        for index, item in enumerate(history):
+            if index * 2 >= kept_index:
+                if message := messages_with_files.get(item['id']):
+                    file_objs = message_file_parser.transform_message_files(
+                        message.message_files, message.app_model_config
+                    )
+
+                    prompt_message_files = [file_obj.prompt_message_file for file_obj in file_objs]
+                    chat_messages.append(PromptMessage(
+                        content=item['query'],
+                        type=MessageType.USER,
+                        files=prompt_message_files
+                    ))
+                else:
+                    chat_messages.append(PromptMessage(content=item['query'], type=MessageType.USER))
+
+            if index * 2 + 1 >= kept_index:
+                chat_messages.append(PromptMessage(content=item['answer'], type=MessageType.ASSISTANT))
+
+        return to_lc_messages(chat_messages)
+
+    def _get_history(self) -> List[dict]:
+        """Get the latest messages of the conversation, cached in redis until a new message is created."""
+        cache_key = self.history_cache_key(self.conversation.id)
+        if history := redis_client.hget(cache_key, str(self.message_limit)):
+            return json.loads(history)
+
         # fetch limited messages desc, and return reversed
         messages = db.session.query(Message).filter(
             Message.conversation_id == self.conversation.id,
@@ -31,38 +90,85 @@ class ReadOnlyConversationTokenDBBufferSharedMemory(BaseChatMemory):
         ).order_by(Message.created_at.desc()).limit(self.message_limit).all()
 
         messages = list(reversed(messages))
-        message_file_parser = MessageFileParser(tenant_id=app_model.tenant_id, app_id=self.conversation.app_id)
-
-        chat_messages: List[PromptMessage] = []
-        for message in messages:
-            if files := message.message_files:
-                file_objs = message_file_parser.transform_message_files(
-                    files, message.app_model_config
-                )
-
-                prompt_message_files = [file_obj.prompt_message_file for file_obj in file_objs]
-                chat_messages.append(PromptMessage(
-                    content=message.query,
-                    type=MessageType.USER,
-                    files=prompt_message_files
-                ))
-            else:
-                chat_messages.append(PromptMessage(content=message.query, type=MessageType.USER))
-
-            chat_messages.append(PromptMessage(content=message.answer, type=MessageType.ASSISTANT))
-
-        if not chat_messages:
-            return []
 
-        # prune the chat message if it exceeds the max token limit
-        curr_buffer_length = self.model_instance.get_num_tokens(chat_messages)
-        if curr_buffer_length > self.max_token_limit:
-            pruned_memory = []
-            while curr_buffer_length > self.max_token_limit and chat_messages:
-                pruned_memory.append(chat_messages.pop(0))
-                curr_buffer_length = self.model_instance.get_num_tokens(chat_messages)
-
-        return to_lc_messages(chat_messages)
+        message_ids_with_files = set()
+        if messages:
+            message_ids_with_files = {
+                message_id for message_id, in db.session.query(MessageFile.message_id).filter(
+                    MessageFile.message_id.in_([message.id for message in messages])
+                ).distinct().all()
+            }
+
+        history = [
+            {
+                'id': message.id,
+                'query': message.query,
+                'answer': message.answer,
+                'has_files': message.id in message_ids_with_files
+            }
+            for message in messages
+        ]
+
+        redis_client.hset(cache_key, str(self.message_limit), json.dumps(history))
+        redis_client.expire(cache_key, MEMORY_CACHE_TTL)
+
+        return history
+
+    def _get_token_counts(self, history: List[dict]) -> List[int]:
+        """
+        Get the token counts of the query and the answer of each message, counted when the message is saved
+        or else once per message and model.
+        """
+        cache_key = self.token_counts_cache_key(self.conversation.id)
+        parts = [(item['id'], item[key], key) for item in history for key in ['query', 'answer']]
+        fields = [self._token_count_field(self.model_instance, message_id, key) for message_id, _, key in parts]
+        cached_token_counts = redis_client.hmget(cache_key, fields)
+
+        token_counts = []
+        new_token_counts = {}
+        for field, (_, content, key), token_count in zip(fields, parts, cached_token_counts):
+            if token_count is None:
+                token_count = self._count_tokens(self.model_instance, content, key)
+                new_token_counts[field] = token_count
+
+            token_counts.append(int(token_count))
+
+        if new_token_counts:
+            redis_client.hset(cache_key, mapping=new_token_counts)
+        redis_client.expire(cache_key, MEMORY_CACHE_TTL)
+
+        return token_counts
+
+    @classmethod
+    def save_token_counts(cls, model_instance: BaseLLM, message: Message):
+        """Count the tokens of the query and the answer of a message when it is saved."""
+        cache_key = cls.token_counts_cache_key(message.conversation_id)
+        redis_client.hset(cache_key, mapping={
+            cls._token_count_field(model_instance, message.id, key): cls._count_tokens(model_instance, content, key)
+            for content, key in [(message.query, 'query'), (message.answer, 'answer')]
+        })
+        redis_client.expire(cache_key, MEMORY_CACHE_TTL)
+
+    @classmethod
+    def token_counts_cache_key(cls, conversation_id: str) -> str:
+        return f'conversation_memory_tokens:{conversation_id}'
+
+    @staticmethod
+    def _token_count_field(model_instance: BaseLLM, message_id: str, key: str) -> str:
+        return f'{model_instance.name}:{message_id}:{key}'
+
+    @staticmethod
+    def _count_tokens(model_instance: BaseLLM, content: str, key: str) -> int:
+        message_type = MessageType.USER if key == 'query' else MessageType.ASSISTANT
+        return model_instance.get_num_tokens([PromptMessage(content=content, type=message_type)])
+
+    @classmethod
+    def history_cache_key(cls, conversation_id: str) -> str:
+        return f'conversation_memory_history:{conversation_id}'
+
+    @classmethod
+    def clear_history_cache(cls, conversation_id: str):
+        redis_client.delete(cls.history_cache_key(conversation_id))
 
     @property
     def memory_variables(self) -> List[str]:
@@ -1,10 +1,12 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 from langchain.callbacks.base import Callbacks
 
 from core.model_providers.error import ProviderTokenNotInitError, LLMBadRequestError
+from core.model_providers.model_provider_cache import model_provider_cache
 from core.model_providers.model_provider_factory import ModelProviderFactory, DEFAULT_MODELS
 from core.model_providers.models.base import BaseProviderModel
+from core.model_providers.providers.base import BaseModelProvider
 from core.model_providers.models.embedding.base import BaseEmbedding
 from core.model_providers.models.entity.model_params import ModelKwargs, ModelType
 from core.model_providers.models.llm.base import BaseLLM
@@ -64,19 +66,18 @@ class ModelFactory:
         """
         is_default_model = False
         if model_provider_name is None and model_name is None:
-            default_model = cls.get_default_model(tenant_id, ModelType.TEXT_GENERATION)
+            default_model = cls._get_default_model_name(tenant_id, ModelType.TEXT_GENERATION)
 
             if not default_model:
                 raise LLMBadRequestError(
                     'Default model is not available. Please configure a Default System Reasoning Model in the Settings -> Model Provider.'
                 )
 
-            model_provider_name = default_model.provider_name
-            model_name = default_model.model_name
+            model_provider_name, model_name = default_model
             is_default_model = True
 
         # get model provider
-        model_provider = ModelProviderFactory.get_preferred_model_provider(tenant_id, model_provider_name)
+        model_provider = cls._get_model_provider(tenant_id, model_provider_name, model_name, ModelType.TEXT_GENERATION)
 
         if not model_provider:
             raise ProviderTokenNotInitError(f"Model {model_name} provider credentials is not initialized.")
@@ -118,18 +119,17 @@ class ModelFactory:
         :return:
         """
         if model_provider_name is None and model_name is None:
-            default_model = cls.get_default_model(tenant_id, ModelType.EMBEDDINGS)
+            default_model = cls._get_default_model_name(tenant_id, ModelType.EMBEDDINGS)
 
             if not default_model:
                 raise LLMBadRequestError(
                     'Default model is not available. Please configure a Default Embedding Model in the Settings -> Model Provider.'
                 )
 
-            model_provider_name = default_model.provider_name
-            model_name = default_model.model_name
+            model_provider_name, model_name = default_model
 
         # get model provider
-        model_provider = ModelProviderFactory.get_preferred_model_provider(tenant_id, model_provider_name)
+        model_provider = cls._get_model_provider(tenant_id, model_provider_name, model_name, ModelType.EMBEDDINGS)
 
         if not model_provider:
             raise ProviderTokenNotInitError(f"Model {model_name} provider credentials is not initialized.")
@@ -156,18 +156,17 @@ class ModelFactory:
         :return:
         """
         if (model_provider_name is None or len(model_provider_name) == 0) and (model_name is None or len(model_name) == 0):
-            default_model = cls.get_default_model(tenant_id, ModelType.RERANKING)
+            default_model = cls._get_default_model_name(tenant_id, ModelType.RERANKING)
 
             if not default_model:
                 raise LLMBadRequestError(
                     'Default model is not available. Please configure a Default Reranking Model in the Settings -> Model Provider.'
                 )
 
-            model_provider_name = default_model.provider_name
-            model_name = default_model.model_name
+            model_provider_name, model_name = default_model
 
         # get model provider
-        model_provider = ModelProviderFactory.get_preferred_model_provider(tenant_id, model_provider_name)
+        model_provider = cls._get_model_provider(tenant_id, model_provider_name, model_name, ModelType.RERANKING)
 
         if not model_provider:
             raise ProviderTokenNotInitError(f"Model {model_name} provider credentials is not initialized.")
@@ -193,18 +192,17 @@ class ModelFactory:
         :return:
         """
         if model_provider_name is None and model_name is None:
-            default_model = cls.get_default_model(tenant_id, ModelType.SPEECH_TO_TEXT)
+            default_model = cls._get_default_model_name(tenant_id, ModelType.SPEECH_TO_TEXT)
 
             if not default_model:
                 raise LLMBadRequestError(
                     'Default model is not available. Please configure a Default Speech-to-Text Model in the Settings -> Model Provider.'
                 )
 
-            model_provider_name = default_model.provider_name
-            model_name = default_model.model_name
+            model_provider_name, model_name = default_model
 
         # get model provider
-        model_provider = ModelProviderFactory.get_preferred_model_provider(tenant_id, model_provider_name)
+        model_provider = cls._get_model_provider(tenant_id, model_provider_name, model_name, ModelType.SPEECH_TO_TEXT)
 
         if not model_provider:
             raise ProviderTokenNotInitError(f"Model {model_name} provider credentials is not initialized.")
@@ -230,7 +228,7 @@ class ModelFactory:
         :return:
         """
         # get model provider
-        model_provider = ModelProviderFactory.get_preferred_model_provider(tenant_id, model_provider_name)
+        model_provider = cls._get_model_provider(tenant_id, model_provider_name, model_name, ModelType.MODERATION)
 
         if not model_provider:
             raise ProviderTokenNotInitError(f"Model {model_name} provider credentials is not initialized.")
@@ -242,6 +240,38 @@ class ModelFactory:
             name=model_name
         )
 
+    @classmethod
+    def _get_model_provider(cls, tenant_id: str, model_provider_name: str, model_name: str,
+                            model_type: ModelType) -> Optional[BaseModelProvider]:
+        """
+        get preferred model provider of model, cached for a short time.
+
+        :param tenant_id:
+        :param model_provider_name:
+        :param model_name:
+        :param model_type:
+        :return:
+        """
+        return model_provider_cache.get_model_provider(
+            tenant_id, model_provider_name, model_name, model_type,
+            lambda: ModelProviderFactory.get_preferred_model_provider(tenant_id, model_provider_name)
+        )
+
+    @classmethod
+    def _get_default_model_name(cls, tenant_id: str, model_type: ModelType) -> Optional[Tuple[str, str]]:
+        """
+        get provider name and model name of the default model of model type, cached for a short time.
+
+        :param tenant_id:
+        :param model_type:
+        :return:
+        """
+        def resolve():
+            default_model = cls.get_default_model(tenant_id, model_type)
+            return (default_model.provider_name, default_model.model_name) if default_model else None
+
+        return model_provider_cache.get_default_model(tenant_id, model_type, resolve)
+
     @classmethod
     def get_default_model(cls, tenant_id: str, model_type: ModelType) -> TenantDefaultModel:
         """
@@ -331,4 +361,7 @@ class ModelFactory:
             )
             db.session.add(default_model)
         db.session.commit()
+
+        model_provider_cache.invalidate(tenant_id)
+
         return default_model
@@ -0,0 +1,160 @@
+import threading
+from typing import Optional, Tuple, Callable
+
+from cachetools import TTLCache
+from flask import current_app
+
+from core.model_providers.models.entity.model_params import ModelType, ModelKwargsRules
+from core.model_providers.providers.base import BaseModelProvider
+from models.provider import Provider
+
+# max number of resolved (tenant, provider, model, type) entries per process
+MODEL_PROVIDER_CACHE_MAX_SIZE = 10000
+
+
+class CachedModelProvider:
+    """
+    A resolved model provider shared by the model instances of a tenant for a short time,
+    memoizing the decrypted model credentials and the model parameter rules.
+    """
+
+    def __init__(self, model_provider: BaseModelProvider):
+        self._model_provider = model_provider
+        self._lock = threading.Lock()
+        self._credentials = {}
+        self._parameter_rules = {}
+
+    def __getattr__(self, name):
+        return getattr(self._model_provider, name)
+
+    def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
+        if obfuscated:
+            return self._model_provider.get_model_credentials(model_name, model_type, obfuscated)
+
+        key = (model_name, model_type)
+        with self._lock:
+            credentials = self._credentials.get(key)
+
+        if credentials is None:
+            credentials = self._model_provider.get_model_credentials(model_name=model_name, model_type=model_type)
+            with self._lock:
+                self._credentials[key] = credentials
+
+        # callers may update the credentials they got
+        return dict(credentials)
+
+    def get_model_parameter_rules(self, model_name: str, model_type: ModelType) -> ModelKwargsRules:
+        key = (model_name, model_type)
+        with self._lock:
+            parameter_rules = self._parameter_rules.get(key)
+
+        if parameter_rules is None:
+            parameter_rules = self._model_provider.get_model_parameter_rules(model_name, model_type)
+            with self._lock:
+                self._parameter_rules[key] = parameter_rules
+
+        return parameter_rules
+
+
+class ModelProviderCache:
+    """
+    Per-process cache of the preferred model providers and default models of tenants,
+    entries expire after MODEL_PROVIDER_CACHE_TTL seconds or when the provider settings of the tenant change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Optional[TTLCache] = None
+
+    def get_model_provider(self, tenant_id: str, model_provider_name: str, model_name: str,
+                           model_type: ModelType,
+                           resolver: Callable[[], Optional[BaseModelProvider]]) -> Optional[BaseModelProvider]:
+        """
+        Get the resolved model provider of a model, call resolver on a miss.
+
+        :param tenant_id:
+        :param model_provider_name:
+        :param model_name:
+        :param model_type:
+        :param resolver: resolve the model provider from the database
+        :return:
+        """
+        if not self._is_enabled():
+            return resolver()
+
+        key = ('model_provider', tenant_id, model_provider_name, model_name, model_type.value)
+        with self._lock:
+            model_provider = self._get_cache().get(key)
+
+        if model_provider is not None:
+            return model_provider
+
+        model_provider = resolver()
+        if not model_provider:
+            return None
+
+        # the provider row must outlive the session it was loaded in
+        model_provider.provider = self._detach_provider(model_provider.provider)
+        model_provider = CachedModelProvider(model_provider)
+        with self._lock:
+            self._get_cache()[key] = model_provider
+
+        return model_provider
+
+    def get_default_model(self, tenant_id: str, model_type: ModelType,
+                          resolver: Callable[[], Optional[Tuple[str, str]]]) -> Optional[Tuple[str, str]]:
+        """
+        Get the (provider name, model name) of the default model of a model type, call resolver on a miss.
+
+        :param tenant_id:
+        :param model_type:
+        :param resolver: resolve the default model from the database
+        :return:
+        """
+        if not self._is_enabled():
+            return resolver()
+
+        key = ('default_model', tenant_id, model_type.value)
+        with self._lock:
+            default_model = self._get_cache().get(key)
+
+        if default_model is not None:
+            return default_model
+
+        default_model = resolver()
+        if default_model:
+            with self._lock:
+                self._get_cache()[key] = default_model
+
+        return default_model
+
+    def invalidate(self, tenant_id: str):
+        """Drop the cached providers and default models of a tenant."""
+        with self._lock:
+            if self._cache is None:
+                return
+
+            for key in [key for key in list(self._cache.keys()) if key[1] == tenant_id]:
+                self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache = None
+
+    def _is_enabled(self) -> bool:
+        return current_app.config['MODEL_PROVIDER_CACHE_TTL'] > 0
+
+    def _get_cache(self) -> TTLCache:
+        # built on the first resolution, MODEL_PROVIDER_CACHE_TTL is only known within an app context
+        if self._cache is None:
+            self._cache = TTLCache(maxsize=MODEL_PROVIDER_CACHE_MAX_SIZE,
+                                   ttl=current_app.config['MODEL_PROVIDER_CACHE_TTL'])
+
+        return self._cache
+
+    @staticmethod
+    def _detach_provider(provider: Provider) -> Provider:
+        return Provider(**{column.name: getattr(provider, column.name) for column in Provider.__table__.columns})
+
+
+model_provider_cache = ModelProviderCache()
@@ -1,14 +1,15 @@
 import decimal
 import logging
+from typing import List
 
 import openai
-import tiktoken
 from langchain.embeddings import OpenAIEmbeddings
 
 from core.model_providers.error import LLMBadRequestError, LLMAuthorizationError, LLMRateLimitError, \
     LLMAPIUnavailableError, LLMAPIConnectionError
 from core.model_providers.models.embedding.base import BaseEmbedding
 from core.model_providers.providers.base import BaseModelProvider
+from core.tokenizer_service import tokenizer_service
 
 AZURE_OPENAI_API_VERSION = '2023-07-01-preview'
 
@@ -48,15 +49,16 @@ class AzureOpenAIEmbedding(BaseEmbedding):
         :param text:
         :return:
         """
-        if not text:
-            return 0
+        return tokenizer_service.count(text, self.credentials.get('base_model_name'))
 
-        enc = tiktoken.encoding_for_model(self.credentials.get('base_model_name'))
-
-        tokenized_text = enc.encode(text)
+    def get_num_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        get num tokens of each text, tokenized in one native batch call.
 
-        # calculate the number of tokens in the encoded text
-        return len(tokenized_text)
+        :param texts:
+        :return:
+        """
+        return tokenizer_service.count_many(texts, self.credentials.get('base_model_name'))
 
     def handle_exceptions(self, ex: Exception) -> Exception:
         if isinstance(ex, openai.error.InvalidRequestError):
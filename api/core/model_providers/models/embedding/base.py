@@ -1,13 +1,12 @@
 from abc import abstractmethod
-from typing import Any
+from typing import Any, List
 import decimal
 
-import tiktoken
-from langchain.schema.language_model import _get_token_ids_default_method
 
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.entity.model_params import ModelType
 from core.model_providers.providers.base import BaseModelProvider
+from core.tokenizer_service import tokenizer_service
 import logging
 logger = logging.getLogger(__name__)
 
@@ -83,7 +82,16 @@ class BaseEmbedding(BaseProviderModel):
         :param text:
         :return:
         """
-        return 0 if not text else len(_get_token_ids_default_method(text))
+        return tokenizer_service.count(text)
+
+    def get_num_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        get num tokens of each text.
+
+        :param texts:
+        :return:
+        """
+        return tokenizer_service.count_many(texts)
 
     def get_currency(self):
         """
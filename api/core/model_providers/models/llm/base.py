@@ -12,6 +12,7 @@ from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.entity.message import PromptMessage, MessageType, LLMRunResult, to_lc_messages
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargs, ModelMode, ModelKwargsRules
 from core.model_providers.providers.base import BaseModelProvider
+from core.tokenizer_service import tokenizer_service
 from core.third_party.langchain.llms.fake import FakeLLM
 
 logger = logging.getLogger(__name__)
@@ -206,10 +207,23 @@ class BaseLLM(BaseProviderModel):
         """
         raise NotImplementedError
 
-    @abstractmethod
     def get_num_tokens(self, messages: List[PromptMessage]) -> int:
         """
-        get num tokens of prompt messages.
+        get num tokens of prompt messages, memoized for prompts counted again.
+
+        :param messages:
+        :return:
+        """
+        return tokenizer_service.count_messages(
+            f'{self.model_provider.provider_name}:{self.name}',
+            messages,
+            self._get_num_tokens
+        )
+
+    @abstractmethod
+    def _get_num_tokens(self, messages: List[PromptMessage]) -> int:
+        """
+        count num tokens of prompt messages.
 
         :param messages:
         :return:
@@ -131,7 +131,7 @@ class OpenAIModel(BaseLLM):
 
         return self._client.generate(**generate_kwargs)
 
-    def get_num_tokens(self, messages: List[PromptMessage]) -> int:
+    def _get_num_tokens(self, messages: List[PromptMessage]) -> int:
         """
         get num tokens of prompt messages.
 
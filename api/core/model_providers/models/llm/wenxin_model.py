@@ -45,7 +45,7 @@ class WenxinModel(BaseLLM):
 
         return self._client.generate(**generate_kwargs)
 
-    def get_num_tokens(self, messages: List[PromptMessage]) -> int:
+    def _get_num_tokens(self, messages: List[PromptMessage]) -> int:
         """
         get num tokens of prompt messages.
 
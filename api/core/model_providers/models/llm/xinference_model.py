@@ -49,7 +49,7 @@ class XinferenceModel(BaseLLM):
             }
         )
 
-    def get_num_tokens(self, messages: List[PromptMessage]) -> int:
+    def _get_num_tokens(self, messages: List[PromptMessage]) -> int:
         """
         get num tokens of prompt messages.
 
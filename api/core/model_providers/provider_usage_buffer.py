@@ -0,0 +1,177 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from flask import current_app, Flask
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.provider import Provider
+
+# members of the set are `quota:{provider_id}` and `last_used:{tenant_id}:{provider_name}`
+PROVIDER_USAGE_DIRTY_KEY = 'provider_usage_dirty'
+PROVIDER_USAGE_FLUSH_LOCK_KEY = 'provider_usage_flush_lock'
+
+
+class ProviderUsageBuffer:
+    """
+    Write-behind buffer of the quota usage and last used time of providers.
+
+    Usage is accumulated in redis counters and written to the providers table by a flusher thread
+    every PROVIDER_USAGE_FLUSH_INTERVAL seconds, quota checks add the pending usage to the stored one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flusher_thread: Optional[threading.Thread] = None
+
+    def add_quota_used(self, provider_id: str, used_quota: int):
+        pipeline = redis_client.pipeline()
+        pipeline.incrby(self._pending_quota_key(provider_id), used_quota)
+        pipeline.sadd(PROVIDER_USAGE_DIRTY_KEY, f'quota:{provider_id}')
+        pipeline.execute()
+
+        self._ensure_flusher_started()
+
+    def set_last_used(self, tenant_id: str, provider_name: str):
+        pipeline = redis_client.pipeline()
+        pipeline.setex(self._last_used_key(tenant_id, provider_name), 86400, datetime.utcnow().isoformat())
+        pipeline.sadd(PROVIDER_USAGE_DIRTY_KEY, f'last_used:{tenant_id}:{provider_name}')
+        pipeline.execute()
+
+        self._ensure_flusher_started()
+
+    def is_quota_available(self, provider_id: str) -> bool:
+        """Check quota with the stored usage, cached for a flush interval, plus the pending usage."""
+        quota_key = self._quota_key(provider_id)
+        pipeline = redis_client.pipeline()
+        pipeline.hmget(quota_key, 'is_valid', 'quota_limit', 'quota_used')
+        pipeline.get(self._pending_quota_key(provider_id))
+        quota, pending_quota_used = pipeline.execute()
+
+        if quota[0] is None:
+            provider = db.session.query(Provider.is_valid, Provider.quota_limit, Provider.quota_used) \
+                .filter(Provider.id == provider_id).first()
+            if not provider:
+                return False
+
+            quota = [int(provider.is_valid), provider.quota_limit or 0, provider.quota_used or 0]
+            pipeline = redis_client.pipeline()
+            pipeline.hset(quota_key, mapping={
+                'is_valid': quota[0],
+                'quota_limit': quota[1],
+                'quota_used': quota[2]
+            })
+            pipeline.expire(quota_key, current_app.config['PROVIDER_USAGE_FLUSH_INTERVAL'])
+            pipeline.execute()
+
+        is_valid, quota_limit, quota_used = (int(value) for value in quota)
+        pending_quota_used = int(pending_quota_used) if pending_quota_used else 0
+
+        return bool(is_valid) and quota_limit > quota_used + pending_quota_used
+
+    def flush(self):
+        """Write the pending usage of all providers, only one process flushes at a time."""
+        lock = redis_client.lock(PROVIDER_USAGE_FLUSH_LOCK_KEY, timeout=60, blocking_timeout=0)
+        if not lock.acquire():
+            return
+
+        try:
+            members = redis_client.smembers(PROVIDER_USAGE_DIRTY_KEY)
+            if not members:
+                return
+
+            redis_client.srem(PROVIDER_USAGE_DIRTY_KEY, *members)
+
+            try:
+                flushed_quotas = self._write_usage(members)
+            except Exception:
+                db.session.rollback()
+                logging.exception('Failed to flush provider usage')
+                redis_client.sadd(PROVIDER_USAGE_DIRTY_KEY, *members)
+                return
+
+            # usage added while flushing stays pending
+            pipeline = redis_client.pipeline()
+            for provider_id, used_quota in flushed_quotas.items():
+                pipeline.delete(self._quota_key(provider_id))
+                pipeline.decrby(self._pending_quota_key(provider_id), used_quota)
+            pipeline.execute()
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                pass
+
+    def _write_usage(self, members: set) -> dict:
+        flushed_quotas = {}
+        for member in members:
+            member = member.decode('utf-8')
+            if member.startswith('quota:'):
+                provider_id = member[len('quota:'):]
+                used_quota = redis_client.get(self._pending_quota_key(provider_id))
+                if used_quota and int(used_quota) > 0:
+                    db.session.query(Provider).filter(
+                        Provider.id == provider_id,
+                        Provider.quota_limit > Provider.quota_used
+                    ).update({'quota_used': Provider.quota_used + int(used_quota)}, synchronize_session=False)
+                    flushed_quotas[provider_id] = int(used_quota)
+            elif member.startswith('last_used:'):
+                _, tenant_id, provider_name = member.split(':', 2)
+                last_used = redis_client.get(self._last_used_key(tenant_id, provider_name))
+                if last_used:
+                    db.session.query(Provider).filter(
+                        Provider.tenant_id == tenant_id,
+                        Provider.provider_name == provider_name
+                    ).update({'last_used': datetime.fromisoformat(last_used.decode('utf-8'))},
+                             synchronize_session=False)
+
+        db.session.commit()
+
+        return flushed_quotas
+
+    def _ensure_flusher_started(self):
+        if self._pid == os.getpid() and self._flusher_thread and self._flusher_thread.is_alive():
+            return
+
+        with self._lock:
+            # the flusher of a buffer used before a fork does not run in the child, pending usage would never be flushed
+            if self._pid == os.getpid() and self._flusher_thread and self._flusher_thread.is_alive():
+                return
+
+            self._flusher_thread = threading.Thread(target=self._run_flusher, kwargs={
+                'flask_app': current_app._get_current_object(),
+            }, daemon=True)
+            self._flusher_thread.start()
+            self._pid = os.getpid()
+
+    def _run_flusher(self, flask_app: Flask):
+        with flask_app.app_context():
+            interval = flask_app.config['PROVIDER_USAGE_FLUSH_INTERVAL']
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except Exception:
+                    logging.exception('Provider usage flusher failed')
+                finally:
+                    db.session.remove()
+
+    @staticmethod
+    def _pending_quota_key(provider_id: str) -> str:
+        return f'provider_quota_used_pending:{provider_id}'
+
+    @staticmethod
+    def _quota_key(provider_id: str) -> str:
+        return f'provider_quota:{provider_id}'
+
+    @staticmethod
+    def _last_used_key(tenant_id: str, provider_name: str) -> str:
+        return f'provider_last_used:{tenant_id}:{provider_name}'
+
+
+provider_usage_buffer = ProviderUsageBuffer()
@@ -9,6 +9,7 @@ from core.model_providers.error import QuotaExceededError, LLMBadRequestError
 from extensions.ext_database import db
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargsRules
 from core.model_providers.models.entity.provider import ProviderQuotaUnit
+from core.model_providers.provider_usage_buffer import provider_usage_buffer
 from core.model_providers.rules import provider_rules
 from models.provider import Provider, ProviderType, ProviderModel
 
@@ -204,6 +205,12 @@ class BaseModelProvider(BaseModel, ABC):
         if 'system' not in rules['support_provider_types']:
             return
 
+        if current_app.config['PROVIDER_USAGE_WRITE_BEHIND_ENABLED']:
+            if not provider_usage_buffer.is_quota_available(self.provider.id):
+                raise QuotaExceededError()
+
+            return
+
         provider = db.session.query(Provider).filter(
             db.and_(
                 Provider.id == self.provider.id,
@@ -240,6 +247,11 @@ class BaseModelProvider(BaseModel, ABC):
             quota_unit = rules['system_config']['quota_unit']
 
         used_quota = used_tokens if quota_unit == ProviderQuotaUnit.TOKENS.value else 1
+
+        if current_app.config['PROVIDER_USAGE_WRITE_BEHIND_ENABLED']:
+            provider_usage_buffer.add_quota_used(self.provider.id, used_quota)
+            return
+
         db.session.query(Provider).filter(
             Provider.tenant_id == self.provider.tenant_id,
             Provider.provider_name == self.provider.provider_name,
@@ -258,6 +270,10 @@ class BaseModelProvider(BaseModel, ABC):
 
         :return:
         """
+        if current_app.config['PROVIDER_USAGE_WRITE_BEHIND_ENABLED']:
+            provider_usage_buffer.set_last_used(self.provider.tenant_id, self.provider.provider_name)
+            return
+
         db.session.query(Provider).filter(
             Provider.tenant_id == self.provider.tenant_id,
             Provider.provider_name == self.provider.provider_name
@@ -1,3 +1,6 @@
+import re
+from functools import lru_cache
+
 from core.moderation.base import Moderation, ModerationInputsResult, ModerationOutputsResult, ModerationAction
 
 
@@ -30,8 +33,7 @@ class KeywordsModeration(Moderation):
 
             if query:
                 inputs['query__'] = query
-            keywords_list = self.config['keywords'].split('\n')
-            flagged = self._is_violated(inputs, keywords_list)
+            flagged = self._is_violated(inputs, self.config['keywords'])
 
         return ModerationInputsResult(flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response)
 
@@ -40,17 +42,21 @@ class KeywordsModeration(Moderation):
         preset_response = ""
 
         if self.config['outputs_config']['enabled']:
-            keywords_list = self.config['keywords'].split('\n')
-            flagged = self._is_violated({'text': text}, keywords_list)
+            flagged = self._is_violated({'text': text}, self.config['keywords'])
             preset_response = self.config['outputs_config']['preset_response']
 
         return ModerationOutputsResult(flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response)
 
-    def _is_violated(self, inputs: dict, keywords_list: list) -> bool:
+    def _is_violated(self, inputs: dict, keywords: str) -> bool:
+        keywords_pattern = _compile_keywords(keywords)
         return any(
-            self._check_keywords_in_value(keywords_list, value)
+            keywords_pattern.search(value.lower())
             for value in inputs.values()
         )
 
-    def _check_keywords_in_value(self, keywords_list, value):
-        return any(keyword.lower() in value.lower() for keyword in keywords_list)
+
+@lru_cache(maxsize=128)
+def _compile_keywords(keywords: str) -> re.Pattern:
+    """Compile the keywords, one per line, into a single pattern matching any of them case-insensitively."""
+    keywords_list = sorted({keyword.lower() for keyword in keywords.split('\n')}, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords_list))
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 REGEX = re.compile(r"\{\{([a-zA-Z_][a-zA-Z0-9_]{1,29}|#histories#|#query#|#context#)\}\}")
 
@@ -17,23 +18,43 @@ class PromptTemplateParser:
 
     def __init__(self, template: str):
         self.template = template
-        self.variable_keys = self.extract()
+        # literal texts at even and variable keys at odd positions, parsed once per template
+        self._parts = _split_template(template)
+        self.variable_keys = list(self._parts[1::2])
 
     def extract(self) -> list:
         # Regular expression to match the template rules
         return re.findall(REGEX, self.template)
 
     def format(self, inputs: dict, remove_template_variables: bool = True) -> str:
-        def replacer(match):
-            key = match.group(1)
-            value = inputs.get(key, match.group(0))  # return original matched string if key not found
+        parts = list(self._parts)
+        for i in range(1, len(parts), 2):
+            key = parts[i]
+            value = inputs.get(key, '{{' + key + '}}')  # return original matched string if key not found
 
             if remove_template_variables:
-                return PromptTemplateParser.remove_template_variables(value)
-            return value
+                value = PromptTemplateParser.remove_template_variables(value)
+            parts[i] = value
 
-        return re.sub(REGEX, replacer, self.template)
+        return ''.join(parts)
+
+    def format_partial(self, inputs: dict) -> str:
+        """Format the variables of inputs only, the other variables are kept for a later format."""
+        parts = list(self._parts)
+        for i in range(1, len(parts), 2):
+            key = parts[i]
+            if key in inputs:
+                parts[i] = PromptTemplateParser.remove_template_variables(inputs[key])
+            else:
+                parts[i] = '{{' + key + '}}'
+
+        return ''.join(parts)
 
     @classmethod
     def remove_template_variables(cls, text: str):
         return re.sub(REGEX, r'{\1}', text)
+
+
+@lru_cache(maxsize=1024)
+def _split_template(template: str) -> tuple:
+    return tuple(REGEX.split(template))
@@ -24,7 +24,34 @@ class AppMode(enum.Enum):
     CHAT = 'chat'
 
 
+def _load_prompt_rules() -> dict:
+    # Get the absolute path of the subdirectory
+    prompt_path = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        'generate_prompts')
+
+    prompt_rules = {}
+    for file_name in os.listdir(prompt_path):
+        if file_name.endswith('.json'):
+            with open(os.path.join(prompt_path, file_name), 'r') as json_file:
+                prompt_rules[file_name[:-len('.json')]] = json.load(json_file)
+
+    return prompt_rules
+
+
+# prompt rule files are read once, when the module is loaded
+PROMPT_RULES = _load_prompt_rules()
+
+SPECIAL_TOKEN_REGEX = re.compile(r'<\|.*?\|>')
+
+
 class PromptTransform:
+    def __init__(self):
+        # the prompt parts formatted before context and memory are added, built once per request
+        # for the token validation and reused by the final llm when the inputs and query are unchanged
+        self._pre_prompt_contents: dict[tuple, str] = {}
+        self._advanced_prompt_templates: dict[tuple, List[Tuple[Optional[str], PromptTemplateParser]]] = {}
+
     def get_prompt(self,
                    app_mode: str,
                    pre_prompt: str,
@@ -35,26 +62,29 @@ class PromptTransform:
                    memory: Optional[BaseChatMemory],
                    model_instance: BaseLLM) -> \
             Tuple[List[PromptMessage], Optional[List[str]]]:
-
         app_mode_enum = AppMode(app_mode)
         model_mode_enum = model_instance.model_mode
 
         prompt_rules = self._read_prompt_rules_from_file(self._prompt_file_name(app_mode, model_instance))
+        pre_prompt_content = self._get_pre_prompt_content(pre_prompt, inputs)
 
         if app_mode_enum == AppMode.CHAT and model_mode_enum == ModelMode.CHAT:
             stops = None
 
-            prompt_messages = self._get_simple_chat_app_chat_model_prompt_messages(prompt_rules, pre_prompt, inputs,
+            prompt_messages = self._get_simple_chat_app_chat_model_prompt_messages(prompt_rules, pre_prompt_content,
                                                                                    query, context, memory,
                                                                                    model_instance, files)
         else:
             stops = prompt_rules.get('stops')
             if stops is not None and len(stops) == 0:
                 stops = None
+            elif stops is not None:
+                # the rules are shared
+                stops = list(stops)
+
+            prompt_messages = self._get_simple_others_prompt_messages(prompt_rules, pre_prompt_content, query,
+                                                                      context, memory, model_instance, files)
 
-            prompt_messages = self._get_simple_others_prompt_messages(prompt_rules, pre_prompt, inputs, query, context,
-                                                                      memory,
-                                                                      model_instance, files)
         return prompt_messages, stops
 
     def get_advanced_prompt(self,
@@ -66,7 +96,6 @@ class PromptTransform:
                             context: Optional[str],
                             memory: Optional[BaseChatMemory],
                             model_instance: BaseLLM) -> List[PromptMessage]:
-
         model_mode = app_model_config.model_dict['mode']
 
         app_mode_enum = AppMode(app_mode)
@@ -92,6 +121,64 @@ class PromptTransform:
 
         return prompt_messages
 
+    def _get_pre_prompt_content(self, pre_prompt: str, inputs: dict) -> str:
+        """Format the pre prompt of a simple prompt, once per inputs."""
+        cache_key = (pre_prompt, json.dumps(inputs, sort_keys=True, default=str))
+        if cache_key in self._pre_prompt_contents:
+            return self._pre_prompt_contents[cache_key]
+
+        pre_prompt_content = ''
+        if pre_prompt:
+            prompt_template = PromptTemplateParser(template=pre_prompt)
+            prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
+            pre_prompt_content = prompt_template.format(
+                prompt_inputs
+            )
+
+        self._pre_prompt_contents[cache_key] = pre_prompt_content
+        return pre_prompt_content
+
+    def _get_advanced_prompt_templates(self, app_model_config: AppModelConfig, model_mode: ModelMode, inputs: dict,
+                                       query: Optional[str]) -> List[Tuple[Optional[str], PromptTemplateParser]]:
+        """
+        Format the prompts of an advanced prompt config with the inputs and query, once per config version,
+        inputs and query. The context and histories variables are kept, to be formatted per call.
+
+        :return: the role and template of each prompt, the role is None for a completion model prompt
+        """
+        cache_key = (self._get_config_version(app_model_config), model_mode,
+                     json.dumps(inputs, sort_keys=True, default=str), query)
+        if cache_key in self._advanced_prompt_templates:
+            return self._advanced_prompt_templates[cache_key]
+
+        if model_mode == ModelMode.COMPLETION:
+            raw_prompts = [(None, app_model_config.completion_prompt_config_dict['prompt']['text'])]
+        else:
+            raw_prompts = [(prompt_item['role'], prompt_item['text'])
+                           for prompt_item in app_model_config.chat_prompt_config_dict['prompt']]
+
+        prompt_templates = []
+        for role, raw_prompt in raw_prompts:
+            prompt_template = PromptTemplateParser(template=raw_prompt)
+            prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
+            if query is not None:
+                self._set_query_variable(query, prompt_template, prompt_inputs)
+
+            prompt_templates.append((role, PromptTemplateParser(
+                template=prompt_template.format_partial(prompt_inputs)
+            )))
+
+        self._advanced_prompt_templates[cache_key] = prompt_templates
+        return prompt_templates
+
+    @staticmethod
+    def _get_config_version(app_model_config: AppModelConfig) -> tuple:
+        if app_model_config.id:
+            return app_model_config.id, app_model_config.updated_at
+
+        # a config overridden for a debug run is not saved
+        return app_model_config.chat_prompt_config, app_model_config.completion_prompt_config
+
     def _get_history_messages_from_memory(self, memory: BaseChatMemory,
                                           max_token_limit: int) -> str:
         """Get memory messages."""
@@ -126,17 +213,9 @@ class PromptTransform:
         return 'baichuan_completion' if mode == 'completion' else 'baichuan_chat'
 
     def _read_prompt_rules_from_file(self, prompt_name: str) -> dict:
-        # Get the absolute path of the subdirectory
-        prompt_path = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)),
-            'generate_prompts')
+        return PROMPT_RULES[prompt_name]
 
-        json_file_path = os.path.join(prompt_path, f'{prompt_name}.json')
-        # Open the JSON file and read its content
-        with open(json_file_path, 'r') as json_file:
-            return json.load(json_file)
-
-    def _get_simple_chat_app_chat_model_prompt_messages(self, prompt_rules: dict, pre_prompt: str, inputs: dict,
+    def _get_simple_chat_app_chat_model_prompt_messages(self, prompt_rules: dict, pre_prompt_content: str,
                                                         query: str,
                                                         context: Optional[str],
                                                         memory: Optional[BaseChatMemory],
@@ -149,14 +228,6 @@ class PromptTransform:
                 {'context': context}
             )
 
-        pre_prompt_content = ''
-        if pre_prompt:
-            prompt_template = PromptTemplateParser(template=pre_prompt)
-            prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
-            pre_prompt_content = prompt_template.format(
-                prompt_inputs
-            )
-
         prompt = ''
         for order in prompt_rules['system_prompt_orders']:
             if order == 'context_prompt':
@@ -164,7 +235,7 @@ class PromptTransform:
             elif order == 'pre_prompt':
                 prompt += pre_prompt_content
 
-        prompt = re.sub(r'<\|.*?\|>', '', prompt)
+        prompt = SPECIAL_TOKEN_REGEX.sub('', prompt)
 
         prompt_messages = [PromptMessage(type=MessageType.SYSTEM, content=prompt)]
         self._append_chat_histories(memory, prompt_messages, model_instance)
@@ -173,7 +244,7 @@ class PromptTransform:
 
         return prompt_messages
 
-    def _get_simple_others_prompt_messages(self, prompt_rules: dict, pre_prompt: str, inputs: dict,
+    def _get_simple_others_prompt_messages(self, prompt_rules: dict, pre_prompt_content: str,
                                            query: str,
                                            context: Optional[str],
                                            memory: Optional[BaseChatMemory],
@@ -186,14 +257,6 @@ class PromptTransform:
                 {'context': context}
             )
 
-        pre_prompt_content = ''
-        if pre_prompt:
-            prompt_template = PromptTemplateParser(template=pre_prompt)
-            prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
-            pre_prompt_content = prompt_template.format(
-                prompt_inputs
-            )
-
         prompt = ''
         for order in prompt_rules['system_prompt_orders']:
             if order == 'context_prompt':
@@ -235,7 +298,7 @@ class PromptTransform:
 
         prompt += query_prompt_content
 
-        prompt = re.sub(r'<\|.*?\|>', '', prompt)
+        prompt = SPECIAL_TOKEN_REGEX.sub('', prompt)
 
         return [PromptMessage(content=prompt, files=files)]
 
@@ -292,7 +355,7 @@ class PromptTransform:
             prompt_inputs
         )
 
-        prompt = re.sub(r'<\|.*?\|>', '', prompt)
+        prompt = SPECIAL_TOKEN_REGEX.sub('', prompt)
         return prompt
 
     def _get_chat_app_completion_model_prompt_messages(self,
@@ -304,18 +367,16 @@ class PromptTransform:
                                                        memory: Optional[BaseChatMemory],
                                                        model_instance: BaseLLM) -> List[PromptMessage]:
 
-        raw_prompt = app_model_config.completion_prompt_config_dict['prompt']['text']
         conversation_histories_role = app_model_config.completion_prompt_config_dict['conversation_histories_role']
 
-        prompt_template = PromptTemplateParser(template=raw_prompt)
-        prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
+        _, prompt_template = self._get_advanced_prompt_templates(app_model_config, ModelMode.COMPLETION, inputs,
+                                                                 query)[0]
+        prompt_inputs = {}
 
         self._set_context_variable(context, prompt_template, prompt_inputs)
 
-        self._set_query_variable(query, prompt_template, prompt_inputs)
-
-        self._set_histories_variable(memory, raw_prompt, conversation_histories_role, prompt_template, prompt_inputs,
-                                     model_instance)
+        self._set_histories_variable(memory, prompt_template.template, conversation_histories_role, prompt_template,
+                                     prompt_inputs, model_instance)
 
         prompt = self._format_prompt(prompt_template, prompt_inputs)
 
@@ -329,21 +390,17 @@ class PromptTransform:
                                                  context: Optional[str],
                                                  memory: Optional[BaseChatMemory],
                                                  model_instance: BaseLLM) -> List[PromptMessage]:
-        raw_prompt_list = app_model_config.chat_prompt_config_dict['prompt']
-
         prompt_messages = []
 
-        for prompt_item in raw_prompt_list:
-            raw_prompt = prompt_item['text']
-
-            prompt_template = PromptTemplateParser(template=raw_prompt)
-            prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
+        for role, prompt_template in self._get_advanced_prompt_templates(app_model_config, ModelMode.CHAT, inputs,
+                                                                         None):
+            prompt_inputs = {}
 
             self._set_context_variable(context, prompt_template, prompt_inputs)
 
             prompt = self._format_prompt(prompt_template, prompt_inputs)
 
-            prompt_messages.append(PromptMessage(type=MessageType(prompt_item['role']), content=prompt))
+            prompt_messages.append(PromptMessage(type=MessageType(role), content=prompt))
 
         self._append_chat_histories(memory, prompt_messages, model_instance)
 
@@ -356,10 +413,9 @@ class PromptTransform:
                                                              inputs: dict,
                                                              files: List[PromptMessageFile],
                                                              context: Optional[str]) -> List[PromptMessage]:
-        raw_prompt = app_model_config.completion_prompt_config_dict['prompt']['text']
-
-        prompt_template = PromptTemplateParser(template=raw_prompt)
-        prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
+        _, prompt_template = self._get_advanced_prompt_templates(app_model_config, ModelMode.COMPLETION, inputs,
+                                                                 None)[0]
+        prompt_inputs = {}
 
         self._set_context_variable(context, prompt_template, prompt_inputs)
 
@@ -376,21 +432,17 @@ class PromptTransform:
                                                        inputs: dict,
                                                        files: List[PromptMessageFile],
                                                        context: Optional[str]) -> List[PromptMessage]:
-        raw_prompt_list = app_model_config.chat_prompt_config_dict['prompt']
-
         prompt_messages = []
 
-        for prompt_item in raw_prompt_list:
-            raw_prompt = prompt_item['text']
-
-            prompt_template = PromptTemplateParser(template=raw_prompt)
-            prompt_inputs = {k: inputs[k] for k in prompt_template.variable_keys if k in inputs}
+        for role, prompt_template in self._get_advanced_prompt_templates(app_model_config, ModelMode.CHAT, inputs,
+                                                                         None):
+            prompt_inputs = {}
 
             self._set_context_variable(context, prompt_template, prompt_inputs)
 
             prompt = self._format_prompt(prompt_template, prompt_inputs)
 
-            prompt_messages.append(PromptMessage(type=MessageType(prompt_item['role']), content=prompt))
+            prompt_messages.append(PromptMessage(type=MessageType(role), content=prompt))
 
         for prompt_message in prompt_messages[::-1]:
             if prompt_message.type == MessageType.USER:
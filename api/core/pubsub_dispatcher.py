@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, Callable, Generator
+
+from extensions.ext_redis import redis_client
+
+# close the subscription of a generation that is not done after this many seconds
+SUBSCRIPTION_TIMEOUT = 600
+
+# seconds between the pings sent to the subscribers to keep the response stream alive
+SUBSCRIPTION_PING_INTERVAL = 10
+
+# seconds the listener waits for a message before applying the queued subscribe and unsubscribe commands,
+# the latency of a subscribe
+LISTENER_POLL_INTERVAL = 0.05
+
+# seconds a subscribe waits for the listener to apply it
+SUBSCRIBE_TIMEOUT = 10
+
+
+class Subscription:
+    """Messages of a single channel, fed by the shared dispatcher of the process."""
+
+    _CLOSED = object()
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.created_at = time.monotonic()
+        self.last_ping_at = self.created_at
+        self.future: Optional[Future] = None
+        self.on_timeout: Optional[Callable[[], None]] = None
+        self._queue = queue.Queue()
+        self._closed = False
+
+    def watch(self, future: Future, on_timeout: Callable[[], None]):
+        """Close the subscription and call on_timeout if the task is not done after the timeout."""
+        self.future = future
+        self.on_timeout = on_timeout
+
+    def put(self, message: dict):
+        self._queue.put(message)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(self._CLOSED)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def listen(self) -> Generator[dict, None, None]:
+        """Yield pubsub messages in the same shape as `redis.client.PubSub.listen`."""
+        while True:
+            message = self._queue.get()
+            if message is self._CLOSED:
+                break
+
+            yield message
+
+
+class PubSubDispatcher:
+    """
+    A single redis pubsub connection and listener thread per process,
+    routing messages to the subscriptions of the in-flight generations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._pubsub = None
+        self._listener_thread = None
+        self._subscriptions: dict[str, Subscription] = {}
+        # redis-py PubSub is not thread-safe, its connection is only used by the listener thread
+        self._commands: Optional[queue.Queue] = None
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel)
+        with self._lock:
+            self._ensure_started()
+            self._subscriptions[channel] = subscription
+            subscribed = self._queue_command('subscribe', channel)
+
+        try:
+            subscribed.result(timeout=SUBSCRIBE_TIMEOUT)
+        except Exception:
+            self.unsubscribe(subscription)
+            raise
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if self._subscriptions.get(subscription.channel) is not subscription:
+                return
+
+            del self._subscriptions[subscription.channel]
+            if self._pid == os.getpid():
+                self._queue_command('unsubscribe', subscription.channel)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'subscriptions': len(self._subscriptions),
+                'listener_alive': self._listener_thread is not None and self._listener_thread.is_alive()
+            }
+
+    def _ensure_started(self):
+        # after a fork the listener thread is gone and the socket still belongs to the parent, reconnect
+        if self._pid == os.getpid() and self._listener_thread and self._listener_thread.is_alive():
+            return
+
+        if self._pid != os.getpid():
+            self._subscriptions = {}
+            self._pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            self._commands = queue.Queue()
+            self._pid = os.getpid()
+
+        self._listener_thread = threading.Thread(target=self._listen, daemon=True)
+        self._listener_thread.start()
+
+    def _queue_command(self, method: str, channel: str) -> Future:
+        future = Future()
+        self._commands.put((method, channel, future))
+        return future
+
+    def _apply_commands(self):
+        while True:
+            try:
+                method, channel, future = self._commands.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                getattr(self._pubsub, method)(channel)
+                future.set_result(None)
+            except Exception as e:
+                logging.exception(f'Failed to {method} channel {channel}')
+                future.set_exception(e)
+
+    def _listen(self):
+        while True:
+            self._apply_commands()
+
+            try:
+                message = self._pubsub.get_message(timeout=LISTENER_POLL_INTERVAL)
+                if message and message['type'] == 'message':
+                    channel = message['channel'].decode('utf-8')
+                    with self._lock:
+                        subscription = self._subscriptions.get(channel)
+
+                    if subscription:
+                        subscription.put(message)
+            except Exception:
+                logging.exception('PubSub dispatcher failed to get message')
+                time.sleep(1)
+
+            try:
+                self._check_subscriptions()
+            except Exception:
+                logging.exception('PubSub dispatcher failed to check subscriptions')
+
+    def _check_subscriptions(self):
+        now = time.monotonic()
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+
+        for subscription in subscriptions:
+            if subscription.closed:
+                continue
+
+            if subscription.future and subscription.future.done():
+                continue
+
+            if now - subscription.created_at >= SUBSCRIPTION_TIMEOUT:
+                if subscription.on_timeout:
+                    subscription.on_timeout()
+                subscription.close()
+                self.unsubscribe(subscription)
+            elif now - subscription.last_ping_at >= SUBSCRIPTION_PING_INTERVAL:
+                subscription.last_ping_at = now
+                subscription.put({
+                    'type': 'message',
+                    'channel': subscription.channel.encode('utf-8'),
+                    'data': json.dumps({'event': 'ping'}).encode('utf-8')
+                })
+
+
+pubsub_dispatcher = PubSubDispatcher()
@@ -0,0 +1,172 @@
+import hashlib
+import threading
+from typing import Optional, List, Callable
+
+from cachetools import LRUCache
+from flask import current_app, has_app_context
+
+from core.model_providers.models.entity.message import PromptMessage
+
+# encoder key of the GPT-2 tokenizer, the default of the models without a tokenizer of their own
+DEFAULT_ENCODER = 'gpt2'
+
+
+class TokenizerService:
+    """
+    Count tokens for the indexing and prompt hot paths.
+
+    Encoders are loaded once per model, counts are memoized by text hash in a bounded LRU
+    and texts missing from it are tokenized with one native batch encode.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encoders = {}
+        self._counts: Optional[LRUCache] = None
+        self._stats = {
+            'hits': 0,
+            'misses': 0
+        }
+
+    def count(self, text: str, model_name: Optional[str] = None) -> int:
+        """
+        Count the tokens of text with the tiktoken encoding of model_name, or the GPT-2 tokenizer.
+
+        :param text:
+        :param model_name: an OpenAI model name
+        :return:
+        """
+        return self.count_many([text], model_name)[0]
+
+    def count_many(self, texts: List[str], model_name: Optional[str] = None) -> List[int]:
+        """
+        Count the tokens of each text, the uncached ones are tokenized in one batch.
+
+        :param texts:
+        :param model_name: an OpenAI model name
+        :return:
+        """
+        encoder_key = model_name or DEFAULT_ENCODER
+        keys = [(encoder_key, self._hash(text)) if text else None for text in texts]
+
+        counts = [0] * len(texts)
+        missing = {}
+        with self._lock:
+            cache = self._get_cache()
+            for i, key in enumerate(keys):
+                if key is None:
+                    continue
+
+                count = cache.get(key)
+                if count is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    counts[i] = count
+                    self._stats['hits'] += 1
+
+            self._stats['misses'] += len(missing)
+
+        if missing:
+            encode_batch = self._get_encoder(encoder_key)
+            missing_indexes = list(missing.values())
+            missing_counts = encode_batch([texts[indexes[0]] for indexes in missing_indexes])
+
+            with self._lock:
+                cache = self._get_cache()
+                for key, indexes, count in zip(missing, missing_indexes, missing_counts):
+                    cache[key] = count
+                    for i in indexes:
+                        counts[i] = count
+
+        return counts
+
+    def count_messages(self, model_key: str, messages: List[PromptMessage],
+                       counter: Callable[[List[PromptMessage]], int]) -> int:
+        """
+        Memoize the token count of prompt messages computed by counter, the model's own message counting.
+
+        :param model_key: identify the model, e.g. its provider and name
+        :param messages:
+        :param counter:
+        :return:
+        """
+        # file contents are not part of the key, and the cache is sized by the app config
+        if any(message.files for message in messages) or not has_app_context():
+            return counter(messages)
+
+        hash_ = hashlib.blake2b(digest_size=16)
+        for message in messages:
+            hash_.update(message.type.value.encode('utf-8'))
+            hash_.update(b'\0')
+            hash_.update(message.content.encode('utf-8'))
+            hash_.update(b'\0')
+
+        key = ('messages', model_key, hash_.digest())
+        with self._lock:
+            count = self._get_cache().get(key)
+            if count is not None:
+                self._stats['hits'] += 1
+                return count
+
+            self._stats['misses'] += 1
+
+        count = counter(messages)
+        with self._lock:
+            self._get_cache()[key] = count
+
+        return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = self._counts
+            return {
+                **self._stats,
+                'encoders': list(self._encoders.keys()),
+                'size': counts.currsize if counts is not None else 0,
+                'max_size': counts.maxsize if counts is not None else 0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._counts = None
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def _get_encoder(self, encoder_key: str) -> Callable[[List[str]], List[int]]:
+        with self._lock:
+            encoder = self._encoders.get(encoder_key)
+
+        if encoder is None:
+            encoder = self._load_encoder(encoder_key)
+            with self._lock:
+                encoder = self._encoders.setdefault(encoder_key, encoder)
+
+        return encoder
+
+    @staticmethod
+    def _load_encoder(encoder_key: str) -> Callable[[List[str]], List[int]]:
+        """Load the encoder as a function counting the tokens of a batch of texts."""
+        if encoder_key == DEFAULT_ENCODER:
+            from transformers import GPT2TokenizerFast
+
+            tokenizer = GPT2TokenizerFast.from_pretrained('gpt2')
+            return lambda texts: [len(token_ids) for token_ids in tokenizer(texts, verbose=False)['input_ids']]
+
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(encoder_key)
+        return lambda texts: [len(token_ids) for token_ids in encoding.encode_batch(texts)]
+
+    def _get_cache(self) -> LRUCache:
+        # TOKENIZER_CACHE_SIZE is read on the first count, the module instance is created before the app
+        if self._counts is None:
+            self._counts = LRUCache(maxsize=current_app.config['TOKENIZER_CACHE_SIZE'])
+
+        return self._counts
+
+    @staticmethod
+    def _hash(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+tokenizer_service = TokenizerService()
@@ -49,6 +49,10 @@ class BaseToolProvider(ABC):
     def encrypt_token(self, token) -> str:
         tenant = db.session.query(Tenant).filter(Tenant.id == self.tenant_id).first()
         encrypted_token = rsa.encrypt(token, tenant.encrypt_public_key)
+
+        # the credentials of the tenant are being updated
+        rsa.clear_decrypt_cache(self.tenant_id)
+
         return base64.b64encode(encrypted_token).decode()
 
     def decrypt_token(self, token: str, obfuscated: bool = False) -> str:
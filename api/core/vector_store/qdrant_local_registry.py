@@ -0,0 +1,200 @@
+import functools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+import portalocker
+from qdrant_client import QdrantClient
+from qdrant_client.local.qdrant_local import QdrantLocal
+
+# file of a local storage folder holding its write generation, locked by every operation on the folder
+GENERATION_FILENAME = '.generation'
+
+READ_METHODS = [
+    'search_batch', 'search', 'search_groups', 'recommend_batch', 'recommend', 'recommend_groups', 'scroll',
+    'count', 'retrieve', 'get_collection_aliases', 'get_aliases', 'get_collections', 'get_collection'
+]
+
+WRITE_METHODS = [
+    'upsert', 'update_vectors', 'delete_vectors', 'delete', 'set_payload', 'overwrite_payload', 'delete_payload',
+    'clear_payload', 'batch_update_points', 'update_collection_aliases', 'update_collection', 'delete_collection',
+    'create_collection', 'recreate_collection', 'upload_records', 'upload_collection', 'create_payload_index',
+    'delete_payload_index'
+]
+
+
+class SharedQdrantLocal(QdrantLocal):
+    """
+    Local Qdrant storage kept loaded across operations and shared by the processes using its folder.
+
+    Every operation holds a file lock of the folder, shared for reads and exclusive for writes. Writes
+    increment the generation of the folder and the collections are reloaded from disk only when another
+    process has written since the last load.
+    """
+
+    def __init__(self, location: str):
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._generation = 0
+        self._reloads = 0
+
+        os.makedirs(location, exist_ok=True)
+        self._generation_file = open(os.path.join(location, GENERATION_FILENAME), 'a+')
+
+        portalocker.lock(self._generation_file, portalocker.LockFlags.EXCLUSIVE)
+        try:
+            super().__init__(location)
+            self._generation = self._read_generation()
+        finally:
+            portalocker.unlock(self._generation_file)
+
+    def close(self, **kwargs):
+        with self._lock:
+            super().close(**kwargs)
+            self._generation_file.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'generation': self._generation,
+                'reloads': self._reloads,
+                'collections': len(self.collections)
+            }
+
+    def _load(self) -> None:
+        super()._load()
+
+        # the storage lock of QdrantLocal is held for the life of the client,
+        # processes sharing the folder are coordinated by the generation file lock instead
+        if self._flock_file is not None:
+            portalocker.unlock(self._flock_file)
+
+        self._share_connections()
+
+    def _share_connections(self):
+        # the sqlite connections of collections are used by all threads,
+        # their operations are serialized by self._lock
+        for collection in self.collections.values():
+            storage = collection.storage
+            if storage is not None and not getattr(storage, 'shared', False):
+                storage.storage.close()
+                storage.storage = sqlite3.connect(str(storage.location), check_same_thread=False)
+                storage.shared = True
+
+    def _reload(self):
+        for collection in self.collections.values():
+            collection.close()
+
+        self.collections = {}
+        self.aliases = {}
+        self._load()
+        self._reloads += 1
+
+    @contextmanager
+    def _access(self, write: bool):
+        with self._lock:
+            # nested in an operation of this thread, e.g. recreate_collection
+            if self._depth > 0:
+                yield
+                return
+
+            self._depth += 1
+            portalocker.lock(
+                self._generation_file,
+                portalocker.LockFlags.EXCLUSIVE if write else portalocker.LockFlags.SHARED
+            )
+            try:
+                generation = self._read_generation()
+                if generation != self._generation:
+                    if not write:
+                        # reloading opens the storage lock of QdrantLocal, which only one process may hold
+                        portalocker.lock(self._generation_file, portalocker.LockFlags.EXCLUSIVE)
+                        generation = self._read_generation()
+
+                    self._reload()
+                    self._generation = generation
+
+                try:
+                    yield
+                finally:
+                    if write:
+                        # e.g. created collections
+                        self._share_connections()
+                        self._generation = generation + 1
+                        self._write_generation(self._generation)
+            finally:
+                portalocker.unlock(self._generation_file)
+                self._depth -= 1
+
+    def _read_generation(self) -> int:
+        self._generation_file.seek(0)
+        content = self._generation_file.read()
+        return int(content) if content else 0
+
+    def _write_generation(self, generation: int):
+        self._generation_file.seek(0)
+        self._generation_file.truncate()
+        self._generation_file.write(str(generation))
+        self._generation_file.flush()
+
+
+def _coordinated(method, write: bool):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._access(write):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+for _name in READ_METHODS:
+    setattr(SharedQdrantLocal, _name, _coordinated(getattr(QdrantLocal, _name), write=False))
+
+for _name in WRITE_METHODS:
+    setattr(SharedQdrantLocal, _name, _coordinated(getattr(QdrantLocal, _name), write=True))
+
+
+class QdrantLocalRegistry:
+    """
+    Process-wide registry of the clients of local Qdrant storage folders, one kept open per path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._clients: dict[str, QdrantClient] = {}
+
+    def get_client(self, path: str) -> QdrantClient:
+        path = os.path.abspath(path)
+        with self._lock:
+            # sqlite connections opened by the parent are not safe to use across a fork, reopen the folders
+            if self._pid != os.getpid():
+                self._clients = {}
+                self._pid = os.getpid()
+
+            client = self._clients.get(path)
+            if client is None:
+                client = QdrantClient(location=':memory:')
+                client._client = SharedQdrantLocal(path)
+                self._clients[path] = client
+
+            return client
+
+    def stats(self) -> dict:
+        with self._lock:
+            clients = dict(self._clients) if self._pid == os.getpid() else {}
+
+        return {path: client._client.stats() for path, client in clients.items()}
+
+    def clear(self):
+        with self._lock:
+            clients = self._clients if self._pid == os.getpid() else {}
+            self._clients = {}
+
+        for client in clients.values():
+            client.close()
+
+
+qdrant_local_registry = QdrantLocalRegistry()
@@ -1,8 +1,7 @@
-from typing import cast, Any
+from typing import Any, List, Dict
 
 from langchain.schema import Document
-from qdrant_client.http.models import Filter, PointIdsList, FilterSelector
-from qdrant_client.local.qdrant_local import QdrantLocal
+from qdrant_client.http.models import Filter, PointIdsList, FilterSelector, FieldCondition, MatchAny
 
 from core.vector_store.vector.qdrant import Qdrant
 
@@ -12,8 +11,6 @@ class QdrantVectorStore(Qdrant):
         if not filter:
             raise ValueError('filter must not be empty')
 
-        self._reload_if_needed()
-
         self.client.delete(
             collection_name=self.collection_name,
             points_selector=FilterSelector(
@@ -22,8 +19,6 @@ class QdrantVectorStore(Qdrant):
         )
 
     def del_text(self, uuid: str) -> None:
-        self._reload_if_needed()
-
         self.client.delete(
             collection_name=self.collection_name,
             points_selector=PointIdsList(
@@ -32,8 +27,6 @@ class QdrantVectorStore(Qdrant):
         )
 
     def text_exists(self, uuid: str) -> bool:
-        self._reload_if_needed()
-
         response = self.client.retrieve(
             collection_name=self.collection_name,
             ids=[uuid]
@@ -41,16 +34,42 @@ class QdrantVectorStore(Qdrant):
 
         return len(response) > 0
 
-    def delete(self):
-        self._reload_if_needed()
+    def get_vectors(self, doc_ids: List[str]) -> Dict[str, List[float]]:
+        """Fetch the stored vectors of doc ids, searches do not return them."""
+        if not doc_ids:
+            return {}
 
+        points, _ = self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=Filter(
+                must=[
+                    FieldCondition(
+                        key=f'{self.metadata_payload_key}.doc_id',
+                        match=MatchAny(any=doc_ids),
+                    ),
+                ],
+            ),
+            limit=len(doc_ids),
+            with_payload=[self.metadata_payload_key],
+            with_vectors=True if self.vector_name is None else [self.vector_name]
+        )
+
+        return {
+            (point.payload.get(self.metadata_payload_key) or {}).get('doc_id'):
+                point.vector if self.vector_name is None else point.vector[self.vector_name]
+            for point in points
+        }
+
+    def delete(self):
         self.client.delete_collection(collection_name=self.collection_name)
 
     def delete_group(self):
-        self._reload_if_needed()
-
         self.client.delete_collection(collection_name=self.collection_name)
 
+    def _payload_keys(self) -> List[str]:
+        # doc_id is a top level key of the collections of origin datasets
+        return super()._payload_keys() + ['doc_id']
+
     @classmethod
     def _document_from_scored_point(
             cls,
@@ -69,8 +88,3 @@ class QdrantVectorStore(Qdrant):
             metadata=scored_point.payload.get(metadata_payload_key) or {},
         )
 
-    def _reload_if_needed(self):
-        if isinstance(self.client, QdrantLocal):
-            self.client = cast(QdrantLocal, self.client)
-            self.client._load()
-
@@ -174,6 +174,14 @@ class Milvus(VectorStore):
         """Create the connection to the Milvus server."""
         from pymilvus import MilvusException, connections
 
+        # A connection opened by the caller, e.g. a pooled one
+        alias = connection_args.get("alias", None)
+        if alias is not None and connections.has_connection(alias):
+            return alias
+        connection_args = {
+            key: value for key, value in connection_args.items() if key != "alias"
+        }
+
         # Grab the connection arguments that are used for checking existing connection
         host: str = connection_args.get("host", None)
         port: Union[str, int] = connection_args.get("port", None)
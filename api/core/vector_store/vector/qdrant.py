@@ -5,6 +5,8 @@ import asyncio
 import functools
 import uuid
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from itertools import islice
 from operator import itemgetter
 from typing import (
@@ -165,6 +167,7 @@ class Qdrant(VectorStore):
         metadatas: Optional[List[dict]] = None,
         ids: Optional[Sequence[str]] = None,
         batch_size: int = 64,
+        parallel: int = 1,
         **kwargs: Any,
     ) -> List[str]:
         """Run more texts through the embeddings and add to the vectorstore.
@@ -178,6 +181,10 @@ class Qdrant(VectorStore):
             batch_size:
                 How many vectors upload per-request.
                 Default: 64
+            parallel:
+                How many upload requests run concurrently, the embeddings of the
+                next batch are computed meanwhile.
+                Default: 1
             group_id:
                 collection group
 
@@ -185,13 +192,20 @@ class Qdrant(VectorStore):
             List of ids from adding the texts into the vectorstore.
         """
         added_ids = []
-        for batch_ids, points in self._generate_rest_batches(
-            texts, metadatas, ids, batch_size
-        ):
-            self.client.upsert(
-                collection_name=self.collection_name, points=points
-            )
-            added_ids.extend(batch_ids)
+        batches = self._generate_rest_batches(texts, metadatas, ids, batch_size)
+        if parallel > 1:
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                futures = deque()
+                for batch_ids, points in batches:
+                    if len(futures) >= parallel:
+                        added_ids.extend(futures.popleft().result())
+                    futures.append(executor.submit(self._upsert_points, batch_ids, points))
+
+                while futures:
+                    added_ids.extend(futures.popleft().result())
+        else:
+            for batch_ids, points in batches:
+                added_ids.extend(self._upsert_points(batch_ids, points))
         # if is new collection, create payload index on group_id
         if self.is_new_collection:
             # create payload index
@@ -210,6 +224,12 @@ class Qdrant(VectorStore):
                                              field_schema=text_index_params)
         return added_ids
 
+    def _upsert_points(self, batch_ids: List[str], points: List[rest.PointStruct]) -> List[str]:
+        self.client.upsert(
+            collection_name=self.collection_name, points=points
+        )
+        return batch_ids
+
     @sync_call_fallback
     async def aadd_texts(
         self,
@@ -610,8 +630,8 @@ class Qdrant(VectorStore):
             search_params=search_params,
             limit=k,
             offset=offset,
-            with_payload=True,
-            with_vectors=True,
+            with_payload=self._payload_keys(),
+            with_vectors=False,
             score_threshold=score_threshold,
             consistency=consistency,
             **kwargs,
@@ -645,9 +665,8 @@ class Qdrant(VectorStore):
             collection_name=self.collection_name,
             scroll_filter=filter,
             limit=k,
-            with_payload=True,
-            with_vectors=True
-
+            with_payload=self._payload_keys(),
+            with_vectors=False
         )
         results = response[0]
         return [
@@ -1151,6 +1170,8 @@ class Qdrant(VectorStore):
                 embeddings = OpenAIEmbeddings()
                 qdrant = Qdrant.from_texts(texts, embeddings, "localhost")
         """
+        # not a client argument
+        parallel = kwargs.pop("parallel", 1)
         qdrant = cls._construct_instance(
             texts,
             embedding,
@@ -1186,7 +1207,7 @@ class Qdrant(VectorStore):
             force_recreate,
             **kwargs,
         )
-        qdrant.add_texts(texts, metadatas, ids, batch_size)
+        qdrant.add_texts(texts, metadatas, ids, batch_size, parallel=parallel)
         return qdrant
 
     @classmethod
@@ -1419,20 +1440,23 @@ class Qdrant(VectorStore):
         collection_name = collection_name or uuid.uuid4().hex
         distance_func = distance_func.upper()
         is_new_collection = False
-        client = qdrant_client.QdrantClient(
-            location=location,
-            url=url,
-            port=port,
-            grpc_port=grpc_port,
-            prefer_grpc=prefer_grpc,
-            https=https,
-            api_key=api_key,
-            prefix=prefix,
-            timeout=timeout,
-            host=host,
-            path=path,
-            **kwargs,
-        )
+        # a client given by the caller, e.g. a pooled one, is used instead of a new one
+        client = kwargs.pop("client", None)
+        if client is None:
+            client = qdrant_client.QdrantClient(
+                location=location,
+                url=url,
+                port=port,
+                grpc_port=grpc_port,
+                prefer_grpc=prefer_grpc,
+                https=https,
+                api_key=api_key,
+                prefix=prefix,
+                timeout=timeout,
+                host=host,
+                path=path,
+                **kwargs,
+            )
         collections_response = client.get_collections()
         collection_list = collections_response.collections
         all_collection_name = [collection.name for collection in collection_list]
@@ -1608,6 +1632,10 @@ class Qdrant(VectorStore):
 
         return payloads
 
+    def _payload_keys(self) -> List[str]:
+        """Payload keys read by _document_from_scored_point."""
+        return [self.content_payload_key, self.metadata_payload_key]
+
     @classmethod
     def _document_from_scored_point(
         cls,
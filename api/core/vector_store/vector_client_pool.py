@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+from flask import current_app
+
+
+class PooledClient:
+    def __init__(self, kind: str, client: Any,
+                 health_check: Optional[Callable[[Any], bool]], close: Optional[Callable[[Any], None]]):
+        self.kind = kind
+        self.client = client
+        self.health_check = health_check
+        self.close = close
+        self.released_at = time.monotonic()
+
+
+class VectorClientPool:
+    """
+    Per-process pool of vector database clients keyed by their endpoint config.
+
+    A client is leased to one owner, e.g. a vector index, and returns to the pool when the owner is
+    garbage collected. Clients idle for longer than a health check interval are checked before reuse,
+    clients idle for longer than VECTOR_CLIENT_POOL_IDLE_TIMEOUT are closed and clients inherited
+    from the parent of a forked worker are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._idle: dict[tuple, list[PooledClient]] = defaultdict(list)
+        self._leased = defaultdict(int)
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'health_check_failures': 0,
+            'evicted': 0
+        }
+
+    def acquire(self, owner: Any, kind: str, config_key: tuple, factory: Callable[[], Any],
+                health_check: Optional[Callable[[Any], bool]] = None,
+                close: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Lease a client of the endpoint to owner until it is garbage collected.
+
+        :param owner: holder of the client, must not be referenced by the callables
+        :param kind: vector database type, e.g. qdrant
+        :param config_key: endpoint config the clients are interchangeable for
+        :param factory: create a client
+        :param health_check: return whether an idle client is still usable
+        :param close: close an evicted client
+        :return:
+        """
+        key = (kind, config_key)
+        health_check_interval = current_app.config['VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL']
+
+        with self._lock:
+            self._check_pid()
+            evicted = self._pop_expired(current_app.config['VECTOR_CLIENT_POOL_IDLE_TIMEOUT'])
+
+        for pooled_client in evicted:
+            self._close(pooled_client)
+
+        pooled_client = None
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                candidate = idle.pop() if idle else None
+
+            if candidate is None:
+                break
+
+            if candidate.health_check and time.monotonic() - candidate.released_at > health_check_interval \
+                    and not self._is_healthy(candidate):
+                with self._lock:
+                    self._stats['health_check_failures'] += 1
+                self._close(candidate)
+                continue
+
+            pooled_client = candidate
+            break
+
+        reused = pooled_client is not None
+        if not reused:
+            pooled_client = PooledClient(kind, factory(), health_check, close)
+
+        with self._lock:
+            self._stats['reused' if reused else 'created'] += 1
+            self._leased[kind] += 1
+
+        finalizer = weakref.finalize(owner, self._release, key, pooled_client, os.getpid())
+        finalizer.atexit = False
+
+        return pooled_client.client
+
+    def stats(self) -> dict:
+        with self._lock:
+            kinds = defaultdict(lambda: {'idle': 0, 'leased': 0})
+            for (kind, _), idle in self._idle.items():
+                kinds[kind]['idle'] += len(idle)
+            for kind, leased in self._leased.items():
+                kinds[kind]['leased'] = leased
+
+            return {
+                **self._stats,
+                'clients': dict(kinds)
+            }
+
+    def clear(self):
+        with self._lock:
+            idle = [pooled_client for pooled_clients in self._idle.values() for pooled_client in pooled_clients]
+            self._idle = defaultdict(list)
+
+        for pooled_client in idle:
+            self._close(pooled_client)
+
+    def _release(self, key: tuple, pooled_client: PooledClient, pid: int):
+        with self._lock:
+            # leased before a fork, the client belongs to the parent
+            if pid != os.getpid() or pid != self._pid:
+                return
+
+            self._leased[pooled_client.kind] -= 1
+            pooled_client.released_at = time.monotonic()
+            self._idle[key].append(pooled_client)
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # idle clients hold the parent's sockets, dropped without closing so the parent keeps them
+            self._idle = defaultdict(list)
+            self._leased = defaultdict(int)
+            self._pid = os.getpid()
+
+    def _pop_expired(self, idle_timeout: int) -> list[PooledClient]:
+        expired_at = time.monotonic() - idle_timeout
+        evicted = []
+        for key, idle in self._idle.items():
+            # idle clients are kept in release order
+            expired = 0
+            while expired < len(idle) and idle[expired].released_at < expired_at:
+                expired += 1
+
+            if expired:
+                evicted.extend(idle[:expired])
+                del idle[:expired]
+
+        self._stats['evicted'] += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _is_healthy(pooled_client: PooledClient) -> bool:
+        try:
+            return pooled_client.health_check(pooled_client.client)
+        except Exception:
+            logging.warning(f'Health check of pooled {pooled_client.kind} client failed', exc_info=True)
+            return False
+
+    @staticmethod
+    def _close(pooled_client: PooledClient):
+        if not pooled_client.close:
+            return
+
+        try:
+            pooled_client.close(pooled_client.client)
+        except Exception:
+            logging.warning(f'Failed to close pooled {pooled_client.kind} client', exc_info=True)
+
+
+vector_client_pool = VectorClientPool()
@@ -5,3 +5,6 @@ from .clean_when_dataset_deleted import handle
 from .update_app_dataset_join_when_app_model_config_updated import handle
 from .generate_conversation_name_when_first_message_created import handle
 from .create_document_index import handle
+from .clear_memory_cache_when_message_created import handle
+from .clear_api_token_app_cache_when_app_deleted import handle
+from .clear_api_token_app_cache_when_app_model_config_updated import handle
@@ -0,0 +1,8 @@
+from events.app_event import app_was_deleted
+from services.api_token_service import ApiTokenService
+
+
+@app_was_deleted.connect
+def handle(sender, **kwargs):
+    app = sender
+    ApiTokenService.delete_app_cache(app.id)
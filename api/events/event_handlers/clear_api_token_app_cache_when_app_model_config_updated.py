@@ -0,0 +1,8 @@
+from events.app_event import app_model_config_was_updated
+from services.api_token_service import ApiTokenService
+
+
+@app_model_config_was_updated.connect
+def handle(sender, **kwargs):
+    app_model = sender
+    ApiTokenService.delete_app_cache(app_model.id)
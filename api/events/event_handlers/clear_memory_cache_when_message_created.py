@@ -0,0 +1,9 @@
+from core.memory.read_only_conversation_token_db_buffer_shared_memory import \
+    ReadOnlyConversationTokenDBBufferSharedMemory
+from events.message_event import message_was_created
+
+
+@message_was_created.connect
+def handle(sender, **kwargs):
+    message = sender
+    ReadOnlyConversationTokenDBBufferSharedMemory.clear_history_cache(message.conversation_id)
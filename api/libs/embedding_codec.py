@@ -0,0 +1,75 @@
+import pickle
+import struct
+
+import numpy as np
+
+# header: magic(2) + version(1) + format(1) + scale(float32, 4)
+EMBEDDING_MAGIC = b'EB'
+EMBEDDING_CODEC_VERSION = 1
+EMBEDDING_HEADER = struct.Struct('<2sBBf')
+
+EMBEDDING_FORMATS = {
+    'float32': 0,
+    'float16': 1,
+    'int8': 2,
+}
+
+_FORMAT_DTYPES = {
+    0: np.dtype('<f4'),
+    1: np.dtype('<f2'),
+    2: np.dtype('i1'),
+}
+
+
+def encode_embedding(embedding: list[float], storage_format: str = 'float32') -> bytes:
+    """
+    Encode embedding to the compact binary storage format.
+
+    :param embedding: embedding vector
+    :param storage_format: float32, float16 or int8
+    :return: encoded bytes
+    """
+    if storage_format not in EMBEDDING_FORMATS:
+        raise ValueError(f"Unsupported embedding storage format: {storage_format}")
+
+    format_id = EMBEDDING_FORMATS[storage_format]
+    vector = np.asarray(embedding, dtype=np.float32)
+    scale = 1.0
+
+    if storage_format == 'int8':
+        max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        vector = np.round(vector / scale)
+
+    header = EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_CODEC_VERSION, format_id, scale)
+    return header + vector.astype(_FORMAT_DTYPES[format_id]).tobytes()
+
+
+def decode_embedding(data: bytes) -> np.ndarray:
+    """
+    Decode embedding from the compact binary storage format or the legacy pickle format.
+
+    :param data: encoded bytes
+    :return: float32 embedding vector
+    """
+    if not is_compact_embedding(data):
+        return np.asarray(pickle.loads(data), dtype=np.float32)
+
+    _, version, format_id, scale = EMBEDDING_HEADER.unpack_from(data)
+    if version != EMBEDDING_CODEC_VERSION or format_id not in _FORMAT_DTYPES:
+        raise ValueError(f"Unsupported embedding encoding, version: {version}, format: {format_id}")
+
+    vector = np.frombuffer(data, dtype=_FORMAT_DTYPES[format_id], offset=EMBEDDING_HEADER.size)
+    if format_id == EMBEDDING_FORMATS['float32']:
+        return vector
+
+    vector = vector.astype(np.float32)
+    if format_id == EMBEDDING_FORMATS['int8']:
+        vector *= scale
+
+    return vector
+
+
+def is_compact_embedding(data: bytes) -> bool:
+    # pickle protocol 2+ always starts with the PROTO opcode b'\x80', so the magic can't collide
+    return data[:len(EMBEDDING_MAGIC)] == EMBEDDING_MAGIC
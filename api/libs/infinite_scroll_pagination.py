@@ -1,7 +1,28 @@
 # -*- coding:utf-8 -*-
+from typing import Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
 
 class InfiniteScrollPagination:
     def __init__(self, data, limit, has_more):
         self.data = data
         self.limit = limit
         self.has_more = has_more
+
+
+def keyset_paginate(query: Query, created_at_column, id_column, cursor: Optional[Tuple], limit: int) -> Tuple[list, bool]:
+    """
+    Fetch a page of query in descending (created_at, id) order, after the (created_at, id) cursor if given.
+
+    One row more than limit is fetched to tell whether there are more rows, instead of counting them.
+
+    :return: the rows of the page and whether there are more rows
+    """
+    if cursor:
+        query = query.filter(tuple_(created_at_column, id_column) < tuple_(*cursor))
+
+    rows = query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    return rows[:limit], len(rows) > limit
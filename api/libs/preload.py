@@ -0,0 +1,27 @@
+# -*- coding:utf-8 -*-
+import functools
+
+PRELOADED_VALUES_ATTR = '_preloaded_values'
+
+
+def preloadable_property(func):
+    """
+    A property that runs its own query, unless its value was preloaded for a whole page of rows at once,
+    see services.batch_loader_service.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def getter(self):
+        preloaded_values = self.__dict__.get(PRELOADED_VALUES_ATTR)
+        if preloaded_values is not None and name in preloaded_values:
+            return preloaded_values[name]
+
+        return func(self)
+
+    return property(getter)
+
+
+def set_preloaded_value(instance, name: str, value):
+    # stored in the instance dict, out of the orm instrumented attributes
+    instance.__dict__.setdefault(PRELOADED_VALUES_ATTR, {})[name] = value
@@ -1,6 +1,8 @@
 # -*- coding:utf-8 -*-
 import hashlib
+import threading
 
+from cachetools import TTLCache
 from Crypto.Cipher import PKCS1_OAEP, AES
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
@@ -8,6 +10,15 @@ from Crypto.Random import get_random_bytes
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 
+# parsed private keys and decrypted texts are kept in process memory only, for a short time
+PRIVATE_KEY_CACHE_TTL = 120
+DECRYPTED_TEXT_CACHE_TTL = 60
+DECRYPT_CACHE_MAX_SIZE = 10000
+
+_decrypt_cache_lock = threading.Lock()
+_private_key_cache = TTLCache(maxsize=DECRYPT_CACHE_MAX_SIZE, ttl=PRIVATE_KEY_CACHE_TTL)
+_decrypted_text_cache = TTLCache(maxsize=DECRYPT_CACHE_MAX_SIZE, ttl=DECRYPTED_TEXT_CACHE_TTL)
+
 
 def generate_key_pair(tenant_id):
     private_key = RSA.generate(2048)
@@ -20,6 +31,9 @@ def generate_key_pair(tenant_id):
 
     storage.save(filepath, pem_private)
 
+    redis_client.delete(_get_private_key_cache_key(filepath))
+    clear_decrypt_cache(tenant_id)
+
     return pem_public.decode()
 
 
@@ -46,19 +60,14 @@ def encrypt(text, public_key):
 
 
 def decrypt(encrypted_text, tenant_id):
-    filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
-
-    cache_key = 'tenant_privkey:{hash}'.format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
-    private_key = redis_client.get(cache_key)
-    if not private_key:
-        try:
-            private_key = storage.load(filepath)
-        except FileNotFoundError:
-            raise PrivkeyNotFoundError("Private key not found, tenant_id: {tenant_id}".format(tenant_id=tenant_id))
+    text_cache_key = (tenant_id, hashlib.sha256(encrypted_text).hexdigest())
+    with _decrypt_cache_lock:
+        decrypted_text = _decrypted_text_cache.get(text_cache_key)
 
-        redis_client.setex(cache_key, 120, private_key)
+    if decrypted_text is not None:
+        return decrypted_text
 
-    rsa_key = RSA.import_key(private_key)
+    rsa_key = _get_private_key(tenant_id)
     cipher_rsa = PKCS1_OAEP.new(rsa_key)
 
     if encrypted_text.startswith(prefix_hybrid):
@@ -76,7 +85,54 @@ def decrypt(encrypted_text, tenant_id):
     else:
         decrypted_text = cipher_rsa.decrypt(encrypted_text)
 
-    return decrypted_text.decode()
+    decrypted_text = decrypted_text.decode()
+    with _decrypt_cache_lock:
+        _decrypted_text_cache[text_cache_key] = decrypted_text
+
+    return decrypted_text
+
+
+def clear_decrypt_cache(tenant_id=None):
+    """Drop the cached private key and decrypted texts of a tenant, or of all tenants."""
+    with _decrypt_cache_lock:
+        if tenant_id is None:
+            _private_key_cache.clear()
+            _decrypted_text_cache.clear()
+            return
+
+        _private_key_cache.pop(tenant_id, None)
+        for key in [key for key in list(_decrypted_text_cache.keys()) if key[0] == tenant_id]:
+            _decrypted_text_cache.pop(key, None)
+
+
+def _get_private_key(tenant_id):
+    with _decrypt_cache_lock:
+        rsa_key = _private_key_cache.get(tenant_id)
+
+    if rsa_key is not None:
+        return rsa_key
+
+    filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
+
+    cache_key = _get_private_key_cache_key(filepath)
+    private_key = redis_client.get(cache_key)
+    if not private_key:
+        try:
+            private_key = storage.load(filepath)
+        except FileNotFoundError:
+            raise PrivkeyNotFoundError("Private key not found, tenant_id: {tenant_id}".format(tenant_id=tenant_id))
+
+        redis_client.setex(cache_key, 120, private_key)
+
+    rsa_key = RSA.import_key(private_key)
+    with _decrypt_cache_lock:
+        _private_key_cache[tenant_id] = rsa_key
+
+    return rsa_key
+
+
+def _get_private_key_cache_key(filepath):
+    return 'tenant_privkey:{hash}'.format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
 
 
 class PrivkeyNotFoundError(Exception):
@@ -0,0 +1,47 @@
+"""add dataset keyword postings
+
+Revision ID: a8f9b3c5e6d1
+Revises: fca025d3b60f
+Create Date: 2023-11-10 10:26:14.583102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a8f9b3c5e6d1'
+down_revision = 'fca025d3b60f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dataset_keyword_postings',
+    sa.Column('id', postgresql.UUID(), server_default=sa.text('uuid_generate_v4()'), nullable=False),
+    sa.Column('dataset_id', postgresql.UUID(), nullable=False),
+    sa.Column('keyword', sa.String(length=255), nullable=False),
+    sa.Column('index_node_id', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='dataset_keyword_posting_pkey'),
+    sa.UniqueConstraint('dataset_id', 'keyword', 'index_node_id', name='dataset_keyword_posting_keyword_idx')
+    )
+    with op.batch_alter_table('dataset_keyword_postings', schema=None) as batch_op:
+        batch_op.create_index('dataset_keyword_posting_node_idx', ['dataset_id', 'index_node_id'], unique=False)
+
+    # migrate the keyword -> node ids map from the per dataset json blob into posting rows
+    op.execute("""
+        INSERT INTO dataset_keyword_postings (dataset_id, keyword, index_node_id)
+        SELECT t.dataset_id, kv.key, node_id
+        FROM dataset_keyword_tables t,
+            jsonb_each((t.keyword_table::jsonb)->'__data__'->'table') kv,
+            jsonb_array_elements_text(kv.value) node_id
+        WHERE t.keyword_table <> '' AND length(kv.key) <= 255
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('dataset_keyword_postings', schema=None) as batch_op:
+        batch_op.drop_index('dataset_keyword_posting_node_idx')
+
+    op.drop_table('dataset_keyword_postings')
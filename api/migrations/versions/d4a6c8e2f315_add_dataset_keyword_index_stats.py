@@ -0,0 +1,42 @@
+"""add dataset keyword index stats
+
+Revision ID: d4a6c8e2f315
+Revises: c7d3e1f0a2b4
+Create Date: 2023-11-20 14:08:22.719364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd4a6c8e2f315'
+down_revision = 'c7d3e1f0a2b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dataset_keyword_index_stats',
+    sa.Column('dataset_id', postgresql.UUID(), nullable=False),
+    sa.Column('total_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('length_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('length_sum', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('dataset_id', name='dataset_keyword_index_stat_pkey')
+    )
+
+    # the stats of the postings written so far
+    op.execute("""
+        INSERT INTO dataset_keyword_index_stats (dataset_id, total_count, length_count, length_sum)
+        SELECT dataset_id, count(*), count(nullif(segment_length, 0)), coalesce(sum(segment_length), 0)
+        FROM (
+            SELECT dataset_id, index_node_id, max(segment_length) AS segment_length
+            FROM dataset_keyword_postings
+            GROUP BY dataset_id, index_node_id
+        ) segment_lengths
+        GROUP BY dataset_id
+    """)
+
+
+def downgrade():
+    op.drop_table('dataset_keyword_index_stats')
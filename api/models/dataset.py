@@ -1,11 +1,13 @@
 import json
-import pickle
 from json import JSONDecodeError
 
+from flask import current_app
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from extensions.ext_database import db
+from libs.embedding_codec import encode_embedding, decode_embedding
+from libs.preload import preloadable_property
 from models.account import Account
 from models.model import App, UploadFile
 
@@ -66,15 +68,15 @@ class Dataset(db.Model):
         return DatasetProcessRule.query.filter(DatasetProcessRule.dataset_id == self.id) \
             .order_by(DatasetProcessRule.created_at.desc()).first()
 
-    @property
+    @preloadable_property
     def app_count(self):
         return db.session.query(func.count(AppDatasetJoin.id)).filter(AppDatasetJoin.dataset_id == self.id).scalar()
 
-    @property
+    @preloadable_property
     def document_count(self):
         return db.session.query(func.count(Document.id)).filter(Document.dataset_id == self.id).scalar()
 
-    @property
+    @preloadable_property
     def available_document_count(self):
         return db.session.query(func.count(Document.id)).filter(
             Document.dataset_id == self.id,
@@ -83,7 +85,7 @@ class Dataset(db.Model):
             Document.archived == False
         ).scalar()
 
-    @property
+    @preloadable_property
     def available_segment_count(self):
         return db.session.query(func.count(DocumentSegment.id)).filter(
             DocumentSegment.dataset_id == self.id,
@@ -91,7 +93,7 @@ class Dataset(db.Model):
             DocumentSegment.enabled == True
         ).scalar()
 
-    @property
+    @preloadable_property
     def word_count(self):
         return Document.query.with_entities(func.coalesce(func.sum(Document.word_count))) \
             .filter(Document.dataset_id == self.id).scalar()
@@ -307,11 +309,11 @@ class Document(db.Model):
     def dataset(self):
         return db.session.query(Dataset).filter(Dataset.id == self.dataset_id).one_or_none()
 
-    @property
+    @preloadable_property
     def segment_count(self):
         return DocumentSegment.query.filter(DocumentSegment.document_id == self.id).count()
 
-    @property
+    @preloadable_property
     def hit_count(self):
         return DocumentSegment.query.with_entities(func.coalesce(func.sum(DocumentSegment.hit_count))) \
             .filter(DocumentSegment.document_id == self.id).scalar()
@@ -448,6 +450,39 @@ class DatasetKeywordTable(db.Model):
         return json.loads(self.keyword_table, cls=SetDecoder) if self.keyword_table else None
 
 
+class DatasetKeywordPosting(db.Model):
+    __tablename__ = 'dataset_keyword_postings'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('id', name='dataset_keyword_posting_pkey'),
+        db.UniqueConstraint('dataset_id', 'keyword', 'index_node_id', name='dataset_keyword_posting_keyword_idx'),
+        db.Index('dataset_keyword_posting_node_idx', 'dataset_id', 'index_node_id'),
+    )
+
+    id = db.Column(UUID, primary_key=True, server_default=db.text('uuid_generate_v4()'))
+    dataset_id = db.Column(UUID, nullable=False)
+    keyword = db.Column(db.String(255), nullable=False)
+    index_node_id = db.Column(db.String(255), nullable=False)
+    term_frequency = db.Column(db.Integer, nullable=False, server_default=db.text('1'))
+    segment_length = db.Column(db.Integer, nullable=False, server_default=db.text('0'))
+
+
+class DatasetKeywordIndexStat(db.Model):
+    """
+    The chunk count and chunk length sum of the keyword postings of a dataset, used by BM25,
+    kept up to date by the writes of the postings.
+    """
+    __tablename__ = 'dataset_keyword_index_stats'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('dataset_id', name='dataset_keyword_index_stat_pkey'),
+    )
+
+    dataset_id = db.Column(UUID, nullable=False)
+    total_count = db.Column(db.Integer, nullable=False, server_default=db.text('0'))
+    # chunks indexed before lengths were recorded have no length
+    length_count = db.Column(db.Integer, nullable=False, server_default=db.text('0'))
+    length_sum = db.Column(db.BigInteger, nullable=False, server_default=db.text('0'))
+
+
 class Embedding(db.Model):
     __tablename__ = 'embeddings'
     __table_args__ = (
@@ -463,10 +498,10 @@ class Embedding(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
 
     def set_embedding(self, embedding_data: list[float]):
-        self.embedding = pickle.dumps(embedding_data, protocol=pickle.HIGHEST_PROTOCOL)
+        self.embedding = encode_embedding(embedding_data, current_app.config['EMBEDDING_STORAGE_FORMAT'])
 
     def get_embedding(self) -> list[float]:
-        return pickle.loads(self.embedding)
+        return decode_embedding(self.embedding).tolist()
 
 
 class DatasetCollectionBinding(db.Model):
@@ -6,6 +6,7 @@ from sqlalchemy.dialects.postgresql import UUID
 
 from core.file.upload_file_parser import UploadFileParser
 from libs.helper import generate_string
+from libs.preload import preloadable_property
 from extensions.ext_database import db
 from .account import Account, Tenant
 
@@ -313,7 +314,9 @@ class Conversation(db.Model):
     __tablename__ = 'conversations'
     __table_args__ = (
         db.PrimaryKeyConstraint('id', name='conversation_pkey'),
-        db.Index('conversation_app_from_user_idx', 'app_id', 'from_source', 'from_end_user_id')
+        db.Index('conversation_app_from_user_idx', 'app_id', 'from_source', 'from_end_user_id'),
+        db.Index('conversation_app_from_user_created_at_idx', 'app_id', 'from_source', 'from_end_user_id',
+                 'created_at', 'id')
     )
 
     id = db.Column(UUID, server_default=db.text('uuid_generate_v4()'))
@@ -357,16 +360,17 @@ class Conversation(db.Model):
             else:
                 model_config['configs'] = override_model_configs
         else:
-            app_model_config = db.session.query(AppModelConfig).filter(
-                AppModelConfig.id == self.app_model_config_id).first()
-
-            model_config = app_model_config.to_dict()
+            model_config = self.app_model_config.to_dict()
 
         model_config['model_id'] = self.model_id
         model_config['provider'] = self.model_provider
 
         return model_config
 
+    @preloadable_property
+    def app_model_config(self):
+        return db.session.query(AppModelConfig).filter(AppModelConfig.id == self.app_model_config_id).first()
+
     @property
     def summary_or_query(self):
         if self.summary:
@@ -374,19 +378,19 @@ class Conversation(db.Model):
         else:
             return first_message.query if (first_message := self.first_message) else ''
 
-    @property
+    @preloadable_property
     def annotated(self):
         return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).count() > 0
 
-    @property
+    @preloadable_property
     def annotation(self):
         return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).first()
 
-    @property
+    @preloadable_property
     def message_count(self):
         return db.session.query(Message).filter(Message.conversation_id == self.id).count()
 
-    @property
+    @preloadable_property
     def user_feedback_stats(self):
         like = db.session.query(MessageFeedback) \
             .filter(MessageFeedback.conversation_id == self.id,
@@ -400,7 +404,7 @@ class Conversation(db.Model):
 
         return {'like': like, 'dislike': dislike}
 
-    @property
+    @preloadable_property
     def admin_feedback_stats(self):
         like = db.session.query(MessageFeedback) \
             .filter(MessageFeedback.conversation_id == self.id,
@@ -414,7 +418,7 @@ class Conversation(db.Model):
 
         return {'like': like, 'dislike': dislike}
 
-    @property
+    @preloadable_property
     def first_message(self):
         return db.session.query(Message).filter(Message.conversation_id == self.id).first()
 
@@ -422,7 +426,7 @@ class Conversation(db.Model):
     def app(self):
         return db.session.query(App).filter(App.id == self.app_id).first()
 
-    @property
+    @preloadable_property
     def from_end_user_session_id(self):
         if self.from_end_user_id:
             if (
@@ -445,6 +449,7 @@ class Message(db.Model):
         db.PrimaryKeyConstraint('id', name='message_pkey'),
         db.Index('message_app_id_idx', 'app_id', 'created_at'),
         db.Index('message_conversation_id_idx', 'conversation_id'),
+        db.Index('message_conversation_created_at_idx', 'conversation_id', 'created_at', 'id'),
         db.Index('message_end_user_idx', 'app_id', 'from_source', 'from_end_user_id'),
         db.Index('message_account_idx', 'app_id', 'from_source', 'from_account_id'),
     )
@@ -475,7 +480,7 @@ class Message(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
     agent_based = db.Column(db.Boolean, nullable=False, server_default=db.text('false'))
 
-    @property
+    @preloadable_property
     def user_feedback(self):
         return (
             db.session.query(MessageFeedback)
@@ -486,7 +491,7 @@ class Message(db.Model):
             .first()
         )
 
-    @property
+    @preloadable_property
     def admin_feedback(self):
         return (
             db.session.query(MessageFeedback)
@@ -497,7 +502,7 @@ class Message(db.Model):
             .first()
         )
 
-    @property
+    @preloadable_property
     def feedbacks(self):
         return (
             db.session.query(MessageFeedback)
@@ -505,7 +510,7 @@ class Message(db.Model):
             .all()
         )
 
-    @property
+    @preloadable_property
     def annotation(self):
         return (
             db.session.query(MessageAnnotation)
@@ -529,17 +534,17 @@ class Message(db.Model):
     def in_debug_mode(self):
         return self.override_model_configs is not None
 
-    @property
+    @preloadable_property
     def agent_thoughts(self):
         return db.session.query(MessageAgentThought).filter(MessageAgentThought.message_id == self.id) \
             .order_by(MessageAgentThought.position.asc()).all()
 
-    @property
+    @preloadable_property
     def retriever_resources(self):
         return db.session.query(DatasetRetrieverResource).filter(DatasetRetrieverResource.message_id == self.id) \
             .order_by(DatasetRetrieverResource.position.asc()).all()
 
-    @property
+    @preloadable_property
     def message_files(self):
         return db.session.query(MessageFile).filter(MessageFile.message_id == self.id).all()
 
@@ -592,7 +597,7 @@ class MessageFeedback(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
     updated_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
 
-    @property
+    @preloadable_property
     def from_account(self):
         return (
             db.session.query(Account)
@@ -638,7 +643,7 @@ class MessageAnnotation(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
     updated_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
 
-    @property
+    @preloadable_property
     def account(self):
         return db.session.query(Account).filter(Account.id == self.account_id).first()
 
@@ -0,0 +1,96 @@
+import datetime
+import hashlib
+import json
+from typing import Optional
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import ApiToken, App
+from tasks.update_api_token_last_used_task import update_api_token_last_used_task
+
+# seconds to cache a valid api token and the status of its app
+API_TOKEN_CACHE_TTL = 60
+
+# the last used time of an api token is written at most once per interval
+API_TOKEN_LAST_USED_UPDATE_INTERVAL = 60
+
+
+class ApiTokenService:
+    @classmethod
+    def get_api_token(cls, scope: str, token: str) -> Optional[ApiToken]:
+        """
+        Get the api token of scope, cached in redis for a short time.
+
+        The returned api token is not bound to the session.
+        """
+        cache_key = cls._cache_key(scope, token)
+        if cached_api_token := redis_client.get(cache_key):
+            return ApiToken(**json.loads(cached_api_token), type=scope, token=token)
+
+        api_token = db.session.query(ApiToken).filter(
+            ApiToken.token == token,
+            ApiToken.type == scope,
+        ).first()
+
+        if not api_token:
+            return None
+
+        redis_client.setex(cache_key, API_TOKEN_CACHE_TTL, json.dumps({
+            'id': api_token.id,
+            'app_id': api_token.app_id,
+            'tenant_id': api_token.tenant_id
+        }))
+
+        return ApiToken(id=api_token.id, app_id=api_token.app_id, tenant_id=api_token.tenant_id,
+                        type=scope, token=token)
+
+    @classmethod
+    def delete_api_token_cache(cls, scope: str, token: str):
+        redis_client.delete(cls._cache_key(scope, token))
+
+    @classmethod
+    def get_app(cls, app_id: str) -> Optional[App]:
+        """
+        Get the app of an app api token, cached in redis for a short time together with its status
+        and enable_api flags.
+
+        The returned app is not bound to the session.
+        """
+        cache_key = cls._app_cache_key(app_id)
+        if cached_app := redis_client.get(cache_key):
+            values = json.loads(cached_app)
+            for name in ['created_at', 'updated_at']:
+                values[name] = datetime.datetime.fromisoformat(values[name])
+            return App(**values)
+
+        app = db.session.query(App).filter(App.id == app_id).first()
+
+        if not app:
+            return None
+
+        values = {column.name: getattr(app, column.name) for column in App.__table__.columns}
+        redis_client.setex(cache_key, API_TOKEN_CACHE_TTL, json.dumps(
+            values, default=lambda value: value.isoformat()
+        ))
+
+        return App(**values)
+
+    @classmethod
+    def delete_app_cache(cls, app_id: str):
+        """Delete the cached app, called when the app is disabled, deleted or its model config is published."""
+        redis_client.delete(cls._app_cache_key(app_id))
+
+    @classmethod
+    def update_last_used_at(cls, api_token: ApiToken):
+        """Update the last used time asynchronously, at most once per interval for each api token."""
+        if redis_client.set(f'api_token_last_used:{api_token.id}', 1,
+                            ex=API_TOKEN_LAST_USED_UPDATE_INTERVAL, nx=True):
+            update_api_token_last_used_task.delay(api_token.id, datetime.datetime.utcnow().isoformat())
+
+    @staticmethod
+    def _cache_key(scope: str, token: str) -> str:
+        return f'api_token:{scope}:{hashlib.sha256(token.encode()).hexdigest()}'
+
+    @staticmethod
+    def _app_cache_key(app_id: str) -> str:
+        return f'api_token_app:{app_id}'
@@ -0,0 +1,211 @@
+from collections import defaultdict
+from typing import List
+
+from sqlalchemy import func, case, and_
+
+from extensions.ext_database import db
+from libs.preload import set_preloaded_value
+from models.account import Account
+from models.dataset import Dataset, Document, DocumentSegment, AppDatasetJoin
+from models.model import Conversation, Message, MessageFeedback, MessageAnnotation, EndUser, MessageAgentThought, \
+    DatasetRetrieverResource, MessageFile, AppModelConfig
+
+
+class BatchLoaderService:
+    """
+    Preload the query-backed properties marshalled by the list endpoints for a whole page of rows,
+    with one grouped query per property instead of one query per row.
+    """
+
+    @classmethod
+    def load_datasets(cls, datasets: List[Dataset]):
+        if not datasets:
+            return
+
+        dataset_ids = [dataset.id for dataset in datasets]
+
+        app_counts = dict(
+            db.session.query(AppDatasetJoin.dataset_id, func.count(AppDatasetJoin.id))
+            .filter(AppDatasetJoin.dataset_id.in_(dataset_ids))
+            .group_by(AppDatasetJoin.dataset_id)
+            .all()
+        )
+
+        document_stats = {
+            row.dataset_id: row for row in db.session.query(
+                Document.dataset_id,
+                func.count(Document.id).label('document_count'),
+                func.sum(case((and_(
+                    Document.indexing_status == 'completed',
+                    Document.enabled == True,
+                    Document.archived == False
+                ), 1), else_=0)).label('available_document_count'),
+                func.sum(Document.word_count).label('word_count')
+            ).filter(Document.dataset_id.in_(dataset_ids)).group_by(Document.dataset_id).all()
+        }
+
+        available_segment_counts = dict(
+            db.session.query(DocumentSegment.dataset_id, func.count(DocumentSegment.id))
+            .filter(
+                DocumentSegment.dataset_id.in_(dataset_ids),
+                DocumentSegment.status == 'completed',
+                DocumentSegment.enabled == True
+            )
+            .group_by(DocumentSegment.dataset_id)
+            .all()
+        )
+
+        for dataset in datasets:
+            document_stat = document_stats.get(dataset.id)
+            set_preloaded_value(dataset, 'app_count', app_counts.get(dataset.id, 0))
+            set_preloaded_value(dataset, 'document_count', document_stat.document_count if document_stat else 0)
+            set_preloaded_value(dataset, 'available_document_count',
+                                int(document_stat.available_document_count) if document_stat else 0)
+            set_preloaded_value(dataset, 'word_count', document_stat.word_count if document_stat else None)
+            set_preloaded_value(dataset, 'available_segment_count', available_segment_counts.get(dataset.id, 0))
+
+    @classmethod
+    def load_documents(cls, documents: List[Document]):
+        if not documents:
+            return
+
+        segment_stats = {
+            row.document_id: row for row in db.session.query(
+                DocumentSegment.document_id,
+                func.count(DocumentSegment.id).label('segment_count'),
+                func.sum(DocumentSegment.hit_count).label('hit_count')
+            ).filter(DocumentSegment.document_id.in_([document.id for document in documents]))
+            .group_by(DocumentSegment.document_id).all()
+        }
+
+        for document in documents:
+            segment_stat = segment_stats.get(document.id)
+            set_preloaded_value(document, 'segment_count', segment_stat.segment_count if segment_stat else 0)
+            set_preloaded_value(document, 'hit_count', segment_stat.hit_count if segment_stat else None)
+
+    @classmethod
+    def load_conversations(cls, conversations: List[Conversation]):
+        if not conversations:
+            return
+
+        conversation_ids = [conversation.id for conversation in conversations]
+
+        message_counts = dict(
+            db.session.query(Message.conversation_id, func.count(Message.id))
+            .filter(Message.conversation_id.in_(conversation_ids))
+            .group_by(Message.conversation_id)
+            .all()
+        )
+
+        feedback_stats = defaultdict(lambda: {'like': 0, 'dislike': 0})
+        for conversation_id, from_source, rating, count in db.session.query(
+            MessageFeedback.conversation_id, MessageFeedback.from_source, MessageFeedback.rating,
+            func.count(MessageFeedback.id)
+        ).filter(
+            MessageFeedback.conversation_id.in_(conversation_ids)
+        ).group_by(MessageFeedback.conversation_id, MessageFeedback.from_source, MessageFeedback.rating).all():
+            if rating in ('like', 'dislike'):
+                feedback_stats[(conversation_id, from_source)][rating] = count
+
+        annotations = {}
+        for annotation in db.session.query(MessageAnnotation) \
+                .filter(MessageAnnotation.conversation_id.in_(conversation_ids)).all():
+            annotations.setdefault(annotation.conversation_id, annotation)
+
+        first_messages = {
+            message.conversation_id: message for message in db.session.query(Message)
+            .filter(Message.conversation_id.in_(conversation_ids))
+            .distinct(Message.conversation_id)
+            .order_by(Message.conversation_id, Message.created_at.asc())
+            .all()
+        }
+
+        end_user_ids = {conversation.from_end_user_id for conversation in conversations
+                        if conversation.from_end_user_id}
+        end_user_session_ids = dict(
+            db.session.query(EndUser.id, EndUser.session_id).filter(EndUser.id.in_(end_user_ids)).all()
+        ) if end_user_ids else {}
+
+        app_model_config_ids = {conversation.app_model_config_id for conversation in conversations
+                                if not conversation.override_model_configs}
+        app_model_configs = {
+            app_model_config.id: app_model_config for app_model_config in db.session.query(AppModelConfig)
+            .filter(AppModelConfig.id.in_(app_model_config_ids)).all()
+        } if app_model_config_ids else {}
+
+        cls._load_accounts(list(annotations.values()), 'account_id', 'account')
+
+        for conversation in conversations:
+            set_preloaded_value(conversation, 'message_count', message_counts.get(conversation.id, 0))
+            set_preloaded_value(conversation, 'user_feedback_stats', dict(feedback_stats[(conversation.id, 'user')]))
+            set_preloaded_value(conversation, 'admin_feedback_stats',
+                                dict(feedback_stats[(conversation.id, 'admin')]))
+            set_preloaded_value(conversation, 'annotated', conversation.id in annotations)
+            set_preloaded_value(conversation, 'annotation', annotations.get(conversation.id))
+            set_preloaded_value(conversation, 'first_message', first_messages.get(conversation.id))
+            set_preloaded_value(conversation, 'from_end_user_session_id',
+                                end_user_session_ids.get(conversation.from_end_user_id))
+            if not conversation.override_model_configs:
+                set_preloaded_value(conversation, 'app_model_config',
+                                    app_model_configs.get(conversation.app_model_config_id))
+
+    @classmethod
+    def load_messages(cls, messages: List[Message]):
+        if not messages:
+            return
+
+        message_ids = [message.id for message in messages]
+
+        feedbacks = defaultdict(list)
+        for feedback in db.session.query(MessageFeedback).filter(MessageFeedback.message_id.in_(message_ids)).all():
+            feedbacks[feedback.message_id].append(feedback)
+
+        annotations = {}
+        for annotation in db.session.query(MessageAnnotation) \
+                .filter(MessageAnnotation.message_id.in_(message_ids)).all():
+            annotations.setdefault(annotation.message_id, annotation)
+
+        agent_thoughts = defaultdict(list)
+        for agent_thought in db.session.query(MessageAgentThought) \
+                .filter(MessageAgentThought.message_id.in_(message_ids)) \
+                .order_by(MessageAgentThought.position.asc()).all():
+            agent_thoughts[agent_thought.message_id].append(agent_thought)
+
+        retriever_resources = defaultdict(list)
+        for retriever_resource in db.session.query(DatasetRetrieverResource) \
+                .filter(DatasetRetrieverResource.message_id.in_(message_ids)) \
+                .order_by(DatasetRetrieverResource.position.asc()).all():
+            retriever_resources[retriever_resource.message_id].append(retriever_resource)
+
+        message_files = defaultdict(list)
+        for message_file in db.session.query(MessageFile).filter(MessageFile.message_id.in_(message_ids)).all():
+            message_files[message_file.message_id].append(message_file)
+
+        cls._load_accounts(
+            [feedback for message_feedbacks in feedbacks.values() for feedback in message_feedbacks],
+            'from_account_id', 'from_account'
+        )
+        cls._load_accounts(list(annotations.values()), 'account_id', 'account')
+
+        for message in messages:
+            message_feedbacks = feedbacks[message.id]
+            set_preloaded_value(message, 'feedbacks', message_feedbacks)
+            set_preloaded_value(message, 'user_feedback', next(
+                (feedback for feedback in message_feedbacks if feedback.from_source == 'user'), None))
+            set_preloaded_value(message, 'admin_feedback', next(
+                (feedback for feedback in message_feedbacks if feedback.from_source == 'admin'), None))
+            set_preloaded_value(message, 'annotation', annotations.get(message.id))
+            set_preloaded_value(message, 'agent_thoughts', agent_thoughts[message.id])
+            set_preloaded_value(message, 'retriever_resources', retriever_resources[message.id])
+            set_preloaded_value(message, 'message_files', message_files[message.id])
+
+    @classmethod
+    def _load_accounts(cls, rows: list, account_id_attr: str, account_attr: str):
+        account_ids = {getattr(row, account_id_attr) for row in rows if getattr(row, account_id_attr)}
+        accounts = {
+            account.id: account
+            for account in db.session.query(Account).filter(Account.id.in_(account_ids)).all()
+        } if account_ids else {}
+
+        for row in rows:
+            set_preloaded_value(row, account_attr, accounts.get(getattr(row, account_id_attr)))
@@ -1,29 +1,30 @@
+import functools
 import json
 import logging
-import threading
 import time
 import uuid
+from concurrent.futures import Future
 from typing import Generator, Union, Any, Optional, List
 
 from flask import current_app, Flask
-from redis.client import PubSub
 from sqlalchemy import and_
 
 from core.completion import Completion
 from core.conversation_message_task import PubHandler, ConversationTaskStoppedException, \
     ConversationTaskInterruptException
 from core.file.message_file_parser import MessageFileParser
+from core.generate_worker_pool import generate_worker_pool
+from core.pubsub_dispatcher import pubsub_dispatcher, Subscription
 from core.model_providers.error import LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError, \
     LLMRateLimitError, \
     LLMAuthorizationError, ProviderTokenNotInitError, QuotaExceededError, ModelCurrentlyNotSupportError
 from core.model_providers.models.entity.message import PromptMessageFile
 from extensions.ext_database import db
-from extensions.ext_redis import redis_client
 from models.model import Conversation, AppModelConfig, App, Account, EndUser, Message
 from services.app_model_config_service import AppModelConfigService
 from services.errors.app import MoreLikeThisDisabledError
 from services.errors.app_model_config import AppModelConfigBrokenError
-from services.errors.completion import CompletionStoppedError
+from services.errors.completion import CompletionStoppedError, CompletionQueueFullError
 from services.errors.conversation import ConversationNotExistsError, ConversationCompletedError
 from services.errors.message import MessageNotExistsError
 
@@ -147,12 +148,9 @@ class CompletionService:
 
         generate_task_id = str(uuid.uuid4())
 
-        pubsub = redis_client.pubsub()
-        pubsub.subscribe(PubHandler.generate_channel_name(user, generate_task_id))
-
         user = cls.get_real_user_instead_of_proxy_obj(user)
 
-        generate_worker_thread = threading.Thread(target=cls.generate_worker, kwargs={
+        return cls.submit_generate_task(user, generate_task_id, streaming, {
             'flask_app': current_app._get_current_object(),
             'generate_task_id': generate_task_id,
             'detached_app_model': app_model,
@@ -168,13 +166,28 @@ class CompletionService:
             'auto_generate_name': auto_generate_name
         })
 
-        generate_worker_thread.start()
+    @classmethod
+    def submit_generate_task(cls, user: Union[Account, EndUser], generate_task_id: str, streaming: bool,
+                             worker_kwargs: dict) -> Union[dict, Generator]:
+        subscription = pubsub_dispatcher.subscribe(PubHandler.generate_channel_name(user, generate_task_id))
+
+        future = generate_worker_pool.try_submit(cls.generate_worker, **worker_kwargs)
+        if not future:
+            pubsub_dispatcher.unsubscribe(subscription)
+            raise CompletionQueueFullError()
 
-        # wait for 10 minutes to close the thread
-        cls.countdown_and_close(current_app._get_current_object(), generate_worker_thread, pubsub, user,
-                                generate_task_id)
+        # stop the generation and close the subscription if it is not done after 10 minutes
+        subscription.watch(future, functools.partial(
+            cls.stop_generate_task, future, PubHandler.generate_stopped_cache_key(user, generate_task_id)
+        ))
 
-        return cls.compact_response(pubsub, streaming)
+        return cls.compact_response(subscription, streaming)
+
+    @classmethod
+    def stop_generate_task(cls, future: Future, stopped_cache_key: str):
+        # drop the task if it is still waiting for a worker, otherwise ask the running generation to stop
+        if not generate_worker_pool.cancel(future):
+            PubHandler.stop_by_cache_key(stopped_cache_key)
 
     @classmethod
     def get_real_user_instead_of_proxy_obj(cls, user: Union[Account, EndUser]):
@@ -197,7 +210,8 @@ class CompletionService:
         with flask_app.app_context():
             # fixed the state of the model object when it detached from the original session
             user = db.session.merge(detached_user)
-            app_model = db.session.merge(detached_app_model)
+            # the app may be a snapshot of the api token cache, load it rather than merging its values back
+            app_model = db.session.query(App).filter(App.id == detached_app_model.id).first()
 
             if detached_conversation:
                 conversation = db.session.merge(detached_conversation)
@@ -234,39 +248,6 @@ class CompletionService:
             finally:
                 db.session.remove()
 
-    @classmethod
-    def countdown_and_close(cls, flask_app: Flask, worker_thread, pubsub, detached_user,
-                            generate_task_id) -> threading.Thread:
-        # wait for 10 minutes to close the thread
-        timeout = 600
-
-        def close_pubsub():
-            with flask_app.app_context():
-                try:
-                    user = db.session.merge(detached_user)
-
-                    sleep_iterations = 0
-                    while sleep_iterations < timeout and worker_thread.is_alive():
-                        if sleep_iterations > 0 and sleep_iterations % 10 == 0:
-                            PubHandler.ping(user, generate_task_id)
-
-                        time.sleep(1)
-                        sleep_iterations += 1
-
-                    if worker_thread.is_alive():
-                        PubHandler.stop(user, generate_task_id)
-                        try:
-                            pubsub.close()
-                        except Exception:
-                            pass
-                finally:
-                    db.session.remove()
-
-        countdown_thread = threading.Thread(target=close_pubsub)
-        countdown_thread.start()
-
-        return countdown_thread
-
     @classmethod
     def generate_more_like_this(cls, app_model: App, user: Union[Account, EndUser],
                                 message_id: str, streaming: bool = True,
@@ -306,12 +287,9 @@ class CompletionService:
 
         generate_task_id = str(uuid.uuid4())
 
-        pubsub = redis_client.pubsub()
-        pubsub.subscribe(PubHandler.generate_channel_name(user, generate_task_id))
-
         user = cls.get_real_user_instead_of_proxy_obj(user)
 
-        generate_worker_thread = threading.Thread(target=cls.generate_worker, kwargs={
+        return cls.submit_generate_task(user, generate_task_id, streaming, {
             'flask_app': current_app._get_current_object(),
             'generate_task_id': generate_task_id,
             'detached_app_model': app_model,
@@ -327,14 +305,6 @@ class CompletionService:
             'auto_generate_name': False
         })
 
-        generate_worker_thread.start()
-
-        # wait for 10 minutes to close the thread
-        cls.countdown_and_close(current_app._get_current_object(), generate_worker_thread, pubsub, user,
-                                generate_task_id)
-
-        return cls.compact_response(pubsub, streaming)
-
     @classmethod
     def get_cleaned_inputs(cls, user_inputs: dict, app_model_config: AppModelConfig):
         if user_inputs is None:
@@ -372,12 +342,12 @@ class CompletionService:
         return filtered_inputs
 
     @classmethod
-    def compact_response(cls, pubsub: PubSub, streaming: bool = False) -> Union[dict, Generator]:
-        generate_channel = list(pubsub.channels.keys())[0].decode('utf-8')
+    def compact_response(cls, subscription: Subscription, streaming: bool = False) -> Union[dict, Generator]:
+        generate_channel = subscription.channel
         if not streaming:
             try:
                 message_result = {}
-                for message in pubsub.listen():
+                for message in subscription.listen():
                     if message["type"] == "message":
                         result = message["data"].decode('utf-8')
                         result = json.loads(result)
@@ -388,22 +358,16 @@ class CompletionService:
                         if result['event'] == 'message_end' and 'data' in result:
                             message_result['message_end'] = result.get('data')
                             return cls.get_blocking_message_response_data(message_result)
-            except ValueError as e:
-                if e.args[0] != "I/O operation on closed file.":
-                    raise CompletionStoppedError()
-                logging.exception(e)
-                raise
             finally:
                 db.session.remove()
+                pubsub_dispatcher.unsubscribe(subscription)
 
-                try:
-                    pubsub.unsubscribe(generate_channel)
-                except ConnectionError:
-                    pass
+            # the subscription was closed before the message ended
+            raise CompletionStoppedError()
         else:
             def generate() -> Generator:
                 try:
-                    for message in pubsub.listen():
+                    for message in subscription.listen():
                         if message["type"] == "message":
                             result = message["data"].decode('utf-8')
                             result = json.loads(result)
@@ -431,17 +395,9 @@ class CompletionService:
                                 yield "event: ping\n\n"
                             else:
                                 yield f"data: {json.dumps(result)}" + "\n\n"
-                except ValueError as e:
-                    if e.args[0] != "I/O operation on closed file.":  # ignore this error
-                        logging.exception(e)
-                        raise
                 finally:
                     db.session.remove()
-
-                    try:
-                        pubsub.unsubscribe(generate_channel)
-                    except ConnectionError:
-                        pass
+                    pubsub_dispatcher.unsubscribe(subscription)
 
             return generate()
 
@@ -1,7 +1,7 @@
 from typing import Union, Optional
 
 from core.generator.llm_generator import LLMGenerator
-from libs.infinite_scroll_pagination import InfiniteScrollPagination
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, keyset_paginate
 from extensions.ext_database import db
 from models.account import Account
 from models.model import Conversation, App, EndUser, Message
@@ -35,30 +35,14 @@ class ConversationService:
         if exclude_debug_conversation:
             base_query = base_query.filter(Conversation.override_model_configs is None)
 
+        cursor = None
         if last_id:
-            if last_conversation := base_query.filter(
-                Conversation.id == last_id,
-            ).first():
-                conversations = base_query.filter(
-                    Conversation.created_at < last_conversation.created_at,
-                    Conversation.id != last_conversation.id
-                ).order_by(Conversation.created_at.desc()).limit(limit).all()
-            else:
+            cursor = base_query.with_entities(Conversation.created_at, Conversation.id) \
+                .filter(Conversation.id == last_id).first()
+            if not cursor:
                 raise LastConversationNotExistsError()
 
-        else:
-            conversations = base_query.order_by(Conversation.created_at.desc()).limit(limit).all()
-
-        has_more = False
-        if len(conversations) == limit:
-            current_page_first_conversation = conversations[-1]
-            rest_count = base_query.filter(
-                Conversation.created_at < current_page_first_conversation.created_at,
-                Conversation.id != current_page_first_conversation.id
-            ).count()
-
-            if rest_count > 0:
-                has_more = True
+        conversations, has_more = keyset_paginate(base_query, Conversation.created_at, Conversation.id, cursor, limit)
 
         return InfiniteScrollPagination(
             data=conversations,
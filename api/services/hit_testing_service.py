@@ -11,6 +11,7 @@ from langchain.schema import Document
 from sklearn.manifold import TSNE
 
 from core.embedding.cached_embedding import CacheEmbedding
+from core.index.vector_index.vector_index import VectorIndex
 from core.model_providers.model_factory import ModelFactory
 from extensions.ext_database import db
 from models.account import Account
@@ -130,7 +131,31 @@ class HitTestingService:
             embeddings.embed_query(query)
         ]
 
-        text_embeddings.extend(embeddings.embed_documents([document.page_content for document in documents]))
+        # searches do not return vectors, the stored ones are fetched and the missing ones embedded
+        stored_vectors = {}
+        if dataset.indexing_technique == 'high_quality' and documents:
+            try:
+                vector_index = VectorIndex(
+                    dataset=dataset,
+                    config=current_app.config,
+                    embeddings=embeddings
+                )
+                stored_vectors = vector_index.get_vectors_by_ids(
+                    [document.metadata['doc_id'] for document in documents]
+                )
+            except Exception:
+                logging.exception('Failed to fetch the stored vectors of hit testing documents')
+
+        missing_documents = [document for document in documents
+                             if document.metadata['doc_id'] not in stored_vectors]
+        missing_embeddings = iter(embeddings.embed_documents(
+            [document.page_content for document in missing_documents]
+        )) if missing_documents else iter([])
+
+        text_embeddings.extend(
+            stored_vectors.get(document.metadata['doc_id']) or next(missing_embeddings)
+            for document in documents
+        )
 
         tsne_position_data = cls.get_tsne_positions_from_embeddings(text_embeddings)
 
@@ -3,10 +3,11 @@ from typing import Optional, Union, List
 
 from core.completion import Completion
 from core.generator.llm_generator import LLMGenerator
-from libs.infinite_scroll_pagination import InfiniteScrollPagination
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, keyset_paginate
 from extensions.ext_database import db
 from models.account import Account
 from models.model import App, EndUser, Message, MessageFeedback, AppModelConfig
+from services.batch_loader_service import BatchLoaderService
 from services.conversation_service import ConversationService
 from services.errors.app_model_config import AppModelConfigBrokenError
 from services.errors.conversation import ConversationNotExistsError, ConversationCompletedError
@@ -30,41 +31,18 @@ class MessageService:
             conversation_id=conversation_id
         )
 
+        base_query = db.session.query(Message).filter(Message.conversation_id == conversation.id)
+
+        cursor = None
         if first_id:
-            if (
-                first_message := db.session.query(Message)
-                .filter(
-                    Message.conversation_id == conversation.id,
-                    Message.id == first_id,
-                )
-                .first()
-            ):
-                history_messages = db.session.query(Message).filter(
-                    Message.conversation_id == conversation.id,
-                    Message.created_at < first_message.created_at,
-                    Message.id != first_message.id
-                ) \
-                        .order_by(Message.created_at.desc()).limit(limit).all()
-            else:
+            cursor = base_query.with_entities(Message.created_at, Message.id).filter(Message.id == first_id).first()
+            if not cursor:
                 raise FirstMessageNotExistsError()
 
-        else:
-            history_messages = db.session.query(Message).filter(Message.conversation_id == conversation.id) \
-                    .order_by(Message.created_at.desc()).limit(limit).all()
-
-        has_more = False
-        if len(history_messages) == limit:
-            current_page_first_message = history_messages[-1]
-            rest_count = db.session.query(Message).filter(
-                Message.conversation_id == conversation.id,
-                Message.created_at < current_page_first_message.created_at,
-                Message.id != current_page_first_message.id
-            ).count()
-
-            if rest_count > 0:
-                has_more = True
+        history_messages, has_more = keyset_paginate(base_query, Message.created_at, Message.id, cursor, limit)
 
         history_messages = list(reversed(history_messages))
+        BatchLoaderService.load_messages(history_messages)
 
         return InfiniteScrollPagination(
             data=history_messages,
@@ -93,28 +71,14 @@ class MessageService:
         if include_ids is not None:
             base_query = base_query.filter(Message.id.in_(include_ids))
 
+        cursor = None
         if last_id:
-            if last_message := base_query.filter(Message.id == last_id).first():
-                history_messages = base_query.filter(
-                    Message.created_at < last_message.created_at,
-                    Message.id != last_message.id
-                ).order_by(Message.created_at.desc()).limit(limit).all()
-            else:
+            cursor = base_query.with_entities(Message.created_at, Message.id).filter(Message.id == last_id).first()
+            if not cursor:
                 raise LastMessageNotExistsError()
 
-        else:
-            history_messages = base_query.order_by(Message.created_at.desc()).limit(limit).all()
-
-        has_more = False
-        if len(history_messages) == limit:
-            current_page_first_message = history_messages[-1]
-            rest_count = base_query.filter(
-                Message.created_at < current_page_first_message.created_at,
-                Message.id != current_page_first_message.id
-            ).count()
-
-            if rest_count > 0:
-                has_more = True
+        history_messages, has_more = keyset_paginate(base_query, Message.created_at, Message.id, cursor, limit)
+        BatchLoaderService.load_messages(history_messages)
 
         return InfiniteScrollPagination(
             data=history_messages,
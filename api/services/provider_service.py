@@ -8,6 +8,7 @@ from typing import Optional
 import requests
 
 from core.model_providers.model_factory import ModelFactory
+from core.model_providers.model_provider_cache import model_provider_cache
 from extensions.ext_database import db
 from core.model_providers.model_provider_factory import ModelProviderFactory
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargsRules
@@ -238,6 +239,8 @@ class ProviderService:
 
         db.session.commit()
 
+        model_provider_cache.invalidate(tenant_id)
+
     def delete_custom_provider(self, tenant_id: str, provider_name: str) -> None:
         """
         delete custom provider.
@@ -263,6 +266,8 @@ class ProviderService:
             db.session.delete(provider)
             db.session.commit()
 
+            model_provider_cache.invalidate(tenant_id)
+
     def custom_provider_model_config_validate(self,
                                               provider_name: str,
                                               model_name: str,
@@ -366,6 +371,8 @@ class ProviderService:
             db.session.add(provider_model)
         db.session.commit()
 
+        model_provider_cache.invalidate(tenant_id)
+
     def delete_custom_provider_model(self,
                                      tenant_id: str,
                                      provider_name: str,
@@ -393,6 +400,8 @@ class ProviderService:
             db.session.delete(provider_model)
             db.session.commit()
 
+            model_provider_cache.invalidate(tenant_id)
+
     def switch_preferred_provider(self, tenant_id: str, provider_name: str, preferred_provider_type: str) -> None:
         """
         switch preferred provider.
@@ -435,6 +444,8 @@ class ProviderService:
 
         db.session.commit()
 
+        model_provider_cache.invalidate(tenant_id)
+
     def get_default_model_of_model_type(self, tenant_id: str, model_type: str) -> Optional[TenantDefaultModel]:
         """
         get default model of model type.
@@ -0,0 +1,21 @@
+import datetime
+
+from celery import shared_task
+
+from extensions.ext_database import db
+from models.model import ApiToken
+
+
+@shared_task(queue='generation')
+def update_api_token_last_used_task(api_token_id: str, last_used_at: str):
+    """
+    Async update the last used time of api token
+    :param api_token_id:
+    :param last_used_at: last used time in ISO format
+
+    Usage: update_api_token_last_used_task.delay(api_token_id, last_used_at)
+    """
+    db.session.query(ApiToken).filter(ApiToken.id == api_token_id).update({
+        'last_used_at': datetime.datetime.fromisoformat(last_used_at)
+    })
+    db.session.commit()
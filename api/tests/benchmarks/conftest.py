@@ -0,0 +1,10 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def benchmarks_enabled():
+    """Benchmarks are slow and machine dependent, run them on demand: RUN_BENCHMARKS=1 pytest api/tests/benchmarks"""
+    if not os.environ.get('RUN_BENCHMARKS'):
+        pytest.skip('set RUN_BENCHMARKS=1 to run the benchmarks')
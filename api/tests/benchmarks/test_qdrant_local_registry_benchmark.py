@@ -0,0 +1,59 @@
+import random
+import time
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from core.vector_store.qdrant_local_registry import QdrantLocalRegistry
+
+VECTOR_SIZE = 32
+
+
+def random_vector(rng: random.Random) -> list[float]:
+    return [rng.random() for _ in range(VECTOR_SIZE)]
+
+
+@pytest.fixture
+def registry():
+    registry = QdrantLocalRegistry()
+    yield registry
+    registry.clear()
+
+
+@pytest.mark.parametrize('size', [1000, 5000])
+def test_search(tmp_path, registry, capsys, size):
+    """Compare search latency loading the folder per search or keeping it open."""
+    rng = random.Random(0)
+    rounds = 5
+
+    path = str(tmp_path)
+    client = registry.get_client(path)
+    client.recreate_collection(
+        collection_name='collection',
+        vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)
+    )
+    client.upsert(collection_name='collection', points=[
+        models.PointStruct(id=i, vector=random_vector(rng), payload={'page_content': f'text {i}'})
+        for i in range(size)
+    ])
+    query_vector = random_vector(rng)
+
+    # before: a client per operation loads every collection of the folder
+    registry.clear()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        client = QdrantClient(path=path)
+        client.search(collection_name='collection', query_vector=query_vector, limit=4)
+        client.close()
+    reloaded = (time.perf_counter() - start) / rounds
+
+    client = registry.get_client(path)
+    client.search(collection_name='collection', query_vector=query_vector, limit=4)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        client.search(collection_name='collection', query_vector=query_vector, limit=4)
+    shared = (time.perf_counter() - start) / rounds
+
+    with capsys.disabled():
+        print(f'\nsearch {size} points, reloaded: {reloaded * 1000:.2f} ms, shared: {shared * 1000:.2f} ms')
@@ -0,0 +1,63 @@
+import os
+import time
+import uuid
+
+import pytest
+from flask import Flask
+from langchain.embeddings import FakeEmbeddings
+from langchain.schema import Document
+from qdrant_client.http import models
+
+from core.index.vector_index.qdrant_vector_index import QdrantVectorIndex, QdrantConfig
+from core.vector_store.qdrant_local_registry import qdrant_local_registry
+from models.dataset import Dataset
+
+# points of the document deleted in bulk
+POINTS = int(os.environ.get('QDRANT_BENCHMARK_POINTS', '50000'))
+
+
+@pytest.fixture
+def vector_index(tmp_path):
+    app = Flask(__name__)
+    app.config.update({
+        'VECTOR_CLIENT_POOL_IDLE_TIMEOUT': 300,
+        'VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL': 30
+    })
+    with app.app_context():
+        config = QdrantConfig(endpoint='path:storage', api_key=None, root_path=str(tmp_path),
+                              upsert_batch_size=1000)
+        yield QdrantVectorIndex(dataset=Dataset(id=str(uuid.uuid4())), config=config,
+                                embeddings=FakeEmbeddings(size=8))
+        qdrant_local_registry.clear()
+
+
+def test_delete_by_ids(vector_index, capsys):
+    """Delete the points of a large document in bulk and time it against a delete request per id."""
+    documents = [
+        Document(page_content=f'text {i}', metadata={'doc_id': str(uuid.uuid4()), 'document_id': 'document_id'})
+        for i in range(POINTS)
+    ]
+
+    start = time.perf_counter()
+    vector_index.create(documents)
+    created = time.perf_counter() - start
+
+    doc_ids = [document.metadata['doc_id'] for document in documents]
+    vector_store = vector_index._get_vector_store()
+    per_id_count = 100
+    start = time.perf_counter()
+    for doc_id in doc_ids[:per_id_count]:
+        vector_store.del_texts(models.Filter(must=[
+            models.FieldCondition(key="metadata.doc_id", match=models.MatchValue(value=doc_id))
+        ]))
+    per_id = (time.perf_counter() - start) / per_id_count
+
+    start = time.perf_counter()
+    vector_index.delete_by_ids(doc_ids[per_id_count:])
+    bulk = (time.perf_counter() - start) / (len(doc_ids) - per_id_count)
+
+    client = vector_index._get_client()
+    assert client.count(vector_index.get_index_name(vector_index.dataset)).count == 0
+    with capsys.disabled():
+        print(f'\nupsert {POINTS} points: {created:.2f} s, delete per point by id: {per_id * 1000:.3f} ms, '
+              f'in bulk: {bulk * 1000:.3f} ms')
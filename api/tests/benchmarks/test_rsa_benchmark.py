@@ -0,0 +1,40 @@
+import os
+import time
+
+import pytest
+from Crypto.PublicKey import RSA
+
+from libs import rsa
+
+# number of decrypted credentials
+ROUNDS = int(os.environ.get('RSA_BENCHMARK_ROUNDS', '100'))
+
+
+@pytest.fixture
+def public_key(mocker):
+    private_key = RSA.generate(2048)
+    mocker.patch('libs.rsa.storage').load.return_value = private_key.export_key()
+    mocker.patch('libs.rsa.redis_client').get.return_value = None
+
+    rsa.clear_decrypt_cache()
+    yield private_key.publickey().export_key()
+    rsa.clear_decrypt_cache()
+
+
+def test_decrypt(public_key, capsys):
+    """Decrypt the same credential of a tenant, with the private key and the decrypted texts cached or not."""
+    encrypted_text = rsa.encrypt('sk-secret', public_key)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        rsa.clear_decrypt_cache()
+        assert rsa.decrypt(encrypted_text, 'tenant_id') == 'sk-secret'
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        assert rsa.decrypt(encrypted_text, 'tenant_id') == 'sk-secret'
+    cached = time.perf_counter() - start
+
+    with capsys.disabled():
+        print(f'\ndecrypt {ROUNDS} times, uncached: {uncached * 1000:.0f} ms, cached: {cached * 1000:.3f} ms')
@@ -0,0 +1,73 @@
+import os
+import random
+import string
+import time
+
+import pytest
+import tiktoken
+from flask import Flask
+
+from core.tokenizer_service import TokenizerService
+
+# size of the generated corpus
+CORPUS_MB = float(os.environ.get('TOKENIZER_BENCHMARK_CORPUS_MB', '50'))
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({'TOKENIZER_CACHE_SIZE': 1000000})
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def encoding():
+    # byte level encoding built offline, the real ones are downloaded on first use
+    return tiktoken.Encoding(
+        name='bytes',
+        pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+
+
+def generate_corpus(size: int) -> list[str]:
+    rng = random.Random(0)
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(50000)]
+
+    corpus = []
+    corpus_size = 0
+    while corpus_size < size:
+        # numbered, no chunk repeats
+        segment = f'{len(corpus)} ' + ' '.join(rng.choices(words, k=rng.randint(50, 200)))
+        corpus.append(segment)
+        corpus_size += len(segment)
+
+    return corpus
+
+
+def test_count_many(app, encoding, mocker, capsys):
+    """Count a corpus text by text, then with the batched counting of the service, then once again memoized."""
+    corpus = generate_corpus(int(CORPUS_MB * 1024 * 1024))
+    mocker.patch.object(TokenizerService, '_load_encoder', return_value=lambda texts: [
+        len(token_ids) for token_ids in encoding.encode_ordinary_batch(texts)
+    ])
+
+    start = time.perf_counter()
+    expected = [len(encoding.encode_ordinary(text)) for text in corpus]
+    text_by_text = time.perf_counter() - start
+
+    service = TokenizerService()
+    start = time.perf_counter()
+    assert service.count_many(corpus) == expected
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert service.count_many(corpus) == expected
+    memoized = time.perf_counter() - start
+
+    assert service.stats()['hits'] == len(corpus)
+    with capsys.disabled():
+        print(f'\ncount {CORPUS_MB:.0f} MB in {len(corpus)} texts, text by text: {text_by_text * 1000:.0f} ms, '
+              f'batched: {batched * 1000:.0f} ms, memoized: {memoized * 1000:.0f} ms')
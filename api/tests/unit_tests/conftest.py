@@ -0,0 +1,78 @@
+import re
+import uuid
+
+import pytest
+from flask import Flask
+from sqlalchemy import MetaData, event, inspect, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import DefaultClause
+from sqlalchemy.sql.elements import TextClause
+
+from extensions.ext_database import db
+
+
+@compiles(UUID, 'sqlite')
+def compile_uuid(type_, compiler, **kw):
+    return 'VARCHAR(36)'
+
+
+@compiles(JSONB, 'sqlite')
+def compile_jsonb(type_, compiler, **kw):
+    return 'JSON'
+
+
+def _to_sqlite_default(server_default: DefaultClause) -> DefaultClause:
+    if not isinstance(server_default.arg, TextClause):
+        # literal values and e.g. db.func.current_timestamp()
+        return server_default
+
+    sql = server_default.arg.text
+    if sql == 'uuid_generate_v4()':
+        sql = 'lower(hex(randomblob(16)))'
+    elif sql.startswith('CURRENT_TIMESTAMP'):
+        return DefaultClause(text('CURRENT_TIMESTAMP'))
+
+    # e.g. 'normal'::character varying
+    sql = re.sub(r"::[a-z ]+$", '', sql)
+    return DefaultClause(text(f'({sql})'))
+
+
+def _generate_uuid_primary_keys(session, flush_context, instances):
+    # sqlite can not return the primary keys generated by the database, they are generated on flush instead
+    for instance in session.new:
+        primary_key = inspect(instance).mapper.primary_key
+        if len(primary_key) == 1 and isinstance(primary_key[0].type, UUID) \
+                and getattr(instance, primary_key[0].key) is None:
+            setattr(instance, primary_key[0].key, str(uuid.uuid4()))
+
+
+@pytest.fixture
+def sqlite_app(tmp_path):
+    """
+    An app context of a sqlite database holding the tables of the imported models,
+    their postgres types and server defaults translated.
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "db.sqlite"}'
+    db.init_app(app)
+
+    metadata = MetaData()
+    for table in db.metadata.tables.values():
+        table = table.to_metadata(metadata)
+        for column in table.columns:
+            if column.server_default is not None:
+                column.server_default = _to_sqlite_default(column.server_default)
+
+    event.listen(Session, 'before_flush', _generate_uuid_primary_keys)
+    try:
+        with app.app_context():
+            # streamed reads do not block writes and read a snapshot, as in postgres
+            db.session.execute(text('PRAGMA journal_mode=WAL'))
+            metadata.create_all(db.engine)
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        event.remove(Session, 'before_flush', _generate_uuid_primary_keys)
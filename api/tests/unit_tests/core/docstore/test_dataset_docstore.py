@@ -0,0 +1,108 @@
+from unittest.mock import MagicMock
+
+import pytest
+from langchain.schema import Document
+
+from core.docstore.dataset_docstore import DatesetDocumentStore
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment
+
+DATASET_ID = '00000000-0000-0000-0000-000000000000'
+
+
+@pytest.fixture
+def dataset(sqlite_app, mocker) -> Dataset:
+    # several batches in a call
+    mocker.patch('core.docstore.dataset_docstore.SEGMENT_BATCH_SIZE', 2)
+
+    dataset = Dataset(id=DATASET_ID, tenant_id='tenant_id', name='dataset', provider='vendor',
+                      permission='only_me', indexing_technique='economy', created_by='account_id')
+    db.session.add_all([
+        dataset,
+        add_segment('document_1', 1, 'node_1'),
+        add_segment('document_1', 2, 'node_2'),
+        add_segment('document_2', 7, 'node_3')
+    ])
+    db.session.commit()
+    return dataset
+
+
+def add_segment(document_id: str, position: int, index_node_id: str) -> DocumentSegment:
+    return DocumentSegment(tenant_id='tenant_id', dataset_id=DATASET_ID, document_id=document_id, position=position,
+                           content=f'content of {index_node_id}', word_count=0, tokens=0,
+                           index_node_id=index_node_id, index_node_hash=f'hash of {index_node_id}',
+                           created_by='account_id')
+
+
+def get_document(doc_id: str, content: str, **metadata) -> Document:
+    return Document(page_content=content, metadata={'doc_id': doc_id, 'doc_hash': f'hash of {content}', **metadata})
+
+
+def get_segments(document_id: str) -> dict:
+    db.session.expire_all()
+    return {
+        segment.index_node_id: segment
+        for segment in db.session.query(DocumentSegment).filter(DocumentSegment.document_id == document_id).all()
+    }
+
+
+def test_add_documents(dataset):
+    docstore = DatesetDocumentStore(dataset=dataset, user_id='account_id', document_id='document_1')
+
+    docstore.add_documents([
+        get_document('node_4', 'new text'),
+        get_document('node_2', 'updated text'),
+        get_document('node_5', 'new question', answer='new answer'),
+        get_document('node_6', 'more text'),
+    ])
+
+    segments = get_segments('document_1')
+    assert {index_node_id: segment.position for index_node_id, segment in segments.items()} == {
+        'node_1': 1, 'node_2': 2, 'node_4': 3, 'node_5': 4, 'node_6': 5
+    }
+
+    updated_segment = segments['node_2']
+    assert (updated_segment.content, updated_segment.index_node_hash, updated_segment.word_count) == \
+           ('updated text', 'hash of updated text', len('updated text'))
+
+    new_segment = segments['node_5']
+    assert (new_segment.content, new_segment.answer, new_segment.index_node_hash) == \
+           ('new question', 'new answer', 'hash of new question')
+    assert (new_segment.tenant_id, new_segment.dataset_id, new_segment.created_by) == \
+           ('tenant_id', DATASET_ID, 'account_id')
+    assert (new_segment.enabled, new_segment.hit_count, new_segment.tokens) == (False, 0, 0)
+
+    assert segments['node_1'].content == 'content of node_1'
+    assert {index_node_id: segment.position for index_node_id, segment in get_segments('document_2').items()} == {
+        'node_3': 7
+    }
+
+
+def test_add_documents_of_new_document(dataset, mocker):
+    dataset.indexing_technique = 'high_quality'
+    embedding_model = MagicMock()
+    embedding_model.get_num_tokens_batch.side_effect = lambda texts: [len(text.split()) for text in texts]
+    mocker.patch('core.docstore.dataset_docstore.ModelFactory.get_embedding_model', return_value=embedding_model)
+    docstore = DatesetDocumentStore(dataset=dataset, user_id='account_id', document_id='document_3')
+
+    docstore.add_documents([get_document('node_7', 'first text'), get_document('node_8', 'second longer text')])
+
+    segments = get_segments('document_3')
+    assert {index_node_id: (segment.position, segment.tokens) for index_node_id, segment in segments.items()} == {
+        'node_7': (1, 2), 'node_8': (2, 3)
+    }
+
+
+def test_add_documents_without_update(dataset):
+    docstore = DatesetDocumentStore(dataset=dataset, user_id='account_id', document_id='document_1')
+
+    with pytest.raises(ValueError, match='node_2 already exists'):
+        docstore.add_documents([get_document('node_4', 'new text'), get_document('node_2', 'updated text')],
+                               allow_update=False)
+
+    segments = get_segments('document_1')
+    assert set(segments) == {'node_1', 'node_2'}
+    assert segments['node_2'].content == 'content of node_2'
+
+    docstore.add_documents([get_document('node_4', 'new text')], allow_update=False)
+    assert get_segments('document_1')['node_4'].position == 3
@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.embedding.cached_embedding import CacheEmbedding
+from extensions.ext_database import db
+from libs import helper
+from models.dataset import Embedding
+
+VECTORS = {
+    'apple': [3.0, 4.0],
+    'banana': [1.0, 0.0],
+    'cherry': [0.0, 2.0],
+    'durian': [5.0, 12.0]
+}
+
+
+@pytest.fixture
+def embeddings(sqlite_app, mocker) -> MagicMock:
+    sqlite_app.config['EMBEDDING_STORAGE_FORMAT'] = 'float32'
+    # several lookups and inserts in a call
+    mocker.patch('core.embedding.cached_embedding.EMBEDDING_CACHE_BATCH_SIZE', 2)
+
+    embedding = Embedding(model_name='text-embedding-ada-002', hash=helper.generate_text_hash('banana'))
+    embedding.set_embedding(VECTORS['banana'])
+    db.session.add(embedding)
+    db.session.commit()
+
+    embeddings = MagicMock()
+    embeddings.name = 'text-embedding-ada-002'
+    embeddings.client.embed_documents.side_effect = lambda texts: [VECTORS[text] for text in texts]
+    return embeddings
+
+
+def normalized(text: str) -> list:
+    x, y = VECTORS[text]
+    norm = (x ** 2 + y ** 2) ** 0.5
+    return [pytest.approx(x / norm), pytest.approx(y / norm)]
+
+
+def test_embed_documents(embeddings):
+    texts = ['apple', 'banana', 'apple', 'cherry', 'banana', 'durian', 'cherry']
+
+    results = CacheEmbedding(embeddings).embed_documents(texts)
+
+    # in the order of the input texts, the missing texts embedded once
+    assert results == [normalized(text) for text in texts]
+    embeddings.client.embed_documents.assert_called_once_with(['apple', 'cherry', 'durian'])
+
+    saved_embeddings = {embedding.hash: embedding.get_embedding() for embedding in db.session.query(Embedding).all()}
+    assert saved_embeddings == {helper.generate_text_hash(text): normalized(text) for text in VECTORS}
+
+
+def test_embed_cached_documents(embeddings):
+    CacheEmbedding(embeddings).embed_documents(['apple', 'cherry'])
+    embeddings.client.embed_documents.reset_mock()
+
+    results = CacheEmbedding(embeddings).embed_documents(['cherry', 'banana', 'apple', 'cherry'])
+
+    assert results == [normalized(text) for text in ['cherry', 'banana', 'apple', 'cherry']]
+    embeddings.client.embed_documents.assert_not_called()
+
+
+def test_embed_documents_of_another_model(embeddings):
+    embeddings.name = 'embed-english-v2.0'
+
+    CacheEmbedding(embeddings).embed_documents(['banana', 'apple'])
+
+    embeddings.client.embed_documents.assert_called_once_with(['banana', 'apple'])
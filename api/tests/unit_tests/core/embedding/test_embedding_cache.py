@@ -0,0 +1,47 @@
+import pytest
+from flask import Flask
+
+from core.embedding.embedding_cache import EmbeddingCache
+from libs.embedding_codec import encode_embedding
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({
+        'EMBEDDING_CACHE_SIZE': 2,
+        'EMBEDDING_CACHE_REDIS_ENABLED': True,
+        'EMBEDDING_CACHE_REDIS_TTL': 600
+    })
+    with app.app_context():
+        yield app
+
+
+def test_local_lru_cache(app, mocker):
+    mocker.patch('extensions.ext_redis.redis_client.get', return_value=None)
+    mocker.patch('extensions.ext_redis.redis_client.setex')
+
+    cache = EmbeddingCache()
+    cache.set('model', 'a', [0.1])
+    cache.set('model', 'b', [0.2])
+    cache.set('model', 'c', [0.3])
+
+    assert cache.get('model', 'c') == [0.3]
+    # evicted from the local tier and not in redis
+    assert cache.get('model', 'a') is None
+
+    stats = cache.stats()
+    assert stats['local_hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['local_size'] == 2
+
+
+def test_redis_tier(app, mocker):
+    mocker.patch('extensions.ext_redis.redis_client.get', return_value=encode_embedding([0.5, 0.25]))
+
+    cache = EmbeddingCache()
+
+    assert cache.get('model', 'a') == [0.5, 0.25]
+    assert cache.get('model', 'a') == [0.5, 0.25]
+    assert cache.stats()['redis_hits'] == 1
+    assert cache.stats()['local_hits'] == 1
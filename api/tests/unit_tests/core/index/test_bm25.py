@@ -0,0 +1,39 @@
+from core.index.keyword_table_index.bm25 import bm25_scores
+
+
+def test_rare_keyword_ranks_higher():
+    postings = [
+        ('common', 'a', 1, 10),
+        ('common', 'b', 1, 10),
+        ('common', 'c', 1, 10),
+        ('rare', 'c', 1, 10),
+    ]
+
+    scores = bm25_scores(postings, total_count=3, average_length=10)
+
+    assert scores['c'] > scores['a']
+    assert scores['a'] == scores['b']
+
+
+def test_term_frequency_and_length_normalization():
+    postings = [
+        ('keyword', 'short', 2, 5),
+        ('keyword', 'long', 2, 50),
+        ('keyword', 'once', 1, 5),
+    ]
+
+    scores = bm25_scores(postings, total_count=10, average_length=20)
+
+    assert scores['short'] > scores['long']
+    assert scores['short'] > scores['once']
+
+
+def test_unknown_length_uses_average():
+    postings = [
+        ('keyword', 'legacy', 1, 0),
+        ('keyword', 'average', 1, 20),
+    ]
+
+    scores = bm25_scores(postings, total_count=10, average_length=20)
+
+    assert scores['legacy'] == scores['average']
@@ -0,0 +1,63 @@
+import pytest
+from langchain.schema import Document
+from sqlalchemy import true
+
+from core.index.keyword_table_index.keyword_table_index import KeywordTableIndex
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment
+
+DATASET_ID = '00000000-0000-0000-0000-000000000000'
+
+
+def add_segment(position: int, document_id: str, content: str) -> Document:
+    db.session.add(DocumentSegment(
+        id=f'00000000-0000-0000-0000-{position:012d}', tenant_id='tenant_id', dataset_id=DATASET_ID,
+        document_id=document_id, position=position, content=content, word_count=len(content), tokens=len(content),
+        index_node_id=f'node_{position}', index_node_hash=f'hash_{position}', created_by='account_id'
+    ))
+
+    return Document(page_content=content, metadata={'doc_id': f'node_{position}', 'document_id': document_id})
+
+
+def recomputed_stats(index: KeywordTableIndex) -> tuple:
+    total_count, length_count, length_sum = index._get_postings_stats(true())
+    return total_count, length_sum / length_count if length_count else 0.0
+
+
+@pytest.mark.filterwarnings('error::sqlalchemy.exc.SAWarning')
+def test_keyword_index_stats_kept_on_writes(sqlite_app):
+    dataset = Dataset(id=DATASET_ID, tenant_id='tenant_id', name='dataset', provider='vendor',
+                      permission='only_me', indexing_technique='economy', created_by='account_id')
+    db.session.add(dataset)
+    texts = [
+        add_segment(1, 'document_1', 'apple banana cherry apple'),
+        add_segment(2, 'document_1', 'banana durian elderberry fig grape'),
+        add_segment(3, 'document_2', 'cherry honeydew'),
+        add_segment(4, 'document_2', 'kiwi lemon mango nectarine orange papaya')
+    ]
+    db.session.commit()
+
+    index = KeywordTableIndex(dataset)
+    assert index._get_keyword_index_stats() == (0, 0.0)
+
+    index.add_texts(texts)
+    total_count, average_length = index._get_keyword_index_stats()
+    assert total_count == 4
+    assert (total_count, average_length) == recomputed_stats(index)
+
+    # re-indexed chunks are counted once
+    index.add_texts([Document(page_content='apple quince', metadata=texts[0].metadata)])
+    index.update_segment_keywords_index('node_3', ['raspberry'])
+    assert index._get_keyword_index_stats() == recomputed_stats(index)
+    assert index._get_keyword_index_stats()[0] == 4
+
+    index.delete_by_ids(['node_2', 'node_missing'])
+    assert index._get_keyword_index_stats() == recomputed_stats(index)
+    assert index._get_keyword_index_stats()[0] == 3
+
+    index.delete_by_document_id('document_2')
+    assert index._get_keyword_index_stats() == recomputed_stats(index)
+    assert index._get_keyword_index_stats()[0] == 1
+
+    index.delete()
+    assert index._get_keyword_index_stats() == (0, 0.0)
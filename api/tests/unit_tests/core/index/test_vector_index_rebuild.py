@@ -0,0 +1,286 @@
+import json
+from typing import Optional
+
+import pytest
+from langchain.embeddings import FakeEmbeddings
+from langchain.schema import Document
+
+from core.index.vector_index.base import BaseVectorIndex
+from core.index.vector_index.vector_index import VectorIndex
+from core.vector_store.qdrant_local_registry import qdrant_local_registry
+from extensions.ext_database import db
+from models.dataset import Dataset, DatasetCollectionBinding, DocumentSegment
+from models.dataset import Document as DatasetDocument
+
+DATASET_ID = '00000000-0000-0000-0000-000000000000'
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def get(self, name: str) -> Optional[bytes]:
+        value = self.values.get(name)
+        return value.encode('utf-8') if value is not None else None
+
+    def setex(self, name: str, time: int, value):
+        self.values[name] = str(value)
+
+    def hgetall(self, name: str) -> dict:
+        return {key.encode('utf-8'): value.encode('utf-8') for key, value in self.hashes.get(name, {}).items()}
+
+    def hget(self, name: str, key: str) -> Optional[bytes]:
+        value = self.hashes.get(name, {}).get(key)
+        return value.encode('utf-8') if value is not None else None
+
+    def hset(self, name: str, key: str = None, value=None, mapping: dict = None):
+        values = self.hashes.setdefault(name, {})
+        if key is not None:
+            values[key] = str(value)
+        values.update({key: str(value) for key, value in (mapping or {}).items()})
+
+    def expire(self, name: str, time: int):
+        pass
+
+    def delete(self, name: str):
+        self.values.pop(name, None)
+        self.hashes.pop(name, None)
+
+
+@pytest.fixture
+def app(sqlite_app, tmp_path, mocker):
+    sqlite_app.root_path = str(tmp_path)
+    sqlite_app.config.update({
+        'VECTOR_STORE': 'qdrant',
+        'QDRANT_URL': 'path:storage',
+        'QDRANT_API_KEY': None,
+        'QDRANT_UPSERT_BATCH_SIZE': 64,
+        'QDRANT_UPSERT_PARALLELISM': 1,
+        'VECTOR_CLIENT_POOL_IDLE_TIMEOUT': 300,
+        'VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL': 30,
+        'VECTOR_INDEX_REBUILD_BATCH_SIZE': 2
+    })
+    mocker.patch('core.index.vector_index.base.redis_client', FakeRedis())
+    yield sqlite_app
+    qdrant_local_registry.clear()
+
+
+@pytest.fixture
+def dataset(app) -> Dataset:
+    dataset = Dataset(id=DATASET_ID, tenant_id='tenant_id', name='dataset', provider='vendor', permission='only_me',
+                      indexing_technique='high_quality', created_by='account_id')
+    db.session.add(dataset)
+    add_document('document_id')
+    for position in range(1, 7):
+        add_segment(position)
+    db.session.commit()
+
+    return dataset
+
+
+def add_document(document_id: str, archived: bool = False):
+    db.session.add(DatasetDocument(
+        id=document_id, tenant_id='tenant_id', dataset_id=DATASET_ID, position=1, data_source_type='upload_file',
+        batch='batch', name='document', created_from='web', created_by='account_id', indexing_status='completed',
+        enabled=True, archived=archived
+    ))
+
+
+def add_segment(position: int, document_id: str = 'document_id', enabled: bool = True) -> DocumentSegment:
+    segment = DocumentSegment(
+        id=segment_id(position), tenant_id='tenant_id', dataset_id=DATASET_ID,
+        document_id=document_id, position=position, content=f'segment {position}', word_count=2, tokens=2,
+        index_node_id=node_id(position), index_node_hash=f'hash_{position}', status='completed', enabled=enabled,
+        created_by='account_id'
+    )
+    db.session.add(segment)
+    return segment
+
+
+def segment_id(position: int) -> str:
+    # sorted by position
+    return f'00000000-0000-0000-0000-{position:012d}'
+
+
+def node_id(position: int) -> str:
+    # point ids of qdrant
+    return f'10000000-0000-0000-0000-{position:012d}'
+
+
+def to_document(segment: DocumentSegment) -> Document:
+    return Document(page_content=segment.content, metadata={
+        'doc_id': segment.index_node_id,
+        'doc_hash': segment.index_node_hash,
+        'document_id': segment.document_id,
+        'dataset_id': segment.dataset_id
+    })
+
+
+def get_vector_index(dataset: Dataset) -> VectorIndex:
+    from flask import current_app
+    return VectorIndex(dataset=dataset, config=current_app.config, embeddings=FakeEmbeddings(size=8))
+
+
+def get_indexed_documents(vector_index: VectorIndex, collection_name: str) -> dict:
+    points, _ = vector_index._get_client().scroll(collection_name, limit=100, with_payload=True)
+    return {point.payload['metadata']['doc_id']: point.payload['page_content'] for point in points}
+
+
+def test_iter_segment_batches(dataset):
+    # excluded: disabled segments and segments of archived documents
+    add_segment(7, enabled=False)
+    add_document('archived_document_id', archived=True)
+    add_segment(8, document_id='archived_document_id')
+    db.session.commit()
+
+    vector_index = get_vector_index(dataset)._vector_index
+    batches = list(vector_index._iter_segment_batches(dataset))
+    assert [[document.metadata['doc_id'] for document in documents] for _, documents in batches] == [
+        [node_id(1), node_id(2)], [node_id(3), node_id(4)], [node_id(5), node_id(6)]
+    ]
+    assert [last_segment_id for last_segment_id, _ in batches] == [segment_id(2), segment_id(4), segment_id(6)]
+    assert batches[0][1][0] == to_document(db.session.get(DocumentSegment, segment_id(1)))
+
+    # resumed after the last segment of a batch
+    resumed_batches = list(vector_index._iter_segment_batches(dataset, after_segment_id=batches[0][0]))
+    assert resumed_batches == batches[1:]
+
+
+def test_recreate_dataset_with_concurrent_writes(dataset, mocker):
+    vector_index = get_vector_index(dataset)
+    segments = db.session.query(DocumentSegment).order_by(DocumentSegment.id).all()
+    vector_index.add_texts([to_document(segment) for segment in segments])
+    origin_collection_name = dataset.index_struct_dict['vector_store']['class_prefix']
+
+    # an indexing task of another process, holding the dataset loaded before the switch
+    writer_index = get_vector_index(Dataset(id=DATASET_ID, tenant_id='tenant_id', indexing_technique='high_quality',
+                                            index_struct=dataset.index_struct))
+    write_segment_batch = BaseVectorIndex._write_segment_batch
+
+    def write_segment_batch_during_writes(self, dataset, documents):
+        if documents[0].metadata['doc_id'] == node_id(1):
+            # added with an id sorted before the cursor
+            segment = add_segment(0)
+            db.session.commit()
+            writer_index.add_texts([to_document(segment)])
+
+            # disabled once read by the cursor
+            segments[0].enabled = False
+            db.session.commit()
+            writer_index.delete_by_ids([node_id(1)])
+
+            # updated and deleted before read by the cursor, their index writes preceding the copy
+            segments[2].content = 'segment 3 updated'
+            segments[2].index_node_hash = 'hash_3_updated'
+            db.session.delete(segments[4])
+            db.session.commit()
+            writer_index.delete_by_ids([node_id(3), node_id(5)])
+            writer_index.add_texts([to_document(segments[2])])
+
+        write_segment_batch(self, dataset, documents)
+
+    mocker.patch.object(BaseVectorIndex, '_write_segment_batch', write_segment_batch_during_writes)
+    vector_index.recreate_dataset(dataset)
+
+    collection_name = json.loads(db.session.get(Dataset, DATASET_ID).index_struct)['vector_store']['class_prefix']
+    assert collection_name != origin_collection_name
+    assert get_indexed_documents(vector_index, collection_name) == {
+        node_id(0): 'segment 0',
+        node_id(2): 'segment 2',
+        node_id(3): 'segment 3 updated',
+        node_id(4): 'segment 4',
+        node_id(6): 'segment 6'
+    }
+    assert get_indexed_documents(vector_index, origin_collection_name) == {}
+
+    # writers holding the replaced index struct keep writing to the rebuilt index
+    writer_index.delete_by_ids([node_id(6)])
+    assert node_id(6) not in get_indexed_documents(vector_index, collection_name)
+
+
+def test_recreate_dataset_resumed_from_checkpoint(dataset, mocker):
+    vector_index = get_vector_index(dataset)
+    vector_index.add_texts([to_document(segment) for segment in db.session.query(DocumentSegment).all()])
+    origin_index_struct = dataset.index_struct
+
+    write_segment_batch = BaseVectorIndex._write_segment_batch
+    written_batches = []
+    failures = [ConnectionError()]
+
+    def write_segment_batch_failing(self, dataset, documents):
+        # the third batch fails once
+        if len(written_batches) == 2 and failures:
+            raise failures.pop()
+        written_batches.append([document.metadata['doc_id'] for document in documents])
+        write_segment_batch(self, dataset, documents)
+
+    mocker.patch.object(BaseVectorIndex, '_write_segment_batch', write_segment_batch_failing)
+    with pytest.raises(ConnectionError):
+        vector_index.recreate_dataset(dataset)
+
+    # readers are kept on the current index until the rebuild completes
+    assert dataset.index_struct == origin_index_struct
+
+    vector_index.recreate_dataset(dataset)
+    assert written_batches == [[node_id(1), node_id(2)], [node_id(3), node_id(4)], [node_id(5), node_id(6)]]
+
+    collection_name = dataset.index_struct_dict['vector_store']['class_prefix']
+    assert sorted(get_indexed_documents(vector_index, collection_name)) == [node_id(i) for i in range(1, 7)]
+
+
+def test_recreate_dataset_abandoned_on_failed_mirrored_write(dataset, mocker):
+    vector_index = get_vector_index(dataset)
+    vector_index.add_texts([to_document(segment) for segment in db.session.query(DocumentSegment).all()])
+    origin_index_struct = dataset.index_struct
+
+    write_segment_batch = BaseVectorIndex._write_segment_batch
+
+    def write_segment_batch_during_failed_write(self, dataset, documents):
+        write_segment_batch(self, dataset, documents)
+        get_vector_index(dataset)._mirror_to_rebuild(mocker.Mock(side_effect=ConnectionError()))
+
+    mocker.patch.object(BaseVectorIndex, '_write_segment_batch', write_segment_batch_during_failed_write)
+    with pytest.raises(Exception, match='abandoned'):
+        vector_index.recreate_dataset(dataset)
+
+    assert dataset.index_struct == origin_index_struct
+
+
+def test_restore_dataset_in_one_resumed_from_checkpoint(dataset, mocker):
+    dataset_collection_binding = DatasetCollectionBinding(provider_name='openai', model_name='text-embedding-ada-002',
+                                                          collection_name='Vector_index_in_one_Node')
+    db.session.add(dataset_collection_binding)
+    db.session.commit()
+    dataset.collection_binding_id = dataset_collection_binding.id
+    vector_index = get_vector_index(dataset)._vector_index
+
+    # the collection shared with the other datasets
+    other_dataset = Dataset(id='20000000-0000-0000-0000-000000000000', tenant_id='tenant_id',
+                            indexing_technique='high_quality')
+    get_vector_index(other_dataset)._vector_index.create_with_collection_name([Document(
+        page_content='other segment', metadata={'doc_id': node_id(0), 'dataset_id': other_dataset.id}
+    )], 'Vector_index_in_one_Node')
+
+    add_texts = BaseVectorIndex.add_texts
+    deleted_ids = mocker.spy(vector_index, 'delete_by_ids')
+    failures = [ConnectionError()]
+
+    def add_texts_failing(self, texts, **kwargs):
+        # the second batch fails once, partly indexed
+        if texts[0].metadata['doc_id'] == node_id(3) and failures:
+            add_texts(self, texts[:1], **kwargs)
+            raise failures.pop()
+        add_texts(self, texts, **kwargs)
+
+    mocker.patch.object(BaseVectorIndex, 'add_texts', add_texts_failing)
+    with pytest.raises(ConnectionError):
+        vector_index.restore_dataset_in_one(dataset, dataset_collection_binding)
+    deleted_ids.assert_not_called()
+
+    vector_index.restore_dataset_in_one(dataset, dataset_collection_binding)
+
+    # resumed from the failed batch, replacing its indexed documents
+    deleted_ids.assert_called_once_with([node_id(3), node_id(4)])
+    points, _ = vector_index._get_client().scroll('Vector_index_in_one_Node', limit=100, with_payload=True)
+    assert sorted(point.payload['metadata']['doc_id'] for point in points) == [node_id(i) for i in range(0, 7)]
@@ -0,0 +1,183 @@
+import datetime
+from contextlib import contextmanager
+from typing import List, Optional
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import event
+
+from core.memory.read_only_conversation_token_db_buffer_shared_memory import \
+    ReadOnlyConversationTokenDBBufferSharedMemory
+from core.model_providers.models.entity.message import PromptMessage, MessageType, to_lc_messages
+from core.model_providers.models.llm.base import BaseLLM
+from events.event_handlers.clear_memory_cache_when_message_created import handle as handle_message_created
+from extensions.ext_database import db
+from models.model import App, Conversation, Message
+
+QUERIES_AND_ANSWERS = [
+    ('what is the weather like', 'it is sunny today'),
+    ('and tomorrow', 'it will rain all day long in the afternoon'),
+    ('should I take an umbrella', 'yes'),
+    ('thanks', 'you are welcome, have a nice day'),
+    ('bye', 'see you'),
+]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hget(self, name: str, key: str) -> Optional[bytes]:
+        value = self.hashes.get(name, {}).get(key)
+        return value.encode('utf-8') if value is not None else None
+
+    def hmget(self, name: str, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.hget(name, key) for key in keys]
+
+    def hset(self, name: str, key: str = None, value=None, mapping: dict = None):
+        values = self.hashes.setdefault(name, {})
+        if key is not None:
+            values[key] = str(value)
+        values.update({key: str(value) for key, value in (mapping or {}).items()})
+
+    def expire(self, name: str, time: int):
+        pass
+
+    def delete(self, name: str):
+        self.hashes.pop(name, None)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def get_num_tokens(messages: List[PromptMessage]) -> int:
+    return sum(len(message.content.split()) for message in messages)
+
+
+def get_model_instance() -> MagicMock:
+    model_instance = MagicMock(spec=BaseLLM)
+    model_instance.name = 'gpt-3.5-turbo'
+    model_instance.get_num_tokens.side_effect = get_num_tokens
+    return model_instance
+
+
+def add_message(conversation: Conversation, index: int, query: str, answer: str) -> Message:
+    message = Message(id=f'message_{index}', app_id=conversation.app_id, model_provider='openai',
+                      model_id='gpt-3.5-turbo', conversation_id=conversation.id, query=query, message=[],
+                      message_unit_price=0, answer=answer, answer_tokens=len(answer.split()), answer_unit_price=0,
+                      currency='USD', from_source='api',
+                      created_at=datetime.datetime(2023, 10, 1) + datetime.timedelta(minutes=index))
+    db.session.add(message)
+    db.session.commit()
+    return message
+
+
+@pytest.fixture
+def redis(mocker):
+    redis = FakeRedis()
+    mocker.patch('core.memory.read_only_conversation_token_db_buffer_shared_memory.redis_client', redis)
+    return redis
+
+
+@pytest.fixture
+def conversation(sqlite_app, redis) -> Conversation:
+    app_model = App(id='app_id', tenant_id='tenant_id', name='app', mode='chat', enable_site=True, enable_api=True,
+                    api_rpm=0, api_rph=0)
+    conversation = Conversation(id='conversation_id', app_id=app_model.id, app_model_config_id='app_model_config_id',
+                                model_provider='openai', model_id='gpt-3.5-turbo', mode='chat', name='conversation',
+                                status='normal', from_source='api')
+    db.session.add_all([app_model, conversation])
+    db.session.commit()
+
+    for index, (query, answer) in enumerate(QUERIES_AND_ANSWERS):
+        add_message(conversation, index, query, answer)
+
+    return conversation
+
+
+def get_memory(conversation: Conversation, model_instance: BaseLLM,
+               max_token_limit: int = 2000) -> ReadOnlyConversationTokenDBBufferSharedMemory:
+    return ReadOnlyConversationTokenDBBufferSharedMemory(
+        conversation=conversation,
+        model_instance=model_instance,
+        max_token_limit=max_token_limit,
+        return_messages=True
+    )
+
+
+def pop_and_recount(max_token_limit: int) -> list:
+    chat_messages = []
+    for query, answer in QUERIES_AND_ANSWERS:
+        chat_messages.append(PromptMessage(content=query, type=MessageType.USER))
+        chat_messages.append(PromptMessage(content=answer, type=MessageType.ASSISTANT))
+
+    while get_num_tokens(chat_messages) > max_token_limit and chat_messages:
+        chat_messages.pop(0)
+
+    return to_lc_messages(chat_messages)
+
+
+def test_pruned_history_matches_pop_and_recount(conversation):
+    memory = get_memory(conversation, get_model_instance())
+    total_tokens = sum(get_num_tokens([PromptMessage(content=text)])
+                       for query_and_answer in QUERIES_AND_ANSWERS for text in query_and_answer)
+
+    for max_token_limit in range(total_tokens + 2):
+        memory.max_token_limit = max_token_limit
+        assert memory.buffer == pop_and_recount(max_token_limit), max_token_limit
+
+
+def test_history_cached_until_message_created(conversation):
+    model_instance = get_model_instance()
+    assert len(get_memory(conversation, model_instance).buffer) == 10
+
+    with count_queries() as statements:
+        assert len(get_memory(conversation, model_instance).buffer) == 10
+    assert not [statement for statement in statements if 'FROM messages' in statement]
+
+    message = add_message(conversation, len(QUERIES_AND_ANSWERS), 'one more', 'question')
+    assert len(get_memory(conversation, model_instance).buffer) == 10
+
+    handle_message_created(message)
+    buffer = get_memory(conversation, model_instance, max_token_limit=3).buffer
+    assert [message.content for message in buffer] == ['one more', 'question']
+
+
+def test_token_counts_reused(conversation):
+    model_instance = get_model_instance()
+    get_memory(conversation, model_instance, max_token_limit=10).buffer
+    assert model_instance.get_num_tokens.call_count == len(QUERIES_AND_ANSWERS) * 2
+
+    get_memory(conversation, model_instance, max_token_limit=20).buffer
+    assert model_instance.get_num_tokens.call_count == len(QUERIES_AND_ANSWERS) * 2
+
+    # counted apart for another model
+    other_model_instance = get_model_instance()
+    other_model_instance.name = 'gpt-4'
+    get_memory(conversation, other_model_instance).buffer
+    assert other_model_instance.get_num_tokens.call_count == len(QUERIES_AND_ANSWERS) * 2
+
+
+def test_token_counts_saved_with_message(conversation):
+    model_instance = get_model_instance()
+    get_memory(conversation, model_instance).buffer
+    message = add_message(conversation, len(QUERIES_AND_ANSWERS), 'one more', 'question')
+
+    ReadOnlyConversationTokenDBBufferSharedMemory.save_token_counts(model_instance, message)
+    handle_message_created(message)
+    model_instance.get_num_tokens.reset_mock()
+
+    buffer = get_memory(conversation, model_instance).buffer
+    assert buffer[-1].content == 'question'
+    model_instance.get_num_tokens.assert_not_called()
@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+from core.callback_handler.llm_callback_handler import OutputModerationHandler, ModerationRule
+from core.moderation.base import ModerationOutputsResult, ModerationAction
+from core.moderation.keywords.keywords import KeywordsModeration
+
+
+def get_keywords_config(keywords: str) -> dict:
+    return {
+        'keywords': keywords,
+        'inputs_config': {'enabled': False},
+        'outputs_config': {'enabled': True, 'preset_response': 'blocked'}
+    }
+
+
+def test_keywords_moderation():
+    moderation = KeywordsModeration(app_id='app_id', tenant_id='tenant_id',
+                                    config=get_keywords_config('foo\nFoo Bar\na.b'))
+
+    assert moderation.moderation_for_outputs('this is FOO').flagged
+    assert moderation.moderation_for_outputs('say foo bar').flagged
+    assert moderation.moderation_for_outputs('a.b').flagged
+    # keywords are matched literally
+    assert not moderation.moderation_for_outputs('axb').flagged
+    assert not moderation.moderation_for_outputs('nothing here').flagged
+
+
+def get_handler(mocker, moderate) -> OutputModerationHandler:
+    handler = OutputModerationHandler(
+        tenant_id='tenant_id',
+        app_id='app_id',
+        rule=ModerationRule(type='keywords', config=get_keywords_config('secret')),
+        on_message_replace_func=MagicMock(),
+        incremental=True,
+        window_overlap=5
+    )
+    mocker.patch.object(OutputModerationHandler, 'moderation',
+                        side_effect=lambda tenant_id, app_id, moderation_buffer: moderate(moderation_buffer))
+    return handler
+
+
+def test_moderation_completion_checks_unmoderated_text(mocker):
+    handler = get_handler(mocker, lambda text: ModerationOutputsResult(flagged='secret' in text,
+                                                               action=ModerationAction.DIRECT_OUTPUT,
+                                                               preset_response='blocked'))
+    handler.buffer = 'a' * 100
+    handler.moderated_length = 100
+
+    completion = 'a' * 100 + ' secret'
+    assert handler.moderation_completion(completion) == 'blocked'
+    handler.moderation.assert_called_once_with(tenant_id='tenant_id', app_id='app_id',
+                                               moderation_buffer='aaaaa secret')
+
+
+def test_moderation_completion_rechecks_changed_text(mocker):
+    handler = get_handler(mocker, lambda text: ModerationOutputsResult(flagged=False, action=ModerationAction.DIRECT_OUTPUT))
+    handler.buffer = 'a' * 100
+    handler.moderated_length = 100
+
+    completion = 'b' * 120
+    assert handler.moderation_completion(completion) == completion
+    handler.moderation.assert_called_once_with(tenant_id='tenant_id', app_id='app_id', moderation_buffer=completion)
+
+
+def test_overridden_window_moderated_as_a_whole(mocker):
+    handler = get_handler(mocker, lambda text: ModerationOutputsResult(flagged=True, action=ModerationAction.OVERRIDED,
+                                                               text=text.upper()))
+    handler.buffer = 'a' * 100
+    handler.moderated_length = 100
+
+    completion = 'a' * 100 + 'b'
+    assert handler.moderation_completion(completion) == completion.upper()
+    assert handler.moderation.call_count == 2
@@ -0,0 +1,104 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from core.model_providers.models.entity.model_params import ModelMode
+from core.prompt.prompt_template import PromptTemplateParser
+from core.prompt.prompt_transform import PromptTransform
+from models.model import AppModelConfig
+
+
+def test_prompt_template_format():
+    prompt_template = PromptTemplateParser(template='{{name}} asks {{#query#}} about {{topic}} {{name}}')
+
+    assert prompt_template.variable_keys == ['name', '#query#', 'topic', 'name']
+    # missing inputs are kept, template variables in values are escaped
+    assert prompt_template.format({'name': 'Bob', '#query#': '{{topic}}'}) == 'Bob asks {topic} about {topic} Bob'
+    assert prompt_template.format({'name': 'Bob'}, remove_template_variables=False) \
+           == 'Bob asks {{#query#}} about {{topic}} Bob'
+
+
+def get_model_instance(model_mode: ModelMode) -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.model_mode = model_mode
+    model_instance.model_rules.max_tokens.max = 4096
+    model_instance.model_kwargs.max_tokens = 256
+    model_instance.get_num_tokens.return_value = 10
+    return model_instance
+
+
+def get_memory() -> MagicMock:
+    memory = MagicMock()
+    memory.memory_variables = ['chat_history']
+    memory.load_memory_variables.return_value = {'chat_history': 'Human: hi\nAssistant: hello'}
+    return memory
+
+
+def test_pre_prompt_built_once_with_context_and_memory():
+    prompt_transform = PromptTransform()
+    kwargs = {
+        'app_mode': 'chat',
+        'pre_prompt': 'Translate to {{language}}.',
+        'inputs': {'language': 'French'},
+        'query': 'bonjour',
+        'files': [],
+        'model_instance': get_model_instance(ModelMode.COMPLETION)
+    }
+
+    with patch.object(PromptTemplateParser, 'format', autospec=True,
+                      side_effect=PromptTemplateParser.format) as format_:
+        # token validation, then the final llm with the context and memory of a dataset chat app
+        prompt_transform.get_prompt(**kwargs, context=None, memory=None)
+        prompt_messages, stops = prompt_transform.get_prompt(**kwargs, context='the context', memory=get_memory())
+
+        pre_prompt_formats = [call for call in format_.call_args_list if call.args[0].template == kwargs['pre_prompt']]
+        assert len(pre_prompt_formats) == 1
+
+        prompt_transform.get_prompt(**{**kwargs, 'inputs': {'language': 'German'}}, context=None, memory=None)
+        pre_prompt_formats = [call for call in format_.call_args_list if call.args[0].template == kwargs['pre_prompt']]
+        assert len(pre_prompt_formats) == 2
+
+    content = prompt_messages[0].content
+    assert 'the context' in content
+    assert 'Translate to French.\n' in content
+    assert 'Human: hi\nAssistant: hello' in content
+    assert content.endswith('Human: bonjour\n\nAssistant: ')
+    assert stops == ['\nHuman:', '</histories>']
+
+
+def test_advanced_prompt_built_once_per_config_version():
+    app_model_config = AppModelConfig(
+        id='app_model_config_id',
+        updated_at=datetime(2023, 11, 1),
+        prompt_type='advanced',
+        model=json.dumps({'provider': 'openai', 'name': 'gpt-3.5-turbo-instruct', 'mode': 'completion'}),
+        completion_prompt_config=json.dumps({
+            'prompt': {'text': '{{#context#}}\n{{#histories#}}\nTranslate to {{language}}: {{#query#}}'},
+            'conversation_histories_role': {'user_prefix': 'Human', 'assistant_prefix': 'Assistant'}
+        })
+    )
+    prompt_transform = PromptTransform()
+    kwargs = {
+        'app_mode': 'chat',
+        'app_model_config': app_model_config,
+        # template variables in inputs are not formatted later
+        'inputs': {'language': 'French {{#context#}}'},
+        'query': 'bonjour',
+        'files': [],
+        'model_instance': get_model_instance(ModelMode.COMPLETION)
+    }
+
+    with patch.object(PromptTemplateParser, 'format_partial', autospec=True,
+                      side_effect=PromptTemplateParser.format_partial) as format_partial:
+        prompt_messages = prompt_transform.get_advanced_prompt(**kwargs, context=None, memory=None)
+        assert prompt_messages[0].content == '\n\nTranslate to French {#context#}: bonjour'
+
+        prompt_messages = prompt_transform.get_advanced_prompt(**kwargs, context='the context', memory=get_memory())
+        assert prompt_messages[0].content == \
+               'the context\nHuman: hi\nAssistant: hello\nTranslate to French {#context#}: bonjour'
+        assert format_partial.call_count == 1
+
+        # an updated config is formatted again
+        app_model_config.updated_at = datetime(2023, 11, 2)
+        prompt_transform.get_advanced_prompt(**kwargs, context=None, memory=None)
+        assert format_partial.call_count == 2
@@ -0,0 +1,80 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.callback_handler.entity.agent_loop import AgentLoop
+from core.callback_handler.entity.chain_result import ChainResult
+from core.callback_handler.entity.dataset_query import DatasetQueryObj
+from core.completion import Completion
+from core.model_providers.error import LLMBadRequestError
+from extensions.ext_database import db
+from models.account import Account
+from models.dataset import DatasetQuery
+from models.model import App, AppModelConfig, Message, MessageAgentThought, MessageChain
+
+
+@pytest.fixture
+def app(sqlite_app):
+    sqlite_app.config.update({
+        'STREAMING_FLUSH_SIZE': 64,
+        'STREAMING_FLUSH_INTERVAL': 0.05,
+        'STREAMING_STOP_CHECK_INTERVAL': 0.2
+    })
+    return sqlite_app
+
+
+def run_agent(conversation_message_task, query):
+    message_chain = conversation_message_task.init_chain(ChainResult(type='AgentExecutor', prompt={'input': query}))
+    agent_loop = AgentLoop(position=1, thought='search the dataset', tool_name='dataset', tool_input=query)
+    conversation_message_task.on_agent_start(message_chain, agent_loop)
+    conversation_message_task.on_dataset_query_end(DatasetQueryObj(dataset_id='dataset_id', query=query))
+
+
+def test_deferred_records_saved_when_final_llm_fails(app, mocker):
+    app_model = App(id='app_id', tenant_id='tenant_id', name='app', mode='completion', icon='', icon_background='',
+                    enable_site=True, enable_api=True)
+    app_model_config = AppModelConfig(
+        id='app_model_config_id',
+        app_id=app_model.id,
+        provider='openai',
+        model_id='gpt-3.5-turbo-instruct',
+        configs={},
+        model=json.dumps({'provider': 'openai', 'name': 'gpt-3.5-turbo-instruct', 'completion_params': {}}),
+        agent_mode=json.dumps({'enabled': True}),
+        pre_prompt=''
+    )
+    user = Account(id='account_id', name='account', email='account@example.com')
+
+    model_instance = MagicMock()
+    model_instance.get_currency.return_value = 'USD'
+    mocker.patch('core.completion.ModelFactory.get_text_generation_model_from_model_config',
+                 return_value=model_instance)
+    redis_client = mocker.patch('core.conversation_message_task.redis_client')
+    redis_client.get.return_value = None
+    mocker.patch.object(Completion, 'get_validate_rest_tokens', return_value=1000)
+    mocker.patch.object(Completion, 'moderation_for_inputs', side_effect=lambda *args: args[3:])
+    mocker.patch.object(Completion, 'get_query_for_agent', side_effect=lambda app, config, query, inputs: query)
+    mocker.patch.object(Completion, 'run_final_llm', side_effect=LLMBadRequestError('prompt too long'))
+
+    def to_agent_executor(conversation_message_task, **kwargs):
+        agent_executor = MagicMock()
+        agent_executor.run.side_effect = lambda query: run_agent(conversation_message_task, query)
+        return agent_executor
+
+    orchestrator_rule_parser = mocker.patch('core.completion.OrchestratorRuleParser').return_value
+    orchestrator_rule_parser.to_agent_executor.side_effect = to_agent_executor
+
+    with pytest.raises(LLMBadRequestError):
+        Completion.generate(task_id='task_id', app=app_model, app_model_config=app_model_config, query='query',
+                            inputs={}, files=[], user=user, conversation=None, streaming=True)
+
+    db.session.remove()
+    message = db.session.query(Message).one()
+    assert db.session.query(MessageChain).filter(MessageChain.message_id == message.id).count() == 1
+    agent_thought = db.session.query(MessageAgentThought).one()
+    assert agent_thought.message_id == message.id
+    assert agent_thought.thought == 'search the dataset'
+    dataset_query = db.session.query(DatasetQuery).one()
+    assert dataset_query.content == 'query'
+    assert dataset_query.source_app_id == app_model.id
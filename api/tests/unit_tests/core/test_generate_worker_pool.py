@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from core.generate_worker_pool import GenerateWorkerPool
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({
+        'GENERATE_WORKER_POOL_SIZE': 1,
+        'GENERATE_WORKER_QUEUE_SIZE': 1
+    })
+    with app.app_context():
+        yield app
+
+
+def test_admission_control(app):
+    pool = GenerateWorkerPool()
+    started = threading.Event()
+    release = threading.Event()
+
+    def task():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    running = pool.try_submit(task)
+    assert started.wait(5)
+    queued = pool.try_submit(task)
+
+    # one running and one queued, the next one is rejected
+    assert pool.try_submit(task) is None
+
+    stats = pool.stats()
+    assert stats['running'] == 1
+    assert stats['queue_depth'] == 1
+    assert stats['rejected'] == 1
+
+    release.set()
+    assert running.result(5) == 'done'
+    assert queued.result(5) == 'done'
+
+    stats = pool.stats()
+    assert stats['running'] == 0
+    assert stats['queue_depth'] == 0
+    assert stats['completed'] == 2
+    assert stats['max_wait_time'] > 0
+
+
+def test_cancel_queued_task(app):
+    pool = GenerateWorkerPool()
+    started = threading.Event()
+    release = threading.Event()
+
+    def task():
+        started.set()
+        return release.wait(5)
+
+    running = pool.try_submit(task)
+    assert started.wait(5)
+    queued = pool.try_submit(task)
+
+    assert pool.cancel(queued)
+    assert not pool.cancel(running)
+    assert pool.stats()['queue_depth'] == 0
+
+    release.set()
+    assert running.result(5)
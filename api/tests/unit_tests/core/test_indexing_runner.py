@@ -0,0 +1,139 @@
+from unittest.mock import MagicMock
+
+import pytest
+from langchain.schema import Document
+
+from config import get_provider_concurrency
+from core.indexing_runner import IndexingRunner, DocumentIsPausedException
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment
+from models.dataset import Document as DatasetDocument
+
+DATASET_ID = '00000000-0000-0000-0000-000000000000'
+DOCUMENT_ID = '00000000-0000-0000-0000-000000000001'
+
+
+@pytest.fixture
+def app(sqlite_app, mocker):
+    sqlite_app.config.update({
+        'INDEXING_EMBEDDING_CONCURRENCY': 1,
+        'INDEXING_EMBEDDING_PROVIDER_CONCURRENCY': {'openai': 2, 'localai': 0}
+    })
+
+    embedding_model = MagicMock()
+    embedding_model.get_num_tokens_batch.side_effect = lambda texts: [len(text.split()) for text in texts]
+    mocker.patch('core.indexing_runner.ModelFactory.get_embedding_model', return_value=embedding_model)
+    mocker.patch('core.indexing_runner.redis_client').get.return_value = None
+
+    return sqlite_app
+
+
+@pytest.fixture
+def indexes(app, mocker) -> dict:
+    indexes = {'high_quality': MagicMock(), 'economy': MagicMock()}
+    mocker.patch('core.indexing_runner.IndexBuilder.get_index',
+                 side_effect=lambda dataset, indexing_technique: indexes[indexing_technique]
+                 if indexing_technique == 'economy' or dataset.indexing_technique == 'high_quality' else None)
+    return indexes
+
+
+def add_dataset(indexing_technique: str, index_struct: str = None) -> tuple:
+    dataset = Dataset(id=DATASET_ID, tenant_id='tenant_id', name='dataset', provider='vendor',
+                      permission='only_me', indexing_technique=indexing_technique, index_struct=index_struct,
+                      embedding_model_provider='openai', embedding_model='text-embedding-ada-002',
+                      created_by='account_id')
+    dataset_document = DatasetDocument(id=DOCUMENT_ID, tenant_id='tenant_id', dataset_id=DATASET_ID, position=1,
+                                       data_source_type='upload_file', batch='batch', name='document',
+                                       created_from='web', created_by='account_id', indexing_status='indexing')
+    db.session.add_all([dataset, dataset_document])
+
+    documents = []
+    for position in range(250):
+        db.session.add(DocumentSegment(
+            tenant_id='tenant_id', dataset_id=DATASET_ID, document_id=DOCUMENT_ID, position=position,
+            content=f'segment {position}', word_count=2, tokens=2, index_node_id=f'node_{position}',
+            index_node_hash=f'hash_{position}', status='indexing', enabled=False, created_by='account_id'
+        ))
+        documents.append(Document(page_content=f'segment {position}', metadata={'doc_id': f'node_{position}'}))
+    db.session.commit()
+
+    return dataset, dataset_document, documents
+
+
+def segment_statuses() -> dict:
+    statuses = {}
+    for segment in db.session.query(DocumentSegment).all():
+        statuses.setdefault((segment.status, segment.enabled), set()).add(segment.position)
+    return statuses
+
+
+def test_get_provider_concurrency(monkeypatch):
+    monkeypatch.setenv('INDEXING_EMBEDDING_PROVIDER_CONCURRENCY', 'openai:4, azure_openai :2')
+    assert get_provider_concurrency('INDEXING_EMBEDDING_PROVIDER_CONCURRENCY') == {'openai': 4, 'azure_openai': 2}
+
+    monkeypatch.delenv('INDEXING_EMBEDDING_PROVIDER_CONCURRENCY')
+    assert get_provider_concurrency('INDEXING_EMBEDDING_PROVIDER_CONCURRENCY') == {}
+
+
+def test_get_embedding_concurrency(app):
+    indexing_runner = IndexingRunner()
+    assert indexing_runner._get_embedding_concurrency('openai') == 2
+    assert indexing_runner._get_embedding_concurrency('cohere') == 1
+    assert indexing_runner._get_embedding_concurrency('localai') == 1
+
+
+def test_complete_segments(app):
+    add_dataset('high_quality')
+    db.session.query(DocumentSegment).filter(DocumentSegment.position == 1).update({'status': 'error'})
+    db.session.commit()
+
+    IndexingRunner()._complete_segments(DOCUMENT_ID, [
+        Document(page_content='', metadata={'doc_id': f'node_{position}'}) for position in range(3)
+    ])
+
+    db.session.expire_all()
+    statuses = segment_statuses()
+    assert statuses[('completed', True)] == {0, 2}
+    assert statuses[('error', False)] == {1}
+    assert statuses[('indexing', False)] == set(range(3, 250))
+
+
+def test_build_index(app, indexes):
+    dataset, dataset_document, documents = add_dataset('high_quality', index_struct='{"type": "qdrant"}')
+
+    IndexingRunner()._build_index(dataset, dataset_document, documents)
+
+    db.session.expire_all()
+    assert segment_statuses() == {('completed', True): set(range(250))}
+    assert [len(call.args[0]) for call in indexes['high_quality'].add_texts.call_args_list] == [100, 100, 50]
+    assert [len(call.args[0]) for call in indexes['economy'].add_texts.call_args_list] == [100, 100, 50]
+    dataset_document = db.session.query(DatasetDocument).filter(DatasetDocument.id == DOCUMENT_ID).one()
+    assert (dataset_document.indexing_status, dataset_document.tokens) == ('completed', 500)
+
+
+def test_build_economy_index(app, indexes):
+    dataset, dataset_document, documents = add_dataset('economy')
+
+    IndexingRunner()._build_index(dataset, dataset_document, documents)
+
+    db.session.expire_all()
+    assert segment_statuses() == {('completed', True): set(range(250))}
+    assert indexes['high_quality'].add_texts.call_count == 0
+    assert indexes['economy'].add_texts.call_count == 3
+
+
+def test_build_index_paused(app, indexes, mocker):
+    dataset, dataset_document, documents = add_dataset('high_quality')
+    # paused after the first chunk, which creates the vector collection
+    redis_client = mocker.patch('core.indexing_runner.redis_client')
+    redis_client.get.side_effect = [None, b'1']
+
+    with pytest.raises(DocumentIsPausedException):
+        IndexingRunner()._build_index(dataset, dataset_document, documents)
+
+    db.session.expire_all()
+    assert segment_statuses() == {('completed', True): set(range(100)), ('indexing', False): set(range(100, 250))}
+    assert indexes['high_quality'].add_texts.call_count == 1
+    assert indexes['economy'].add_texts.call_count == 1
+    dataset_document = db.session.query(DatasetDocument).filter(DatasetDocument.id == DOCUMENT_ID).one()
+    assert dataset_document.indexing_status == 'indexing'
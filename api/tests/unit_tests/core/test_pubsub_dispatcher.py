@@ -0,0 +1,97 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from core.pubsub_dispatcher import PubSubDispatcher
+
+
+class FakePubSub:
+    """Counts concurrent uses, redis-py PubSub is not thread-safe."""
+
+    def __init__(self):
+        self.channels = set()
+        self.concurrent_uses = 0
+        self._in_use = threading.Lock()
+        self._published = queue.Queue()
+
+    def publish(self, channel: str, data: dict):
+        self._published.put((channel, json.dumps(data).encode('utf-8')))
+
+    def subscribe(self, channel: str):
+        with self._use():
+            time.sleep(0.001)
+            self.channels.add(channel)
+
+    def unsubscribe(self, channel: str):
+        with self._use():
+            self.channels.discard(channel)
+
+    def get_message(self, timeout: float):
+        with self._use():
+            try:
+                channel, data = self._published.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+            if channel not in self.channels:
+                return None
+
+            return {'type': 'message', 'channel': channel.encode('utf-8'), 'data': data}
+
+    @contextmanager
+    def _use(self):
+        if not self._in_use.acquire(blocking=False):
+            self.concurrent_uses += 1
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            self._in_use.release()
+
+
+def test_concurrent_subscribes_while_messages_flow(mocker):
+    pubsub = FakePubSub()
+    mocker.patch('core.pubsub_dispatcher.redis_client.pubsub', return_value=pubsub)
+    dispatcher = PubSubDispatcher()
+
+    flowing = dispatcher.subscribe('flowing')
+    published = threading.Event()
+
+    def publish_flowing():
+        while not published.is_set():
+            pubsub.publish('flowing', {'event': 'message'})
+            time.sleep(0.001)
+
+    publisher = threading.Thread(target=publish_flowing)
+    publisher.start()
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            subscriptions = list(executor.map(dispatcher.subscribe, [f'channel-{i}' for i in range(100)]))
+    finally:
+        published.set()
+        publisher.join()
+
+    # subscribed once subscribe returns
+    assert pubsub.channels == {'flowing'} | {subscription.channel for subscription in subscriptions}
+    for subscription in subscriptions:
+        pubsub.publish(subscription.channel, {'event': 'end'})
+    for subscription in subscriptions:
+        assert json.loads(subscription._queue.get(timeout=5)['data']) == {'event': 'end'}
+    assert json.loads(flowing._queue.get(timeout=5)['data']) == {'event': 'message'}
+
+    for subscription in subscriptions:
+        dispatcher.unsubscribe(subscription)
+    dispatcher.unsubscribe(flowing)
+
+    deadline = time.monotonic() + 5
+    while pubsub.channels and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not pubsub.channels
+    assert pubsub.concurrent_uses == 0
+    assert dispatcher.stats() == {'subscriptions': 0, 'listener_alive': True}
@@ -0,0 +1,118 @@
+import pytest
+import tiktoken
+from flask import Flask
+
+from core.model_providers.models.entity.message import PromptMessage, MessageType
+from core.model_providers.models.llm.base import BaseLLM
+from core.tokenizer_service import TokenizerService
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({'TOKENIZER_CACHE_SIZE': 100000})
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def encoding():
+    # byte level encoding built offline, the real ones are downloaded on first use
+    return tiktoken.Encoding(
+        name='bytes',
+        pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+
+
+@pytest.fixture
+def encoded_batches(mocker, encoding):
+    batches = []
+
+    def encode_batch(texts):
+        batches.append(texts)
+        return [len(token_ids) for token_ids in encoding.encode_ordinary_batch(texts)]
+
+    mocker.patch.object(TokenizerService, '_load_encoder', return_value=encode_batch)
+    return batches
+
+
+def test_count_many(app, encoding, encoded_batches):
+    service = TokenizerService()
+    texts = ['hello world', '', 'hello world', 'another text']
+
+    counts = service.count_many(texts)
+    assert counts == [len(encoding.encode_ordinary(text)) for text in texts]
+    assert counts[1] == 0
+
+    # duplicated and empty texts are not encoded
+    assert encoded_batches == [['hello world', 'another text']]
+
+    assert service.count('another text') == counts[3]
+    assert len(encoded_batches) == 1
+    assert service.stats()['hits'] == 1
+
+    # counts are kept per encoder
+    service.count('another text', 'gpt-3.5-turbo')
+    assert encoded_batches[-1] == ['another text']
+    assert sorted(service.stats()['encoders']) == ['gpt-3.5-turbo', 'gpt2']
+
+    service.clear()
+    service.count('another text')
+    assert len(encoded_batches) == 3
+
+
+def test_count_messages(app):
+    service = TokenizerService()
+    counted = []
+
+    def counter(messages):
+        counted.append(messages)
+        return sum(len(message.content) for message in messages)
+
+    messages = [
+        PromptMessage(type=MessageType.SYSTEM, content='You are a helpful assistant.'),
+        PromptMessage(type=MessageType.USER, content='hello')
+    ]
+
+    assert service.count_messages('openai:gpt-3.5-turbo', messages, counter) == 33
+    assert service.count_messages('openai:gpt-3.5-turbo', list(messages), counter) == 33
+    assert len(counted) == 1
+
+    # same contents with another role or model are counted again
+    assert service.count_messages('openai:gpt-4', messages, counter) == 33
+    service.count_messages('openai:gpt-3.5-turbo', [
+        PromptMessage(type=MessageType.USER, content='You are a helpful assistant.'),
+        PromptMessage(type=MessageType.USER, content='hello')
+    ], counter)
+    assert len(counted) == 3
+
+
+
+def test_llm_num_tokens_counted_once(app, mocker):
+    service = TokenizerService()
+    mocker.patch('core.model_providers.models.llm.base.tokenizer_service', service)
+    model = mocker.Mock()
+    model.configure_mock(name='gpt-3.5-turbo')
+    model.model_provider.provider_name = 'openai'
+    model._get_num_tokens.return_value = 8
+    messages = [PromptMessage(type=MessageType.USER, content='hello')]
+
+    assert BaseLLM.get_num_tokens(model, messages) == 8
+    assert BaseLLM.get_num_tokens(model, list(messages)) == 8
+    model._get_num_tokens.assert_called_once_with(messages)
+
+
+def test_count_messages_without_app_context():
+    service = TokenizerService()
+    counted = []
+
+    def counter(messages):
+        counted.append(messages)
+        return 1
+
+    messages = [PromptMessage(type=MessageType.USER, content='hello')]
+    assert service.count_messages('openai:gpt-3.5-turbo', messages, counter) == 1
+    assert service.count_messages('openai:gpt-3.5-turbo', messages, counter) == 1
+    assert len(counted) == 2
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from core.vector_store.qdrant_local_registry import QdrantLocalRegistry, SharedQdrantLocal
+
+VECTOR_SIZE = 32
+
+
+def random_vector(rng: random.Random) -> list[float]:
+    return [rng.random() for _ in range(VECTOR_SIZE)]
+
+
+def create_collection(client: QdrantClient, collection_name: str, size: int, rng: random.Random):
+    client.recreate_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)
+    )
+    client.upsert(collection_name=collection_name, points=[
+        models.PointStruct(id=i, vector=random_vector(rng), payload={'page_content': f'text {i}'})
+        for i in range(size)
+    ])
+
+
+@pytest.fixture
+def registry():
+    registry = QdrantLocalRegistry()
+    yield registry
+    registry.clear()
+
+
+def test_client_shared_per_path(tmp_path, registry):
+    client = registry.get_client(str(tmp_path))
+    assert registry.get_client(str(tmp_path / '.')) is client
+    assert isinstance(client._client, SharedQdrantLocal)
+
+    create_collection(client, 'collection', 10, random.Random(0))
+    assert client.count('collection').count == 10
+    assert registry.stats()[str(tmp_path)]['reloads'] == 0
+
+
+def test_reload_on_write_of_another_handle(tmp_path, registry):
+    rng = random.Random(0)
+    client = registry.get_client(str(tmp_path))
+    create_collection(client, 'collection', 10, rng)
+
+    # another process sharing the folder
+    another_client = QdrantClient(location=':memory:')
+    another_client._client = SharedQdrantLocal(str(tmp_path))
+    try:
+        another_client.upsert(collection_name='collection', points=[
+            models.PointStruct(id=10, vector=random_vector(rng), payload={'page_content': 'text 10'})
+        ])
+
+        assert client.count('collection').count == 11
+        assert client.count('collection').count == 11
+        assert client._client.stats()['reloads'] == 1
+
+        # own writes do not reload
+        client.delete(collection_name='collection', points_selector=models.PointIdsList(points=[0]))
+        assert client.count('collection').count == 10
+        assert client._client.stats()['reloads'] == 1
+
+        assert another_client.count('collection').count == 10
+        assert another_client._client.stats()['reloads'] == 1
+    finally:
+        another_client.close()
+
@@ -0,0 +1,77 @@
+import uuid
+
+import pytest
+from flask import Flask
+from langchain.embeddings import FakeEmbeddings
+from langchain.schema import Document
+
+from core.index.vector_index.qdrant_vector_index import QdrantVectorIndex, QdrantConfig
+from core.vector_store.qdrant_local_registry import qdrant_local_registry
+from models.dataset import Dataset
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({
+        'VECTOR_CLIENT_POOL_IDLE_TIMEOUT': 300,
+        'VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL': 30
+    })
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def vector_index(app, tmp_path):
+    config = QdrantConfig(endpoint='path:storage', api_key=None, root_path=str(tmp_path),
+                          upsert_batch_size=1000, upsert_parallelism=2)
+    yield QdrantVectorIndex(dataset=Dataset(id=str(uuid.uuid4())), config=config, embeddings=FakeEmbeddings(size=8))
+    qdrant_local_registry.clear()
+
+
+def create_documents(count: int, document_id: str = 'document_id') -> list[Document]:
+    return [
+        Document(page_content=f'text {i}', metadata={'doc_id': str(uuid.uuid4()), 'document_id': document_id})
+        for i in range(count)
+    ]
+
+
+def count_points(vector_index: QdrantVectorIndex) -> int:
+    return vector_index._get_client().count(vector_index.get_index_name(vector_index.dataset)).count
+
+
+def test_batched_upsert(vector_index):
+    vector_index.create(create_documents(2500))
+    assert count_points(vector_index) == 2500
+
+
+def test_delete_by_ids(vector_index):
+    documents = create_documents(2500)
+    vector_index.create(documents)
+
+    vector_index.delete_by_ids([document.metadata['doc_id'] for document in documents[:1500]])
+    assert count_points(vector_index) == 1000
+
+    vector_index.delete_by_document_id('document_id')
+    assert count_points(vector_index) == 0
+
+
+def test_search_without_vectors(vector_index, mocker):
+    documents = create_documents(10)
+    vector_index.create(documents)
+    search = mocker.spy(vector_index._get_client(), 'search')
+
+    results = vector_index.search('text 1', search_kwargs={'k': 3})
+    assert len(results) == 3
+    assert all(result.metadata['document_id'] == 'document_id' for result in results)
+
+    # neither vectors nor unused payload keys are returned
+    for scored_point in search.spy_return:
+        assert scored_point.vector is None
+        assert set(scored_point.payload.keys()) <= {'page_content', 'metadata', 'doc_id'}
+
+    doc_ids = [result.metadata['doc_id'] for result in results]
+    vectors = vector_index.get_vectors_by_ids(doc_ids)
+    assert sorted(vectors.keys()) == sorted(doc_ids)
+    assert all(len(vector) == 8 for vector in vectors.values())
+
@@ -0,0 +1,115 @@
+import gc
+import time
+
+import pytest
+from flask import Flask
+
+from core.index.vector_index.qdrant_vector_index import QdrantVectorIndex, QdrantConfig
+from core.vector_store.vector_client_pool import VectorClientPool
+from models.dataset import Dataset
+
+
+class Owner:
+    pass
+
+
+class Client:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.closed = False
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({
+        'VECTOR_CLIENT_POOL_IDLE_TIMEOUT': 300,
+        'VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL': 30
+    })
+    with app.app_context():
+        yield app
+
+
+def acquire(pool: VectorClientPool, owner: Owner, config_key: tuple = ('http://localhost',)) -> Client:
+    return pool.acquire(
+        owner=owner,
+        kind='test',
+        config_key=config_key,
+        factory=Client,
+        health_check=lambda client: client.healthy,
+        close=lambda client: setattr(client, 'closed', True)
+    )
+
+
+def test_client_reused_after_owner_collected(app):
+    pool = VectorClientPool()
+
+    owner = Owner()
+    client = acquire(pool, owner)
+    another_owner = Owner()
+    # leased clients are not shared
+    assert acquire(pool, another_owner) is not client
+    assert acquire(pool, Owner(), ('http://another-host',)) is not client
+    assert pool.stats()['clients']['test'] == {'idle': 1, 'leased': 2}
+
+    del owner
+    gc.collect()
+    assert acquire(pool, Owner()) is client
+
+    stats = pool.stats()
+    assert stats['created'] == 3
+    assert stats['reused'] == 1
+
+
+def test_unhealthy_client_replaced(app):
+    pool = VectorClientPool()
+    client = acquire(pool, Owner())
+    client.healthy = False
+
+    # checked only when idle for longer than the health check interval
+    assert acquire(pool, Owner()) is client
+
+    app.config['VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL'] = 0
+    time.sleep(0.01)
+    assert acquire(pool, Owner()) is not client
+    assert client.closed
+    assert pool.stats()['health_check_failures'] == 1
+
+
+def test_idle_client_evicted(app):
+    pool = VectorClientPool()
+    client = acquire(pool, Owner())
+
+    app.config['VECTOR_CLIENT_POOL_IDLE_TIMEOUT'] = 0
+    time.sleep(0.01)
+    assert acquire(pool, Owner(), ('http://another-host',)) is not client
+    assert client.closed
+    assert pool.stats()['evicted'] == 1
+
+
+def test_clients_of_parent_process_dropped(app, mocker):
+    pool = VectorClientPool()
+    client = acquire(pool, Owner())
+    owner = Owner()
+    leased_client = acquire(pool, owner)
+
+    mocker.patch('core.vector_store.vector_client_pool.os.getpid', return_value=-1)
+    assert acquire(pool, Owner()) is not client
+    # neither closed nor returned by the forked worker
+    assert not client.closed
+    del owner
+    gc.collect()
+    assert leased_client not in [acquire(pool, Owner()) for _ in range(2)]
+
+
+def test_qdrant_vector_index_client_pooled(app):
+    config = QdrantConfig(endpoint='http://localhost:6333', api_key=None, root_path='/')
+    dataset = Dataset(id='dataset_id')
+
+    vector_index = QdrantVectorIndex(dataset=dataset, config=config, embeddings=None)
+    client = vector_index._get_client()
+    assert vector_index._get_client() is client
+
+    del vector_index
+    gc.collect()
+    assert QdrantVectorIndex(dataset=dataset, config=config, embeddings=None)._get_client() is client
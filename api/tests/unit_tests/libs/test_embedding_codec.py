@@ -0,0 +1,37 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from libs.embedding_codec import encode_embedding, decode_embedding, is_compact_embedding
+
+
+def test_float32_round_trip():
+    embedding = np.random.rand(1536).astype(np.float32).tolist()
+    data = encode_embedding(embedding)
+
+    assert is_compact_embedding(data)
+    assert len(data) < len(pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL)) / 2
+    assert decode_embedding(data).tolist() == embedding
+
+
+@pytest.mark.parametrize('storage_format, tolerance', [('float16', 1e-3), ('int8', 1e-2)])
+def test_quantized_round_trip(storage_format, tolerance):
+    vector = np.random.rand(1536) - 0.5
+    embedding = (vector / np.linalg.norm(vector)).tolist()
+    data = encode_embedding(embedding, storage_format)
+
+    assert np.allclose(decode_embedding(data), embedding, atol=tolerance)
+
+
+def test_decode_legacy_pickle():
+    embedding = [0.1, 0.2, 0.3]
+    data = pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL)
+
+    assert not is_compact_embedding(data)
+    assert np.allclose(decode_embedding(data), embedding)
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        encode_embedding([0.1], 'float64')
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, Column, DateTime, String
+from sqlalchemy.orm import declarative_base, Session
+
+from libs.infinite_scroll_pagination import keyset_paginate
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = 'items'
+
+    id = Column(String, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        created_at = datetime(2023, 11, 1)
+        # pairs of rows share a created_at
+        session.add_all([Item(id=f'{i:02d}', created_at=created_at + timedelta(seconds=i // 2)) for i in range(9)])
+        session.commit()
+        yield session
+
+
+def test_keyset_paginate(session):
+    ids = []
+    cursor = None
+    has_more = True
+    while has_more:
+        items, has_more = keyset_paginate(session.query(Item), Item.created_at, Item.id, cursor, 2)
+        ids.extend(item.id for item in items)
+        cursor = (items[-1].created_at, items[-1].id)
+
+    # no row is skipped or repeated when created_at ties across pages
+    assert ids == [f'{i:02d}' for i in reversed(range(9))]
+
+
+def test_keyset_paginate_exact_page(session):
+    items, has_more = keyset_paginate(session.query(Item), Item.created_at, Item.id, None, 9)
+
+    assert len(items) == 9
+    assert not has_more
@@ -0,0 +1,22 @@
+from libs.preload import preloadable_property, set_preloaded_value
+
+
+class Row:
+    def __init__(self):
+        self.queries = 0
+
+    @preloadable_property
+    def message_count(self):
+        self.queries += 1
+        return 1
+
+
+def test_preloadable_property():
+    row = Row()
+    assert row.message_count == 1
+    assert row.queries == 1
+
+    set_preloaded_value(row, 'message_count', 0)
+    # falsy preloaded values are used as well
+    assert row.message_count == 0
+    assert row.queries == 1
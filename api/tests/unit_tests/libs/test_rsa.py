@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock
+
+import pytest
+from Crypto.PublicKey import RSA
+
+from libs import rsa
+
+
+@pytest.fixture
+def key_storage(mocker):
+    private_key = RSA.generate(2048)
+    storage = mocker.patch('libs.rsa.storage')
+    storage.load.return_value = private_key.export_key()
+    redis_client = mocker.patch('libs.rsa.redis_client')
+    redis_client.get.return_value = None
+
+    rsa.clear_decrypt_cache()
+    yield MagicMock(storage=storage, public_key=private_key.publickey().export_key())
+    rsa.clear_decrypt_cache()
+
+
+def test_decrypt_cached(key_storage):
+    encrypted_text = rsa.encrypt('sk-secret', key_storage.public_key)
+
+    assert rsa.decrypt(encrypted_text, 'tenant_id') == 'sk-secret'
+    assert rsa.decrypt(encrypted_text, 'tenant_id') == 'sk-secret'
+
+    # the private key is loaded and parsed once
+    assert key_storage.storage.load.call_count == 1
+
+    another_encrypted_text = rsa.encrypt('sk-another-secret', key_storage.public_key)
+    assert rsa.decrypt(another_encrypted_text, 'tenant_id') == 'sk-another-secret'
+    assert key_storage.storage.load.call_count == 1
+
+    rsa.clear_decrypt_cache('tenant_id')
+    assert rsa.decrypt(encrypted_text, 'tenant_id') == 'sk-secret'
+    assert key_storage.storage.load.call_count == 2
+
+
+def test_decrypt_parses_private_key_once(key_storage, mocker):
+    encrypted_texts = [rsa.encrypt(f'sk-secret-{i}', key_storage.public_key) for i in range(3)]
+    import_key = mocker.spy(rsa.RSA, 'import_key')
+    new_cipher = mocker.spy(rsa.PKCS1_OAEP, 'new')
+
+    for _ in range(5):
+        assert [rsa.decrypt(encrypted_text, 'tenant_id') for encrypted_text in encrypted_texts] == [
+            f'sk-secret-{i}' for i in range(3)
+        ]
+
+    # one private key parse per tenant, one RSA decryption per text
+    assert import_key.call_count == 1
+    assert new_cipher.call_count == 3
+
+    rsa.clear_decrypt_cache()
+    assert rsa.decrypt(encrypted_texts[0], 'tenant_id') == 'sk-secret-0'
+    assert import_key.call_count == 2
+    assert new_cipher.call_count == 4
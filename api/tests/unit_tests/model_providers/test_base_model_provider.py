@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 
 import pytest
+from flask import Flask
 
 from core.model_providers.error import QuotaExceededError
 from core.model_providers.models.entity.model_params import ModelType
@@ -8,6 +9,17 @@ from models.provider import Provider, ProviderType
 from tests.unit_tests.model_providers.fake_model_provider import FakeModelProvider
 
 
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({
+        'PROVIDER_USAGE_WRITE_BEHIND_ENABLED': False,
+        'PROVIDER_USAGE_FLUSH_INTERVAL': 10
+    })
+    with app.app_context():
+        yield app
+
+
 def test_get_supported_model_list(mocker):
     mocker.patch.object(
         FakeModelProvider,
@@ -27,7 +39,7 @@ def test_get_supported_model_list(mocker):
     assert result == [{'id': 'test_model', 'name': 'test_model', 'mode': 'completion'}]
 
 
-def test_check_quota_over_limit(mocker):
+def test_check_quota_over_limit(mocker, app):
     mocker.patch.object(
         FakeModelProvider,
         'get_rules',
@@ -44,7 +56,7 @@ def test_check_quota_over_limit(mocker):
         provider.check_quota_over_limit()
 
 
-def test_check_quota_not_over_limit(mocker):
+def test_check_quota_not_over_limit(mocker, app):
     mocker.patch.object(
         FakeModelProvider,
         'get_rules',
@@ -70,3 +82,45 @@ def test_check_custom_quota_over_limit(mocker):
     provider = FakeModelProvider(provider=Provider(provider_type=ProviderType.CUSTOM.value))
 
     assert provider.check_quota_over_limit() is None
+
+
+def test_check_quota_write_behind(mocker, app):
+    app.config['PROVIDER_USAGE_WRITE_BEHIND_ENABLED'] = True
+    mocker.patch.object(
+        FakeModelProvider,
+        'get_rules',
+        return_value={'support_provider_types': ['system']}
+    )
+
+    # stored usage 90 of 100, with 10 pending to be flushed
+    mock_pipeline = MagicMock()
+    mock_pipeline.execute.return_value = [[b'1', b'100', b'90'], b'10']
+    mocker.patch('extensions.ext_redis.redis_client.pipeline', return_value=mock_pipeline)
+
+    provider = FakeModelProvider(provider=Provider(id='provider_id', provider_type=ProviderType.SYSTEM.value))
+
+    with pytest.raises(QuotaExceededError):
+        provider.check_quota_over_limit()
+
+    mock_pipeline.execute.return_value = [[b'1', b'100', b'90'], b'9']
+    assert provider.check_quota_over_limit() is None
+
+
+def test_deduct_quota_write_behind(mocker, app):
+    app.config['PROVIDER_USAGE_WRITE_BEHIND_ENABLED'] = True
+    mocker.patch.object(
+        FakeModelProvider,
+        'get_rules',
+        return_value={'support_provider_types': ['system']}
+    )
+    mocker.patch.object(FakeModelProvider, 'should_deduct_quota', return_value=True)
+    mocker.patch('core.model_providers.provider_usage_buffer.ProviderUsageBuffer._ensure_flusher_started')
+    mock_pipeline = MagicMock()
+    mocker.patch('extensions.ext_redis.redis_client.pipeline', return_value=mock_pipeline)
+    mock_query = mocker.patch('extensions.ext_database.db.session.query')
+
+    provider = FakeModelProvider(provider=Provider(id='provider_id', provider_type=ProviderType.SYSTEM.value))
+    provider.deduct_quota(used_tokens=10)
+
+    mock_pipeline.incrby.assert_called_once_with('provider_quota_used_pending:provider_id', 1)
+    mock_query.assert_not_called()
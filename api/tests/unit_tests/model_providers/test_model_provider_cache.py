@@ -0,0 +1,89 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from core.model_providers.model_provider_cache import ModelProviderCache
+from core.model_providers.models.entity.model_params import ModelType
+from core.model_providers.providers.openai_provider import OpenAIProvider
+from models.provider import Provider, ProviderType
+
+
+def decrypt_side_effect(tenant_id, encrypted_key):
+    return encrypted_key.replace('encrypted_', '')
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({'MODEL_PROVIDER_CACHE_TTL': 10})
+    with app.app_context():
+        yield app
+
+
+def get_model_provider(tenant_id='tenant_id'):
+    provider = Provider(
+        id='provider_id',
+        tenant_id=tenant_id,
+        provider_name='openai',
+        provider_type=ProviderType.CUSTOM.value,
+        encrypted_config=json.dumps({'openai_api_key': 'encrypted_valid_key'}),
+        is_valid=True,
+    )
+    return OpenAIProvider(provider=provider)
+
+
+@patch('core.helper.encrypter.decrypt_token', side_effect=decrypt_side_effect)
+def test_model_provider_resolved_once(mock_decrypt, app):
+    cache = ModelProviderCache()
+    resolved = []
+
+    def resolver():
+        resolved.append(True)
+        return get_model_provider()
+
+    for _ in range(3):
+        model_provider = cache.get_model_provider('tenant_id', 'openai', 'gpt-3.5-turbo',
+                                                  ModelType.TEXT_GENERATION, resolver)
+        credentials = model_provider.get_model_credentials('gpt-3.5-turbo', ModelType.TEXT_GENERATION)
+        assert credentials['openai_api_key'] == 'valid_key'
+        assert model_provider.provider_name == 'openai'
+
+    assert len(resolved) == 1
+    assert mock_decrypt.call_count == 1
+
+    cache.invalidate('tenant_id')
+    cache.get_model_provider('tenant_id', 'openai', 'gpt-3.5-turbo', ModelType.TEXT_GENERATION, resolver)
+    assert len(resolved) == 2
+
+
+def test_unresolved_model_provider_not_cached(app):
+    cache = ModelProviderCache()
+    resolved = []
+
+    def resolver():
+        resolved.append(True)
+        return None
+
+    for _ in range(2):
+        assert cache.get_model_provider('tenant_id', 'openai', 'gpt-3.5-turbo',
+                                        ModelType.TEXT_GENERATION, resolver) is None
+
+    assert len(resolved) == 2
+
+
+def test_default_model(app):
+    cache = ModelProviderCache()
+
+    assert cache.get_default_model('tenant_id', ModelType.EMBEDDINGS,
+                                   lambda: ('openai', 'text-embedding-ada-002')) == ('openai', 'text-embedding-ada-002')
+    # cached, the resolver is not called
+    assert cache.get_default_model('tenant_id', ModelType.EMBEDDINGS, lambda: None) == \
+           ('openai', 'text-embedding-ada-002')
+
+    cache.invalidate('another_tenant_id')
+    assert cache.get_default_model('tenant_id', ModelType.EMBEDDINGS, lambda: None) is not None
+
+    cache.invalidate('tenant_id')
+    assert cache.get_default_model('tenant_id', ModelType.EMBEDDINGS, lambda: None) is None
@@ -0,0 +1,159 @@
+import datetime
+from contextlib import contextmanager
+from typing import Optional
+
+import pytest
+from sqlalchemy import event
+
+from events.event_handlers.clear_api_token_app_cache_when_app_deleted import handle as handle_app_deleted
+from events.event_handlers.clear_api_token_app_cache_when_app_model_config_updated import \
+    handle as handle_app_model_config_updated
+from extensions.ext_database import db
+from models.model import ApiToken, App
+from services.api_token_service import ApiTokenService
+from tasks.update_api_token_last_used_task import update_api_token_last_used_task
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, name: str) -> Optional[bytes]:
+        value = self.values.get(name)
+        return value.encode('utf-8') if value is not None else None
+
+    def set(self, name: str, value, ex: int = None, nx: bool = False) -> Optional[bool]:
+        if nx and name in self.values:
+            return None
+        self.values[name] = str(value)
+        return True
+
+    def setex(self, name: str, time: int, value):
+        self.values[name] = str(value)
+
+    def delete(self, name: str):
+        self.values.pop(name, None)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def redis(sqlite_app, mocker):
+    redis = FakeRedis()
+    mocker.patch('services.api_token_service.redis_client', redis)
+    return redis
+
+
+@pytest.fixture
+def app_model(sqlite_app) -> App:
+    app_model = App(id='app_id', tenant_id='tenant_id', name='app', mode='chat', app_model_config_id='config_1',
+                    enable_site=True, enable_api=True, api_rpm=0, api_rph=0)
+    db.session.add(app_model)
+    db.session.add(ApiToken(id='api_token_id', app_id=app_model.id, tenant_id=app_model.tenant_id, type='app',
+                            token='app-token'))
+    db.session.commit()
+    return app_model
+
+
+def test_api_token_cached(redis, app_model):
+    api_token = ApiTokenService.get_api_token('app', 'app-token')
+    assert api_token.id == 'api_token_id'
+
+    with count_queries() as statements:
+        cached_api_token = ApiTokenService.get_api_token('app', 'app-token')
+
+    assert statements == []
+    assert (cached_api_token.id, cached_api_token.app_id, cached_api_token.tenant_id) == \
+           ('api_token_id', 'app_id', 'tenant_id')
+    assert ApiTokenService.get_api_token('dataset', 'app-token') is None
+
+
+def test_api_token_cache_deleted(redis, app_model):
+    ApiTokenService.get_api_token('app', 'app-token')
+
+    db.session.query(ApiToken).filter(ApiToken.id == 'api_token_id').delete()
+    db.session.commit()
+    assert ApiTokenService.get_api_token('app', 'app-token') is not None
+
+    ApiTokenService.delete_api_token_cache('app', 'app-token')
+    assert ApiTokenService.get_api_token('app', 'app-token') is None
+
+
+def test_app_cached_with_status(redis, app_model):
+    app = ApiTokenService.get_app('app_id')
+    assert (app.status, app.enable_api) == ('normal', True)
+
+    with count_queries() as statements:
+        cached_app = ApiTokenService.get_app('app_id')
+
+    assert statements == []
+    assert (cached_app.id, cached_app.tenant_id, cached_app.mode, cached_app.app_model_config_id) == \
+           ('app_id', 'tenant_id', 'chat', 'config_1')
+    assert (cached_app.status, cached_app.enable_api) == ('normal', True)
+    assert cached_app.created_at == app.created_at
+    assert isinstance(cached_app.updated_at, datetime.datetime)
+    assert ApiTokenService.get_app('unknown_app_id') is None
+
+
+def test_app_cache_deleted_when_api_disabled(redis, app_model):
+    ApiTokenService.get_app('app_id')
+
+    app_model.enable_api = False
+    db.session.commit()
+    assert ApiTokenService.get_app('app_id').enable_api is True
+
+    ApiTokenService.delete_app_cache('app_id')
+    assert ApiTokenService.get_app('app_id').enable_api is False
+
+
+def test_app_cache_deleted_by_app_events(redis, app_model):
+    ApiTokenService.get_app('app_id')
+
+    app_model.app_model_config_id = 'config_2'
+    db.session.commit()
+    handle_app_model_config_updated(app_model, app_model_config=None)
+    assert ApiTokenService.get_app('app_id').app_model_config_id == 'config_2'
+
+    db.session.delete(app_model)
+    db.session.commit()
+    handle_app_deleted(app_model)
+    assert ApiTokenService.get_app('app_id') is None
+
+
+def test_last_used_at_updated_once_per_interval(redis, app_model, mocker):
+    task = mocker.patch('services.api_token_service.update_api_token_last_used_task')
+    api_token = ApiTokenService.get_api_token('app', 'app-token')
+
+    ApiTokenService.update_last_used_at(api_token)
+    ApiTokenService.update_last_used_at(api_token)
+
+    task.delay.assert_called_once()
+    assert task.delay.call_args.args[0] == 'api_token_id'
+
+    # the interval has passed
+    redis.delete('api_token_last_used:api_token_id')
+    ApiTokenService.update_last_used_at(api_token)
+
+    assert task.delay.call_count == 2
+
+
+def test_update_api_token_last_used_task(app_model):
+    last_used_at = datetime.datetime(2023, 10, 1, 12, 30)
+
+    update_api_token_last_used_task('api_token_id', last_used_at.isoformat())
+
+    db.session.expire_all()
+    api_token = db.session.query(ApiToken).filter(ApiToken.id == 'api_token_id').one()
+    assert api_token.last_used_at == last_used_at
@@ -0,0 +1,80 @@
+import json
+from contextlib import contextmanager
+
+from flask_restful import marshal
+from sqlalchemy import event
+
+from extensions.ext_database import db
+from fields.conversation_fields import conversation_fields, conversation_with_summary_fields
+from models.account import Account
+from models.model import AppModelConfig, Conversation, EndUser, Message, MessageAnnotation, MessageFeedback
+from services.batch_loader_service import BatchLoaderService
+
+APP_ID = 'app_id'
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def add_conversation(index: int, app_model_config: AppModelConfig, account: Account) -> Conversation:
+    end_user = EndUser(id=f'end_user_{index}', tenant_id='tenant_id', app_id=APP_ID, type='browser',
+                       session_id=f'session_{index}')
+    conversation = Conversation(id=f'conversation_{index}', app_id=APP_ID, app_model_config_id=app_model_config.id,
+                                model_provider='openai', model_id='gpt-3.5-turbo', mode='chat', name='conversation',
+                                status='normal', from_source='api', from_end_user_id=end_user.id)
+    message = Message(id=f'message_{index}', app_id=APP_ID, model_provider='openai', model_id='gpt-3.5-turbo',
+                      conversation_id=conversation.id, query=f'query {index}', message=[{'text': 'message'}],
+                      message_unit_price=0, answer='answer', answer_unit_price=0, currency='USD', from_source='api')
+    annotation = MessageAnnotation(app_id=APP_ID, conversation_id=conversation.id, message_id=message.id,
+                                   content=f'annotation {index}', account_id=account.id)
+    feedback = MessageFeedback(app_id=APP_ID, conversation_id=conversation.id, message_id=message.id, rating='like',
+                               from_source='user', from_end_user_id=end_user.id)
+    db.session.add_all([end_user, conversation, message, annotation, feedback])
+
+    return conversation
+
+
+def test_load_conversations_for_marshalled_page(sqlite_app):
+    account = Account(id='account_id', name='account', email='account@example.com')
+    app_model_configs = [
+        AppModelConfig(id=f'app_model_config_{i}', app_id=APP_ID, provider='openai', model_id='gpt-3.5-turbo',
+                       configs={}, pre_prompt=f'pre prompt {i}',
+                       model=json.dumps({'provider': 'openai', 'name': 'gpt-3.5-turbo', 'completion_params': {}}))
+        for i in range(2)
+    ]
+    db.session.add_all([account, *app_model_configs])
+    for index in range(10):
+        add_conversation(index, app_model_configs[index % 2], account)
+    db.session.commit()
+    db.session.expunge_all()
+
+    conversations = db.session.query(Conversation).order_by(Conversation.id).all()
+    with count_queries() as statements:
+        BatchLoaderService.load_conversations(conversations)
+        # one query per preloaded property, whatever the page size
+        assert len(statements) == 7
+
+        pages = [marshal(conversations, conversation_fields), marshal(conversations, conversation_with_summary_fields)]
+        assert len(statements) == 7
+
+    conversation_page, summary_page = pages
+    assert conversation_page[3]['annotation']['content'] == 'annotation 3'
+    assert conversation_page[3]['annotation']['account']['name'] == 'account'
+    assert conversation_page[3]['model_config']['pre_prompt'] == 'pre prompt 1'
+    assert conversation_page[3]['from_end_user_session_id'] == 'session_3'
+    assert conversation_page[3]['user_feedback_stats'] == {'like': 1, 'dislike': 0}
+    assert conversation_page[3]['message']['query'] == 'query 3'
+    assert summary_page[4]['annotated'] is True
+    assert summary_page[4]['message_count'] == 1
+    assert summary_page[4]['model_config']['pre_prompt'] == 'pre prompt 0'